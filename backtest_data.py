@@ -0,0 +1,53 @@
+# backtest_data.py
+
+import argparse
+import sys
+
+import pandas as pd
+
+from models.backtest import run_backtest
+from models.company import Company
+from models.market import return_price_matrix
+from models.panels import return_ratio_panel
+from settings import COMPANIES_LIST
+from settings import TICKERS
+
+
+def backtest_data(ratio: str, n_quantiles: int = 3, lag_days: int = 90, rebalance_month: int = 4,
+                  ascending: bool = False, path: str = 'fin_data_output/backtest_data.csv') -> pd.DataFrame:
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    returns_df, stats_df = run_backtest(return_ratio_panel(companies), return_price_matrix(TICKERS), ratio,
+                                        n_quantiles=n_quantiles, lag_days=lag_days, rebalance_month=rebalance_month,
+                                        ascending=ascending)
+
+    returns_df.to_csv(path, index=False)
+
+    direction = 'lowest' if ascending else 'highest'
+    print(f'\nlong the {direction} 1/{n_quantiles} by {ratio}, short the other end, rebalanced in month '
+          f'{rebalance_month} on statements filed {lag_days} days after their date')
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print(stats_df.to_string(index=False, float_format='{:.4f}'.format))
+    print(f'\nperiod returns in {path}')
+
+    return stats_df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='backtest a long/short portfolio formed on a ratio')
+    parser.add_argument('ratio', help='a RATIOS attribute, e.g. return_on_invested_capital')
+    parser.add_argument('--quantiles', type=int, default=3, help='long the top and short the bottom quantile')
+    parser.add_argument('--lag-days', type=int, default=90, help='days from statement date until it is filed')
+    parser.add_argument('--rebalance-month', type=int, default=4, choices=range(1, 13))
+    parser.add_argument('--ascending', action='store_true', help='long the lowest values instead of the highest')
+    parser.add_argument('--path', default='fin_data_output/backtest_data.csv')
+    args = parser.parse_args()
+
+    try:
+        backtest_data(args.ratio, n_quantiles=args.quantiles, lag_days=args.lag_days,
+                      rebalance_month=args.rebalance_month, ascending=args.ascending, path=args.path)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    sys.exit(0)
@@ -0,0 +1,154 @@
+# cli.py
+
+# keep the module level imports to the stdlib: pandas and the models are only imported once an output is stale
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import time
+
+from models.manifest import load_manifest
+from models.manifest import save_manifest
+from models.manifest import return_input_files
+from models.manifest import return_code_files
+from models.manifest import return_file_fingerprints
+from models.manifest import return_digest
+from models.manifest import return_changed_tickers
+from settings import TICKERS
+from settings import MANIFEST_PATH
+
+# incremental outputs accept render_x_data(tickers=...) and can be updated for just the changed tickers
+OUTPUTS = {
+    'is': {'path': 'fin_data_output/is_data.csv', 'cube': 'fin_data_output/is_cube.csv', 'module': 'render_is_data',
+           'kinds': ['is'], 'incremental': True},
+    'bs': {'path': 'fin_data_output/bs_data.csv', 'cube': 'fin_data_output/bs_cube.csv', 'module': 'render_bs_data',
+           'kinds': ['bs'], 'incremental': True},
+    'ratio': {'path': 'fin_data_output/ratio_data.csv', 'cube': 'fin_data_output/ratio_cube.csv',
+              'module': 'render_ratio_data', 'kinds': ['is', 'bs', 'cf', 'price'], 'incremental': True},
+    'sqlite': {'path': 'fin_data_output/fin_data.sqlite', 'module': 'render_sqlite_data',
+               'kinds': ['is', 'bs', 'cf', 'price'], 'incremental': True},
+    'calendar_ratio': {'path': 'fin_data_output/calendar_ratio_data.csv', 'module': 'render_calendar_ratio_data',
+                       'kinds': ['is', 'bs', 'cf', 'price']},
+    'dcf': {'path': 'fin_data_output/dcf_data.csv', 'module': 'render_dcf_data', 'kinds': ['is', 'bs', 'cf', 'price']},
+    'event': {'path': 'fin_data_output/event_data.csv', 'module': 'render_event_data', 'kinds': ['is', 'price']},
+    'forecast': {'path': 'fin_data_output/forecast_data.csv', 'module': 'render_forecast_data', 'kinds': ['is', 'cf']},
+    'growth': {'path': 'fin_data_output/growth_data.csv', 'module': 'render_growth_data', 'kinds': ['is', 'cf']},
+    'market': {'path': 'fin_data_output/market_data.csv', 'module': 'render_market_data', 'kinds': ['price']},
+}
+
+
+def return_dependencies(name: str) -> list:
+    output = OUTPUTS[name]
+
+    return return_input_files(TICKERS, output['kinds']) + return_code_files() + [f'{output["module"]}.py']
+
+
+def return_output_paths(name: str) -> list:
+    return [OUTPUTS[name][key] for key in ['path', 'cube'] if key in OUTPUTS[name]]
+
+
+def return_output_status(names: list, manifest: dict) -> dict:
+    dependencies = {name: return_dependencies(name) for name in names}
+    paths = sorted(set(path for name in names for path in dependencies[name]))
+    fingerprints = return_file_fingerprints(paths, manifest['files'])
+
+    status = {}
+    for name in names:
+        built = manifest['outputs'].get(name, {})
+        ticker_inputs = return_input_files(TICKERS, OUTPUTS[name]['kinds'])
+        digest = return_digest(fingerprints, dependencies[name])
+        exists = all(os.path.exists(path) for path in return_output_paths(name))
+        status[name] = {
+            'digest': digest,
+            'inputs': {path: fingerprints[path]['sha256'] for path in dependencies[name]},
+            'fresh': exists and built.get('digest') == digest,
+            'changed_tickers': None,
+        }
+
+        # an incremental update needs the previous outputs and unchanged code, only the ticker inputs may move
+        code_unchanged = built and all(
+            built['inputs'].get(path) == fingerprints[path]['sha256']
+            for path in dependencies[name] if path not in ticker_inputs
+        )
+        if OUTPUTS[name].get('incremental') and exists and code_unchanged:
+            status[name]['changed_tickers'] = return_changed_tickers(TICKERS, OUTPUTS[name]['kinds'], fingerprints,
+                                                                     built['inputs'])
+
+    manifest['files'].update(fingerprints)
+
+    return status
+
+
+def refresh(names: list, force: bool = False, copy_to: str = None) -> int:
+    manifest = load_manifest(MANIFEST_PATH)
+    status = return_output_status(names, manifest)
+
+    for name in names:
+        if status[name]['fresh'] and not force:
+            print(f'{name}: cached {OUTPUTS[name]["path"]}')
+            continue
+
+        # only now pay for pandas and the statement models
+        start = time.perf_counter()
+        module = importlib.import_module(OUTPUTS[name]['module'])
+        # each render_x_data.py module exposes a render_x_data() function
+        render = getattr(module, OUTPUTS[name]['module'])
+        changed_tickers = status[name]['changed_tickers']
+        if changed_tickers and not force:
+            render(tickers=changed_tickers)
+            print(f'{name}: updated {", ".join(changed_tickers)} in {OUTPUTS[name]["path"]} '
+                  f'in {time.perf_counter() - start:.2f}s')
+        else:
+            render()
+            print(f'{name}: rendered {OUTPUTS[name]["path"]} in {time.perf_counter() - start:.2f}s')
+        manifest['outputs'][name] = {'digest': status[name]['digest'], 'inputs': status[name]['inputs']}
+
+    save_manifest(MANIFEST_PATH, manifest)
+
+    if copy_to:
+        os.makedirs(copy_to, exist_ok=True)
+        for name in names:
+            for path in return_output_paths(name):
+                shutil.copy2(path, copy_to)
+
+    return 0
+
+
+def status(names: list) -> int:
+    manifest = load_manifest(MANIFEST_PATH)
+    output_status = return_output_status(names, manifest)
+
+    for name in names:
+        print(f'{name}: {"fresh" if output_status[name]["fresh"] else "stale"} {OUTPUTS[name]["path"]}')
+
+    # exit code 1 tells a scheduler that a refresh would do work
+    return 0 if all(output_status[name]['fresh'] for name in names) else 1
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='render fin_data_output, reusing outputs whose inputs are unchanged')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    refresh_parser = subparsers.add_parser('refresh', help='render stale outputs')
+    refresh_parser.add_argument('outputs', nargs='*', help=f'any of {", ".join(OUTPUTS)} (default: all)')
+    refresh_parser.add_argument('--force', action='store_true', help='render even if the inputs are unchanged')
+    refresh_parser.add_argument('--copy-to', help='copy the outputs to this directory')
+
+    status_parser = subparsers.add_parser('status', help='report which outputs are stale')
+    status_parser.add_argument('outputs', nargs='*', help=f'any of {", ".join(OUTPUTS)} (default: all)')
+
+    args = parser.parse_args(argv)
+    names = args.outputs or list(OUTPUTS)
+    for name in names:
+        if name not in OUTPUTS:
+            parser.error(f'unknown output {name}, choose from {", ".join(OUTPUTS)}')
+
+    if args.command == 'refresh':
+        return refresh(names, force=args.force, copy_to=args.copy_to)
+
+    return status(names)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
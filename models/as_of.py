@@ -0,0 +1,73 @@
+# models.as_of.py
+
+import numpy as np
+import pandas as pd
+
+from models.panels import return_ratio_panel
+
+# statement keys are ticker_code * DAY_SPAN + days since MIN_DAY, so one sorted int64 array holds every ticker
+MIN_DAY = np.datetime64('1900-01-01', 'D')
+DAY_SPAN = 1 << 20
+
+
+def return_day_offsets(dates) -> np.ndarray:
+    days = (np.asarray(pd.to_datetime(dates).values, dtype='datetime64[D]') - MIN_DAY).astype(np.int64)
+
+    return np.clip(days, -1, DAY_SPAN - 1)
+
+
+class AsOfIndex:
+
+    def __init__(self, panel: pd.DataFrame, date_column: str = 'statementDate'):
+        # panel: one row per statement, with a company column, a date column and any value columns
+        self.date_column: str = date_column
+        self.panel: pd.DataFrame = panel.sort_values(['company', date_column], kind='stable').reset_index(drop=True)
+
+        self.tickers: np.ndarray = np.sort(self.panel['company'].unique())
+        self.codes: np.ndarray = np.searchsorted(self.tickers, self.panel['company'].to_numpy())
+        self.keys: np.ndarray = self.codes * DAY_SPAN + return_day_offsets(self.panel[date_column])
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {len(self.tickers)} tickers, {len(self.panel)} statements'
+
+    def return_positions(self, query_dates, tickers, lag_days: int = 0) -> pd.DataFrame:
+        query_dates = pd.to_datetime(pd.Index(query_dates))
+        tickers = np.asarray(tickers)
+
+        # one query per (date, ticker) pair
+        query_date_grid = np.repeat(query_dates.values, len(tickers))
+        ticker_grid = np.tile(tickers, len(query_dates))
+
+        # a statement is known at the query date once its date plus the reporting lag has passed
+        codes = np.searchsorted(self.tickers, ticker_grid)
+        codes = np.minimum(codes, len(self.tickers) - 1)
+        known_ticker = self.tickers[codes] == ticker_grid if len(self.tickers) else np.zeros(len(ticker_grid), bool)
+        cutoff = query_date_grid - np.timedelta64(lag_days, 'D')
+        query_keys = codes * DAY_SPAN + return_day_offsets(cutoff)
+
+        positions = np.searchsorted(self.keys, query_keys, side='right') - 1
+        found = known_ticker & (positions >= 0)
+        found[found] &= self.codes[positions[found]] == codes[found]
+
+        return pd.DataFrame({
+            'queryDate': query_date_grid,
+            'company': ticker_grid,
+            'position': np.where(found, positions, -1),
+        })
+
+    def query(self, query_dates, tickers, lag_days: int = 0) -> pd.DataFrame:
+        positions = self.return_positions(query_dates, tickers, lag_days=lag_days)
+        found = positions['position'].to_numpy() >= 0
+
+        # gather the matching statements in one take, queries with nothing known yet get empty values
+        statements = self.panel.drop(columns=['company']).iloc[np.where(found, positions['position'], 0)]
+        statements = statements.reset_index(drop=True).where(pd.Series(found), other=None)
+
+        return pd.concat([positions[['queryDate', 'company']], statements], axis=1)
+
+
+def return_as_of_ratios(companies: list, query_dates, tickers, lag_days: int = 0) -> pd.DataFrame:
+    # latest consolidated statement ratios known on each query date, for each ticker
+    as_of_index = AsOfIndex(return_ratio_panel(companies))
+
+    return as_of_index.query(query_dates, tickers, lag_days=lag_days)
@@ -0,0 +1,163 @@
+# models.backtest.py
+
+import numpy as np
+import pandas as pd
+
+from models.as_of import AsOfIndex
+from models.market import return_periods_per_year
+
+LEGS = ['long', 'short', 'long_short']
+
+
+def return_rebalance_positions(dates: pd.DatetimeIndex, rebalance_month: int) -> np.ndarray:
+    # the first price date in the rebalance month of every year
+    positions = np.flatnonzero(dates.month == rebalance_month)
+    first_of_year = np.concatenate([[True], np.diff(dates.year[positions]) > 0]) if len(positions) else []
+
+    return positions[first_of_year]
+
+
+def return_signal_matrix(ratio_panel: pd.DataFrame, ratio: str, rebalance_dates, tickers: list,
+                         lag_days: int) -> np.ndarray:
+    # rebalance dates x tickers, the ratio of the latest statement filed (statement date + lag) by each rebalance
+    as_of_index = AsOfIndex(ratio_panel[['company', 'statementDate', ratio]])
+    known = as_of_index.query(rebalance_dates, tickers, lag_days=lag_days)
+    signals = pd.to_numeric(known[ratio], errors='coerce').to_numpy(dtype=float)
+
+    return signals.reshape(len(rebalance_dates), len(tickers))
+
+
+def return_quantile_weights(signals: np.ndarray, priced: np.ndarray, n_quantiles: int = 3,
+                            ascending: bool = False) -> tuple:
+    # equal weights in the top (long) and bottom (short) quantile of each rebalance row. only tickers with a finite
+    # signal and a price on the rebalance date are ranked, and a row needs at least one ticker per quantile
+    valid = np.isfinite(signals) & priced
+    ranks = pd.DataFrame(np.where(valid, -signals if ascending else signals, np.nan)).rank(axis=1, pct=True)
+    ranks = ranks.to_numpy()
+
+    enough = valid.sum(axis=1) >= n_quantiles
+    long = (ranks > 1 - 1 / n_quantiles) & enough[:, None]
+    short = (ranks <= 1 / n_quantiles) & enough[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_weights = np.nan_to_num(long / long.sum(axis=1, keepdims=True))
+        short_weights = np.nan_to_num(short / short.sum(axis=1, keepdims=True))
+
+    return long_weights, short_weights
+
+
+def return_leg_returns(log_growth: np.ndarray, weights: np.ndarray, rebalance_positions: np.ndarray,
+                       segments: np.ndarray) -> np.ndarray:
+    # buy and hold between rebalances: each position grows with its cumulative return since the rebalance, and
+    # the return into date t is the change in value of the book held at t - 1
+    held = segments[:-1]
+    active = held >= 0
+    held = np.maximum(held, 0)
+
+    start = log_growth[rebalance_positions[held]]
+    value = np.sum(weights[held] * np.exp(log_growth[1:] - start), axis=1)
+    prior_value = np.sum(weights[held] * np.exp(log_growth[:-1] - start), axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(active & (prior_value > 0), value / prior_value - 1, np.nan)
+
+    return np.concatenate([[np.nan], returns])
+
+
+def return_drifted_weights(log_growth: np.ndarray, weights: np.ndarray,
+                           rebalance_positions: np.ndarray) -> np.ndarray:
+    # the weights of each book just before the next rebalance, after drifting with prices since its own
+    drift = np.exp(log_growth[rebalance_positions[1:]] - log_growth[rebalance_positions[:-1]])
+    drifted = weights[:-1] * drift
+    total = drifted.sum(axis=1, keepdims=True)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drifted = np.where(total > 0, drifted / total, 0)
+
+    return np.concatenate([np.zeros((1, weights.shape[1])), drifted])
+
+
+def return_performance_stats(returns: np.ndarray, periods_per_year: float, columns: list) -> pd.DataFrame:
+    # returns: periods x strategies, nan before the first rebalance
+    n_periods = np.sum(~np.isnan(returns), axis=0)
+    filled = np.nan_to_num(returns)
+    wealth = np.cumprod(1 + filled, axis=0)
+    peaks = np.maximum.accumulate(wealth, axis=0)
+
+    mean = np.nanmean(returns, axis=0)
+    volatility = np.nanstd(returns, axis=0, ddof=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = pd.DataFrame({
+            'strategy': columns,
+            'n_periods': n_periods,
+            'total_return': wealth[-1] - 1,
+            'annualized_return': wealth[-1] ** (periods_per_year / n_periods) - 1,
+            'annualized_volatility': volatility * np.sqrt(periods_per_year),
+            'sharpe_ratio': mean / volatility * np.sqrt(periods_per_year),
+            'max_drawdown': np.min(wealth / peaks - 1, axis=0),
+            'hit_rate': np.sum(returns > 0, axis=0) / n_periods,
+        })
+
+    return stats
+
+
+def run_backtest(ratio_panel: pd.DataFrame, price_matrix: pd.DataFrame, ratio: str, n_quantiles: int = 3,
+                 lag_days: int = 90, rebalance_month: int = 4, ascending: bool = False) -> tuple:
+    # ratio_panel: one row per company and statement (models.panels.return_ratio_panel). price_matrix: dates x
+    # tickers of adjusted closes (models.market.return_price_matrix)
+    if ratio not in ratio_panel.columns:
+        raise KeyError(f'unknown ratio {ratio}')
+
+    tickers = list(price_matrix.columns)
+    dates = price_matrix.index
+    prices = price_matrix.to_numpy(dtype=float)
+
+    rebalance_positions = return_rebalance_positions(dates, rebalance_month)
+    if not len(rebalance_positions):
+        raise ValueError(f'no price dates in month {rebalance_month}')
+
+    signals = return_signal_matrix(ratio_panel, ratio, dates[rebalance_positions], tickers, lag_days)
+    long_weights, short_weights = return_quantile_weights(signals, ~np.isnan(prices[rebalance_positions]),
+                                                          n_quantiles=n_quantiles, ascending=ascending)
+
+    # cumulative log growth per ticker, an unpriced period (before listing, after delisting) counts as flat
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simple_returns = prices[1:] / prices[:-1] - 1
+    log_growth = np.concatenate([
+        np.zeros((1, len(tickers))),
+        np.cumsum(np.log1p(np.nan_to_num(simple_returns, nan=0.0)), axis=0),
+    ])
+
+    # the rebalance each date's book comes from, -1 before the first one
+    segments = np.searchsorted(rebalance_positions, np.arange(len(dates)), side='right') - 1
+
+    long_returns = return_leg_returns(log_growth, long_weights, rebalance_positions, segments)
+    short_returns = return_leg_returns(log_growth, short_weights, rebalance_positions, segments)
+
+    # turnover: half the absolute weight change over both legs at each rebalance, as a share of the gross book.
+    # rebalances without a book yet have none
+    weight_change = (
+        np.abs(long_weights - return_drifted_weights(log_growth, long_weights, rebalance_positions)).sum(axis=1) +
+        np.abs(short_weights - return_drifted_weights(log_growth, short_weights, rebalance_positions)).sum(axis=1)
+    )
+    has_book = long_weights.sum(axis=1) > 0
+    turnover = np.full(len(dates), np.nan)
+    turnover[rebalance_positions[has_book]] = weight_change[has_book] / 4
+
+    returns_df = pd.DataFrame({
+        'date': dates,
+        'long': long_returns,
+        'short': short_returns,
+        'long_short': long_returns - short_returns,
+        'n_long': np.where(segments >= 0, (long_weights > 0).sum(axis=1)[np.maximum(segments, 0)], 0),
+        'n_short': np.where(segments >= 0, (short_weights > 0).sum(axis=1)[np.maximum(segments, 0)], 0),
+        'turnover': turnover,
+    })
+
+    stats_df = return_performance_stats(returns_df[LEGS].to_numpy(), return_periods_per_year(dates), LEGS)
+    # a rebalance that builds the book from cash is left out of the average
+    rebalanced = has_book & np.concatenate([[False], has_book[:-1]])
+    stats_df['average_turnover'] = np.mean(weight_change[rebalanced] / 4) if rebalanced.any() else np.nan
+
+    return returns_df, stats_df
@@ -3,23 +3,54 @@
 import pandas as pd
 
 from models.utilities import return_adjusted_quarter_and_year
-
-
-def return_quarterly_bs_df(ticker: str) -> pd.DataFrame:
+from models.utilities import return_derivation_inputs
+from models.utilities import return_derived_values
+from models.utilities import return_fixed_point_df
+from settings import AMOUNT_UNIT
+
+
+# account attribute, account classification and account label, in output order
+ACCOUNTS = [
+    ('cash_and_equivalents', '1 - Current Assets', '1.1 - Cash & Cash Equivalents'),
+    ('short_term_investments', '1 - Current Assets', '1.2 - Short Term Investments'),
+    ('accounts_receivable', '1 - Current Assets', '1.3 - Accounts Receivable'),
+    ('inventory', '1 - Current Assets', '1.4 - Inventory'),
+    ('other_current_assets', '1 - Current Assets', '1.5 - Other Current Assets'),
+    ('net_ppe', '2 - Non-Current Assets', '2.1 - Net PPE'),
+    ('goodwill', '2 - Non-Current Assets', '2.2 - Goodwill'),
+    ('other_intangibles', '2 - Non-Current Assets', '2.3 - Other Intangible Assets'),
+    ('other_non_current_assets', '2 - Non-Current Assets', '2.4 - Other Non-Current Assets'),
+    ('accounts_payable', '3 - Current Liabilities', '3.1 - Accounts Payable'),
+    ('accrued_liabilities', '3 - Current Liabilities', '3.2 - Accrued Liabilities'),
+    ('other_current_liabilities', '3 - Current Liabilities', '3.3 - Other Current Liabilities'),
+    ('long_term_debt', '4 - Non-Current Liabilities', '4.1 - Long-Term Debt'),
+    ('other_long_term_liabilities', '4 - Non-Current Liabilities', '4.2 - Other Non-Current Liabilities'),
+    ('total_equity', '5 - Equity', '5.1 - Stockholders Equity'),
+]
+
+
+def return_quarterly_bs_df(ticker: str, fields: list = None, optional_fields: dict = None,
+                           unit: int = AMOUNT_UNIT, dates: list = None) -> pd.DataFrame:
+    # dates: the statement date columns to read, None reads every quarter in the file
     path = f'fin_data_input/{ticker}_quarterly_balance-sheet.csv'
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, dtype=str, usecols=None if dates is None else ['name'] + list(dates))
 
-    # remove unwanted string types and convert to numeric
+    # remove unwanted string types
     df['name'] = df['name'].str.replace('\t', '')
-    df = df.replace(',', '', regex=True)
-    df = df.fillna(0)
+    # keep only the line items the statement model reads before any numeric conversion
+    if fields is not None:
+        df = df[df['name'].isin(list(fields) + list(optional_fields or {}))]
 
     # set the index to the column name
     df = df.set_index('name')
 
-    # convert to floats
-    for column in df.columns:
-        df[column] = df[column].astype(float)
+    # fill optional line items the file does not report, before conversion so they are scaled like the rest
+    for field, default in (optional_fields or {}).items():
+        if field not in df.index:
+            df.loc[field] = str(default)
+
+    # whole units as int64, see return_fixed_point_df
+    df = return_fixed_point_df(df, unit)
 
     return df
 
@@ -39,67 +70,117 @@ def convert_bs_df_to_records_dict(df: pd.DataFrame) -> dict:
     return records
 
 
-class BalanceSheet:
+def return_bs_account_panel(df: pd.DataFrame, ticker: str) -> dict:
+    # the ACCOUNTS attributes of every statement at once, as arrays over the statement date columns of a quarterly
+    # bs df. the same DERIVATIONS and A = L + E check BalanceSheet evaluates per statement, on whole rows
+    items = {**BalanceSheet.OPTIONAL_FIELDS, **dict(zip(df.index, df.to_numpy()))}
+    attributes = [attribute for attribute, _, _ in ACCOUNTS] + ['total_assets', 'total_liabilities_and_equity']
+    values = return_derived_values(BalanceSheet.DERIVATIONS, items, attributes)
 
-    def __init__(self, ticker: str, quarter_offset: int, **kwargs):
-        # company and date info
-        self.ticker: str = ticker
-        self.statement_date = kwargs['StatementDate']
-        quarter, year = return_adjusted_quarter_and_year(self.statement_date, quarter_offset)
-        self.quarter: int = quarter
-        self.year: int = year
+    unbalanced = values['total_assets'] - values['total_liabilities_and_equity']
+    if unbalanced.any():
+        raise ValueError(f'{ticker} {df.columns[unbalanced != 0][0]}: A = L + E did not compute')
 
-        # current assets
-        self.current_assets: float = kwargs['CurrentAssets']
-        self.cash_and_equivalents: float = kwargs['CashAndCashEquivalents']
-        self.short_term_investments: float = \
-            kwargs['CashCashEquivalentsAndShortTermInvestments'] - self.cash_and_equivalents
-        self.accounts_receivable: float = kwargs['Receivables']
-        self.inventory: float = kwargs['Inventory']
-        self.other_current_assets: float = \
-            self.current_assets - self.cash_and_equivalents - self.short_term_investments - self.accounts_receivable - \
-            self.inventory
+    return {attribute: values[attribute] for attribute, _, _ in ACCOUNTS}
 
-        # non current assets
-        self.non_current_assets: float = kwargs['TotalNonCurrentAssets']
-        self.net_ppe: float = kwargs['NetPPE']
-        self.gross_ppe: float = kwargs['GrossPPE']
-        self.goodwill: float = kwargs['Goodwill']
-        self.other_intangibles: float = kwargs['OtherIntangibleAssets']
-        self.other_non_current_assets: float = \
-            self.non_current_assets - self.net_ppe - self.goodwill - self.other_intangibles
 
-        # total assets
-        self.total_assets = self.current_assets + self.non_current_assets
+class BalanceSheet:
 
+    # line items read from the quarterly statement file, and optional ones with their default
+    FIELDS: list = [
+        'CurrentAssets', 'CashAndCashEquivalents', 'CashCashEquivalentsAndShortTermInvestments', 'Receivables',
+        'Inventory', 'TotalNonCurrentAssets', 'NetPPE', 'GrossPPE', 'Goodwill', 'OtherIntangibleAssets',
+        'CurrentLiabilities', 'Payables', 'CurrentAccruedExpenses', 'TotalNonCurrentLiabilitiesNetMinorityInterest',
+        'LongTermDebtAndCapitalLeaseObligation', 'TotalDebt', 'StockholdersEquity', 'RetainedEarnings',
+        'OrdinarySharesNumber'
+    ]
+    OPTIONAL_FIELDS: dict = {'MinorityInterest': 0.0}
+    # attribute -> the line item it is, or (the line items and attributes it is computed from, how). the one source
+    # of the arithmetic: __init__ evaluates it on one statement, return_bs_account_panel on whole rows
+    DERIVATIONS: dict = {
+        # current assets
+        'current_assets': 'CurrentAssets',
+        'cash_and_equivalents': 'CashAndCashEquivalents',
+        'short_term_investments': (
+            ['CashCashEquivalentsAndShortTermInvestments', 'cash_and_equivalents'],
+            lambda cash_and_short_term_investments, cash: cash_and_short_term_investments - cash
+        ),
+        'accounts_receivable': 'Receivables',
+        'inventory': 'Inventory',
+        'other_current_assets': (
+            ['current_assets', 'cash_and_equivalents', 'short_term_investments', 'accounts_receivable', 'inventory'],
+            lambda current_assets, cash, short_term_investments, receivables, inventory:
+                current_assets - cash - short_term_investments - receivables - inventory
+        ),
+        # non current assets
+        'non_current_assets': 'TotalNonCurrentAssets',
+        'net_ppe': 'NetPPE',
+        'gross_ppe': 'GrossPPE',
+        'goodwill': 'Goodwill',
+        'other_intangibles': 'OtherIntangibleAssets',
+        'other_non_current_assets': (
+            ['non_current_assets', 'net_ppe', 'goodwill', 'other_intangibles'],
+            lambda non_current_assets, net_ppe, goodwill, other_intangibles:
+                non_current_assets - net_ppe - goodwill - other_intangibles
+        ),
+        # total assets
+        'total_assets': (
+            ['current_assets', 'non_current_assets'],
+            lambda current_assets, non_current_assets: current_assets + non_current_assets
+        ),
         # current liabilities
-        self.current_liabilities: float = kwargs['CurrentLiabilities']
-        self.accounts_payable: float = kwargs['Payables']
-        self.accrued_liabilities: float = kwargs['CurrentAccruedExpenses']
-        self.other_current_liabilities: float = \
-            self.current_liabilities - self.accounts_payable - self.accrued_liabilities
-
+        'current_liabilities': 'CurrentLiabilities',
+        'accounts_payable': 'Payables',
+        'accrued_liabilities': 'CurrentAccruedExpenses',
+        'other_current_liabilities': (
+            ['current_liabilities', 'accounts_payable', 'accrued_liabilities'],
+            lambda current_liabilities, payables, accrued: current_liabilities - payables - accrued
+        ),
         # non current liabilities
-        self.non_current_liabilities: float = kwargs['TotalNonCurrentLiabilitiesNetMinorityInterest']
-        self.long_term_debt: float = kwargs['LongTermDebtAndCapitalLeaseObligation']
-        self.other_long_term_liabilities: float = self.non_current_liabilities - self.long_term_debt
-        self.total_debt: float = kwargs['TotalDebt']
-
+        'non_current_liabilities': 'TotalNonCurrentLiabilitiesNetMinorityInterest',
+        'long_term_debt': 'LongTermDebtAndCapitalLeaseObligation',
+        'other_long_term_liabilities': (
+            ['non_current_liabilities', 'long_term_debt'],
+            lambda non_current_liabilities, long_term_debt: non_current_liabilities - long_term_debt
+        ),
+        'total_debt': 'TotalDebt',
         # total liabilities
-        self.total_liabilities: float = self.current_liabilities + self.non_current_liabilities
-
+        'total_liabilities': (
+            ['current_liabilities', 'non_current_liabilities'],
+            lambda current_liabilities, non_current_liabilities: current_liabilities + non_current_liabilities
+        ),
         # equity
-        self.stockholders_equity: float = kwargs['StockholdersEquity']
-        if 'MinorityInterest' in kwargs:
-            self.minority_interest: float = kwargs['MinorityInterest']
-        else:
-            self.minority_interest: float = 0.0
-        self.total_equity: float = self.stockholders_equity + self.minority_interest
-        self.retained_earnings: float = kwargs['RetainedEarnings']
-        self.n_common_shares_os: float = kwargs['OrdinarySharesNumber']
-
+        'stockholders_equity': 'StockholdersEquity',
+        'minority_interest': 'MinorityInterest',
+        'total_equity': (
+            ['stockholders_equity', 'minority_interest'],
+            lambda stockholders_equity, minority_interest: stockholders_equity + minority_interest
+        ),
+        'retained_earnings': 'RetainedEarnings',
+        'n_common_shares_os': 'OrdinarySharesNumber',
         # liabilities + equity
-        self.total_liabilities_and_equity: float = self.total_liabilities + self.total_equity
+        'total_liabilities_and_equity': (
+            ['total_liabilities', 'total_equity'],
+            lambda total_liabilities, total_equity: total_liabilities + total_equity
+        ),
+    }
+    # attribute -> the line items and attributes it is computed from, see models.dependency_graph. read off
+    # DERIVATIONS, so it names exactly the inputs the arithmetic is called with
+    DEPENDENCIES: dict = {
+        attribute: return_derivation_inputs(derivation) for attribute, derivation in DERIVATIONS.items()
+    }
+
+    def __init__(self, ticker: str, quarter_offset: int, **kwargs):
+        # company and date info
+        self.ticker: str = ticker
+        self.statement_date = kwargs['StatementDate']
+        quarter, year = return_adjusted_quarter_and_year(self.statement_date, quarter_offset)
+        self.quarter: int = quarter
+        self.year: int = year
+
+        # line items and the attributes computed from them, see DERIVATIONS
+        for attribute, value in return_derived_values(self.DERIVATIONS, {**self.OPTIONAL_FIELDS, **kwargs}).items():
+            setattr(self, attribute, value)
 
         if self.total_assets - self.total_liabilities_and_equity != 0:
             self.print_balance_sheet()
@@ -133,122 +214,11 @@ class BalanceSheet:
              'statementDate': self.statement_date,
              'quarter': self.quarter,
              'year': self.year,
-             'accountClassification': '1 - Current Assets',
-             'account': '1.1 - Cash & Cash Equivalents',
-             'amount': self.cash_and_equivalents
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '1 - Current Assets',
-             'account': '1.2 - Short Term Investments',
-             'amount': self.short_term_investments
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '1 - Current Assets',
-             'account': '1.3 - Accounts Receivable',
-             'amount': self.accounts_receivable
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '1 - Current Assets',
-             'account': '1.4 - Inventory',
-             'amount': self.inventory
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '1 - Current Assets',
-             'account': '1.5 - Other Current Assets',
-             'amount': self.other_current_assets
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Non-Current Assets',
-             'account': '2.1 - Net PPE',
-             'amount': self.net_ppe
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Non-Current Assets',
-             'account': '2.2 - Goodwill',
-             'amount': self.goodwill
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Non-Current Assets',
-             'account': '2.3 - Other Intangible Assets',
-             'amount': self.other_intangibles
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Non-Current Assets',
-             'account': '2.4 - Other Non-Current Assets',
-             'amount': self.other_non_current_assets
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '3 - Current Liabilities',
-             'account': '3.1 - Accounts Payable',
-             'amount': self.accounts_payable
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '3 - Current Liabilities',
-             'account': '3.2 - Accrued Liabilities',
-             'amount': self.accrued_liabilities
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '3 - Current Liabilities',
-             'account': '3.3 - Other Current Liabilities',
-             'amount': self.other_current_liabilities
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '4 - Non-Current Liabilities',
-             'account': '4.1 - Long-Term Debt',
-             'amount': self.long_term_debt
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '4 - Non-Current Liabilities',
-             'account': '4.2 - Other Non-Current Liabilities',
-             'amount': self.other_long_term_liabilities
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '5 - Equity',
-             'account': '5.1 - Stockholders Equity',
-             'amount': self.total_equity
-             },
+             'accountClassification': classification,
+             'account': account,
+             'amount': getattr(self, attribute)
+             }
+            for attribute, classification, account in ACCOUNTS
         ]
 
         return return_list
@@ -0,0 +1,112 @@
+# models.calendarization.py
+
+import numpy as np
+import pandas as pd
+
+from models.income_statement import IncomeStatement
+from models.balance_sheet import BalanceSheet
+from models.cashflow_statement import CashFlowStatement
+from models.consolidated_statement import ConsolidatedStatement
+
+MONTHS_PER_QUARTER = 3
+
+
+def return_end_months(stmt_dates: pd.DatetimeIndex) -> np.ndarray:
+    # months counted from year 0. a statement dated in the first half of a month closes the month before, which
+    # snaps 52/53 week fiscal calendars (e.g. 01/03/2021) onto the month they really end
+    snapped = stmt_dates - pd.Timedelta(days=15)
+
+    return np.asarray(snapped.year * 12 + snapped.month - 1, dtype=np.int64)
+
+
+def return_calendar_quarter_end(calendar_quarters: np.ndarray) -> pd.DatetimeIndex:
+    years, quarters = np.divmod(calendar_quarters, 4)
+    periods = pd.PeriodIndex.from_fields(year=years, quarter=quarters + 1, freq='Q')
+
+    return periods.to_timestamp(how='end').normalize()
+
+
+def return_calendar_quarter_df(df: pd.DataFrame) -> pd.DataFrame:
+    # df is a quarterly flow statement df (line items x statement dates). every fiscal quarter is spread evenly over
+    # the three months it covers and the months are summed back up by calendar quarter, all as array operations
+    panel = df.transpose()
+    stmt_dates = pd.to_datetime(panel.index, format='%m/%d/%Y')
+    end_months = return_end_months(stmt_dates)
+
+    # (statement, month) pairs -> months of overlap between each statement and each calendar quarter
+    months = end_months[:, None] - np.arange(MONTHS_PER_QUARTER)[None, :]
+    overlap = pd.DataFrame({
+        'row': np.repeat(np.arange(len(panel)), MONTHS_PER_QUARTER),
+        'calendar_quarter': (months // MONTHS_PER_QUARTER).ravel(),
+    }).groupby(['row', 'calendar_quarter']).size().rename('months').reset_index()
+
+    weights = overlap['months'].to_numpy() / MONTHS_PER_QUARTER
+    contributions = pd.DataFrame(panel.to_numpy()[overlap['row'].to_numpy()] * weights[:, None],
+                                 columns=panel.columns)
+    contributions['calendar_quarter'] = overlap['calendar_quarter'].to_numpy()
+    contributions['months'] = overlap['months'].to_numpy()
+
+    calendar_df = contributions.groupby('calendar_quarter').sum()
+
+    # a calendar quarter is only usable when its three months are each covered exactly once
+    calendar_df = calendar_df[calendar_df['months'] == MONTHS_PER_QUARTER].drop(columns=['months'])
+    calendar_df['StatementDate'] = return_calendar_quarter_end(calendar_df.index.to_numpy())
+
+    return calendar_df
+
+
+def return_calendar_year_records(calendar_quarter_df: pd.DataFrame) -> dict:
+    calendar_years = calendar_quarter_df.index.to_numpy() // 4
+    grouped = calendar_quarter_df.drop(columns=['StatementDate']).groupby(calendar_years)
+
+    annual_df = grouped.sum()
+    annual_df['StatementDate'] = calendar_quarter_df['StatementDate'].groupby(calendar_years).max().to_numpy()
+    annual_df = annual_df[grouped.size() == 4]
+
+    return {int(year): record for year, record in annual_df.to_dict(orient='index').items()}
+
+
+def return_calendar_year_end_bs_records(bs_df: pd.DataFrame) -> dict:
+    # balance sheets are stocks: take the one closing nearest to each calendar year end, at most a month away, and
+    # date it at the calendar year end so every company is priced on the same day
+    panel = bs_df.transpose()
+    end_months = return_end_months(pd.to_datetime(panel.index, format='%m/%d/%Y'))
+    order = np.argsort(end_months, kind='stable')
+    sorted_months = end_months[order]
+
+    years = np.arange(sorted_months.min() // 12, sorted_months.max() // 12 + 1)
+    targets = years * 12 + 11
+    right = np.clip(np.searchsorted(sorted_months, targets), 0, len(sorted_months) - 1)
+    left = np.clip(right - 1, 0, len(sorted_months) - 1)
+    nearest = np.where(np.abs(sorted_months[left] - targets) <= np.abs(sorted_months[right] - targets), left, right)
+    found = np.abs(sorted_months[nearest] - targets) <= 1
+
+    records = panel.iloc[order[nearest[found]]].to_dict(orient='records')
+    for year, record in zip(years[found], records):
+        record['StatementDate'] = pd.Timestamp(year=int(year), month=12, day=31)
+
+    return {int(year): record for year, record in zip(years[found], records)}
+
+
+def return_calendar_statement_groups(company) -> dict:
+    # consolidated statements organized by key=calendar year, built from calendarized flows and calendar year end
+    # balance sheets. quarter_offset is 0 because the records are already on the calendar
+    is_records = return_calendar_year_records(return_calendar_quarter_df(company.is_df))
+    cf_records = return_calendar_year_records(return_calendar_quarter_df(company.cf_df))
+    bs_records = return_calendar_year_end_bs_records(company.bs_df)
+
+    consolidated_statements = {}
+    years = [year for year in is_records if year in cf_records and year in bs_records and year - 1 in bs_records]
+
+    for year in sorted(years, reverse=True):
+        if year > 2001:
+            consolidated_statements[year] = ConsolidatedStatement(
+                ticker=company.ticker,
+                year=year,
+                income_statement=IncomeStatement(ticker=company.ticker, quarter_offset=0, **is_records[year]),
+                cashflow_statement=CashFlowStatement(ticker=company.ticker, quarter_offset=0, **cf_records[year]),
+                balance_sheet=BalanceSheet(ticker=company.ticker, quarter_offset=0, **bs_records[year]),
+                prior_balance_sheet=BalanceSheet(ticker=company.ticker, quarter_offset=0, **bs_records[year - 1])
+            )
+
+    return consolidated_statements
@@ -3,26 +3,37 @@
 import pandas as pd
 
 from models.utilities import return_adjusted_quarter_and_year
+from models.utilities import return_derivation_inputs
+from models.utilities import return_derived_values
+from models.utilities import return_fixed_point_df
+from settings import AMOUNT_UNIT
 
 
-def return_quarterly_cf_df(ticker: str) -> pd.DataFrame:
+def return_quarterly_cf_df(ticker: str, fields: list = None, optional_fields: dict = None,
+                           unit: int = AMOUNT_UNIT, dates: list = None) -> pd.DataFrame:
+    # dates: the statement date columns to read, None reads every quarter in the file
     path = f'fin_data_input/{ticker}_quarterly_cash-flow.csv'
 
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, dtype=str, usecols=None if dates is None else ['name'] + list(dates))
 
     # drop unwanted ttm column
-    df = df.drop(['ttm'], axis=1)
-    # remove unwanted string types and convert to numeric
+    df = df.drop(['ttm'], axis=1, errors='ignore')
+    # remove unwanted string types
     df['name'] = df['name'].str.replace('\t', '')
-    df = df.replace(',', '', regex=True)
-    df = df.fillna(0)
+    # keep only the line items the statement model reads before any numeric conversion
+    if fields is not None:
+        df = df[df['name'].isin(list(fields) + list(optional_fields or {}))]
 
     # set the index to the column name
     df = df.set_index('name')
 
-    # convert to floats
-    for column in df.columns:
-        df[column] = df[column].astype(float)
+    # fill optional line items the file does not report, before conversion so they are scaled like the rest
+    for field, default in (optional_fields or {}).items():
+        if field not in df.index:
+            df.loc[field] = str(default)
+
+    # whole units as int64, see return_fixed_point_df
+    df = return_fixed_point_df(df, unit)
 
     return df
 
@@ -44,6 +55,22 @@ def convert_cf_df_to_records_dict(df: pd.DataFrame) -> dict:
 
 class CashFlowStatement:
 
+    # line items read from the quarterly statement file, and optional ones with their default
+    FIELDS: list = [
+        'CapitalExpenditure'
+    ]
+    OPTIONAL_FIELDS: dict = {}
+    # attribute -> the line item it is, or (the line items and attributes it is computed from, how)
+    DERIVATIONS: dict = {
+        # capital expenditures
+        'capex': 'CapitalExpenditure',
+    }
+    # attribute -> the line items and attributes it is computed from, see models.dependency_graph. read off
+    # DERIVATIONS, so it names exactly the inputs the arithmetic is called with
+    DEPENDENCIES: dict = {
+        attribute: return_derivation_inputs(derivation) for attribute, derivation in DERIVATIONS.items()
+    }
+
     def __init__(self, ticker: str, quarter_offset: int, **kwargs):
         # company and date info
         self.ticker: str = ticker
@@ -52,22 +79,9 @@ class CashFlowStatement:
         self.quarter: int = quarter
         self.year: int = year
 
-        # capital expenditures
-        self.capex: float = kwargs['CapitalExpenditure']
+        # line items and the attributes computed from them, see DERIVATIONS
+        for attribute, value in return_derived_values(self.DERIVATIONS, {**self.OPTIONAL_FIELDS, **kwargs}).items():
+            setattr(self, attribute, value)
 
     def __repr__(self):
         return f'{self.ticker}: {self.quarter}-{self.year}'
-
-
-def combine_cash_flow_statements_to_dict(*args: CashFlowStatement):
-
-    dates = [cfs.statement_date for cfs in args]
-
-    capex = sum([cfs.capex for cfs in args])
-
-    return_dict = {
-        'StatementDate': max(dates),
-        'CapitalExpenditure': capex
-    }
-
-    return return_dict
@@ -2,152 +2,185 @@
 
 import pandas as pd
 import itertools
+from functools import cached_property
 
 from models.income_statement import return_quarterly_is_df
 from models.income_statement import convert_is_df_to_records_dict
-from models.income_statement import combine_income_statements_to_dict
+from models.income_statement import return_is_account_panel
 from models.income_statement import IncomeStatement
+from models.income_statement import ACCOUNTS as IS_ACCOUNTS
 from models.balance_sheet import return_quarterly_bs_df
 from models.balance_sheet import convert_bs_df_to_records_dict
+from models.balance_sheet import return_bs_account_panel
 from models.balance_sheet import BalanceSheet
+from models.balance_sheet import ACCOUNTS as BS_ACCOUNTS
 from models.cashflow_statement import return_quarterly_cf_df
-from models.cashflow_statement import combine_cash_flow_statements_to_dict
 from models.cashflow_statement import convert_cf_df_to_records_dict
 from models.cashflow_statement import CashFlowStatement
 from models.consolidated_statement import ConsolidatedStatement
+from models.utilities import return_annual_records_dict
+from models.utilities import return_long_format_df
+from models.memory_profile import profile_stage
 
 
 class Company:
 
-    def __init__(self, ticker: str, quarter_offset: int):
+    def __init__(self, ticker: str, quarter_offset: int, project_fields: bool = True, dates: dict = None):
         # company info
         self.ticker: str = ticker
         self.quarter_offset: int = quarter_offset
 
-        # income statement
-        self.is_df: pd.DataFrame = return_quarterly_is_df(self.ticker)
-        self.is_records_dict: dict = convert_is_df_to_records_dict(self.is_df)
+        # project_fields=False parses every line item instead of the ones the statement models read
+        is_schema = (IncomeStatement.FIELDS, IncomeStatement.OPTIONAL_FIELDS) if project_fields else (None, None)
+        bs_schema = (BalanceSheet.FIELDS, BalanceSheet.OPTIONAL_FIELDS) if project_fields else (None, None)
+        cf_schema = (CashFlowStatement.FIELDS, CashFlowStatement.OPTIONAL_FIELDS) if project_fields else (None, None)
+        # dates: the statement date columns to load by kind ('is', 'bs', 'cf'), every quarter when not given
+        dates = dates or {}
 
-        # balance sheet
-        self.bs_df: pd.DataFrame = return_quarterly_bs_df(self.ticker)
-        self.bs_records_dict: dict = convert_bs_df_to_records_dict(self.bs_df)
-
-        # cash flows
-        self.cf_df: pd.DataFrame = return_quarterly_cf_df(self.ticker)
-        self.cf_records_dict: dict = convert_cf_df_to_records_dict(self.cf_df)
-
-        # statement groups
-        self.statement_groups = self.return_statement_groups()
+        with profile_stage('load', self.ticker):
+            self.is_df: pd.DataFrame = return_quarterly_is_df(self.ticker, *is_schema, dates=dates.get('is'))
+            self.bs_df: pd.DataFrame = return_quarterly_bs_df(self.ticker, *bs_schema, dates=dates.get('bs'))
+            self.cf_df: pd.DataFrame = return_quarterly_cf_df(self.ticker, *cf_schema, dates=dates.get('cf'))
 
     def __repr__(self):
         return f'{self.ticker}'
 
-    def return_is_data_list(self) -> list:
-
-        return_list = []
-
-        for inc_stmt in self.is_records_dict:
-            income_statement = IncomeStatement(ticker=self.ticker,
-                                               quarter_offset=self.quarter_offset,
-                                               **inc_stmt
-                                               )
-            return_list.append(income_statement.return_data_list())
-
-        flat_list = list(itertools.chain(*return_list))
-
-        return flat_list
+    @cached_property
+    def is_records_dict(self) -> list:
+        # one record per quarterly statement, only built for the statement objects. the long format outputs melt is_df
+        with profile_stage('records', self.ticker):
+            return convert_is_df_to_records_dict(self.is_df)
+
+    @cached_property
+    def bs_records_dict(self) -> list:
+        with profile_stage('records', self.ticker):
+            return convert_bs_df_to_records_dict(self.bs_df)
+
+    @cached_property
+    def cf_records_dict(self) -> list:
+        with profile_stage('records', self.ticker):
+            return convert_cf_df_to_records_dict(self.cf_df)
+
+    @cached_property
+    def income_statements(self) -> list:
+        # quarterly income statement objects, built once and shared by every output
+        with profile_stage('construction', self.ticker):
+            return [
+                IncomeStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **inc_stmt)
+                for inc_stmt in self.is_records_dict
+            ]
+
+    @cached_property
+    def balance_sheets(self) -> list:
+        with profile_stage('construction', self.ticker):
+            return [
+                BalanceSheet(ticker=self.ticker, quarter_offset=self.quarter_offset, **bal_sheet)
+                for bal_sheet in self.bs_records_dict
+            ]
+
+    @cached_property
+    def cashflow_statements(self) -> list:
+        with profile_stage('construction', self.ticker):
+            return [
+                CashFlowStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **cf_stmt)
+                for cf_stmt in self.cf_records_dict
+            ]
+
+    @cached_property
+    def annual_income_statements(self) -> dict:
+        # annual income statements organized by key=year, summed over the fiscal year in one group by
+        with profile_stage('construction', self.ticker):
+            records, incomplete_years = return_annual_records_dict(self.is_df, self.quarter_offset)
+            print(f'{self.ticker} - incomplete is_years (year: quarters): {incomplete_years}')
+
+            return {
+                year: IncomeStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **record)
+                for year, record in records.items()
+            }
+
+    @cached_property
+    def annual_cashflow_statements(self) -> dict:
+        # annual cashflow statements organized by key=year, summed over the fiscal year in one group by
+        with profile_stage('construction', self.ticker):
+            records, incomplete_years = return_annual_records_dict(self.cf_df, self.quarter_offset)
+            print(f'{self.ticker} - incomplete cf_years (year: quarters): {incomplete_years}')
+
+            return {
+                year: CashFlowStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **record)
+                for year, record in records.items()
+            }
+
+    @cached_property
+    def year_end_balance_sheets(self) -> dict:
+        # balance sheets organized by key=year. only add the first q4 balance sheet of each year
+        balance_sheet_dict = {}
 
-    def return_bs_data_list(self) -> list:
+        for bal_sheet in self.balance_sheets:
+            if bal_sheet.quarter == 4 and bal_sheet.year not in balance_sheet_dict:
+                balance_sheet_dict[bal_sheet.year] = bal_sheet
 
-        return_list = []
+        return balance_sheet_dict
 
-        for bal_sheet in self.bs_records_dict:
-            balance_sheet = BalanceSheet(ticker=self.ticker,
-                                         quarter_offset=self.quarter_offset,
-                                         **bal_sheet
-                                         )
-            if balance_sheet.quarter == 4:
-                return_list.append(balance_sheet.return_data_list())
+    @cached_property
+    def statement_groups(self) -> dict:
+        # consolidated statements organized by key=year
+        consolidated_statements = {}
+        print('')
 
-        flat_list = list(itertools.chain(*return_list))
+        inc_years = list(self.annual_income_statements.keys())
+        cf_years = list(self.annual_cashflow_statements.keys())
+        bs_years = list(self.year_end_balance_sheets.keys())[:-1]
+        print(f'{self.ticker} - is_years: {inc_years}')
+        print(f'{self.ticker} - cf_years: {cf_years}')
+        print(f'{self.ticker} - bs_years: {bs_years}')
 
-        return flat_list
+        years = [year for year in inc_years if year in bs_years and year in cf_years and year > 2000]
+        print(f'{self.ticker} - du_years: {years}')
 
-    def return_statement_groups(self):
+        with profile_stage('consolidation', self.ticker):
+            for year in years:
+                if year > 2001:
+                    con_stmt = ConsolidatedStatement(
+                        ticker=self.ticker,
+                        year=year,
+                        income_statement=self.annual_income_statements[year],
+                        cashflow_statement=self.annual_cashflow_statements[year],
+                        balance_sheet=self.year_end_balance_sheets[year],
+                        prior_balance_sheet=self.year_end_balance_sheets[year - 1]
+                    )
+                    consolidated_statements[year] = con_stmt
 
-        # list of all income statement objects
-        income_statement_list = [
-            IncomeStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **inc_stmt)
-            for inc_stmt in self.is_records_dict
-        ]
-        # dict of income statement objects organized by key=year
-        income_statement_dict = {}
-        print('')
+        return consolidated_statements
 
-        for inc_stmt in income_statement_list:
-            if inc_stmt.year not in income_statement_dict:
-                income_statement_dict[inc_stmt.year] = [inc_stmt]
-            elif inc_stmt.year in income_statement_dict:
-                income_statement_dict[inc_stmt.year].append(inc_stmt)
+    def return_is_data_list(self) -> list:
 
-        # list of all balance sheet objects
-        balance_sheet_list = [
-            BalanceSheet(ticker=self.ticker, quarter_offset=self.quarter_offset, **bal_sheet)
-            for bal_sheet in self.bs_records_dict
-        ]
+        with profile_stage('output', self.ticker):
+            return_list = [income_statement.return_data_list() for income_statement in self.income_statements]
 
-        # dict of balance sheet objects organized by key=year. only add q4 balance sheets
-        balance_sheet_dict = {}
+            flat_list = list(itertools.chain(*return_list))
 
-        for bal_sheet in balance_sheet_list:
-            if bal_sheet.quarter == 4 and bal_sheet.year not in balance_sheet_dict:
-                balance_sheet_dict[bal_sheet.year] = bal_sheet
-            else:
-                pass
+        return flat_list
 
-        # list of all cashflow statement objects
-        cashflow_statement_list = [
-            CashFlowStatement(ticker=self.ticker, quarter_offset=self.quarter_offset, **cf_stmt)
-            for cf_stmt in self.cf_records_dict
-        ]
+    def return_bs_data_list(self) -> list:
 
-        # dict of cf statement objects organized by key=year
-        cashflow_statement_dict = {}
+        with profile_stage('output', self.ticker):
+            return_list = [
+                balance_sheet.return_data_list() for balance_sheet in self.balance_sheets if balance_sheet.quarter == 4
+            ]
 
-        for cf_stmt in cashflow_statement_list:
-            if cf_stmt.year not in cashflow_statement_dict:
-                cashflow_statement_dict[cf_stmt.year] = [cf_stmt]
-            elif cf_stmt.year in cashflow_statement_dict:
-                cashflow_statement_dict[cf_stmt.year].append(cf_stmt)
+            flat_list = list(itertools.chain(*return_list))
 
-        consolidated_statements = {}
+        return flat_list
 
-        inc_years = list(income_statement_dict.keys())
-        cf_years = list(cashflow_statement_dict.keys())
-        bs_years = list(balance_sheet_dict.keys())[:-1]
-        print(f'{self.ticker} - is_years: {inc_years}')
-        print(f'{self.ticker} - cf_years: {cf_years}')
-        print(f'{self.ticker} - bs_years: {bs_years}')
+    def return_is_data_df(self) -> pd.DataFrame:
+        # the return_is_data_list rows as one melt of the derived account panel, no statement objects
 
-        years = [year for year in inc_years if year in bs_years and year > 2000]
-        print(f'{self.ticker} - du_years: {years}')
+        with profile_stage('output', self.ticker):
+            return return_long_format_df(return_is_account_panel(self.is_df), self.is_df.columns, IS_ACCOUNTS,
+                                         self.ticker, self.quarter_offset)
 
-        for year in years:
-            if year > 2001:
-                con_stmt = ConsolidatedStatement(
-                    ticker=self.ticker,
-                    year=year,
-                    income_statement=IncomeStatement(
-                        ticker=self.ticker,
-                        quarter_offset=self.quarter_offset,
-                        **combine_income_statements_to_dict(*income_statement_dict[year])),
-                    cashflow_statement=CashFlowStatement(
-                        ticker=self.ticker,
-                        quarter_offset=self.quarter_offset,
-                        **combine_cash_flow_statements_to_dict(*cashflow_statement_dict[year])),
-                    balance_sheet=balance_sheet_dict[year],
-                    prior_balance_sheet=balance_sheet_dict[year - 1]
-                )
-                consolidated_statements[year] = con_stmt
+    def return_bs_data_df(self) -> pd.DataFrame:
 
-        return consolidated_statements
+        with profile_stage('output', self.ticker):
+            return return_long_format_df(return_bs_account_panel(self.bs_df, self.ticker), self.bs_df.columns,
+                                         BS_ACCOUNTS, self.ticker, self.quarter_offset, quarters=[4])
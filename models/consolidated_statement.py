@@ -1,6 +1,7 @@
 # models.consolidated_statement.py
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 import pandas as pd
 
 from .income_statement import IncomeStatement
@@ -8,17 +9,14 @@ from .cashflow_statement import CashFlowStatement
 from .balance_sheet import BalanceSheet
 
 
+@lru_cache(maxsize=None)
 def return_market_close_dict(ticker: str) -> dict:
+    # parsed once per ticker, every consolidated statement of the ticker looks its close up in the same dict
     path = f'fin_data_input/{ticker}.csv'
 
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, usecols=['Date', 'Close'])
 
-    data_dict = {}
-
-    for index, row in df.iterrows():
-        data_dict[row['Date']] = row['Close']
-
-    return data_dict
+    return dict(zip(df['Date'], df['Close']))
 
 
 def return_market_close(ticker: str, statement_date: datetime) -> float:
@@ -30,8 +28,138 @@ def return_market_close(ticker: str, statement_date: datetime) -> float:
     return dict[str_date]
 
 
+# ratio attribute, ratio type and ratio label, in output order
+RATIOS = [
+    # Profitability Ratios
+    ('gross_margin', '1 - Profitability Ratios', '1.1 - Gross Margin'),
+    ('operating_margin', '1 - Profitability Ratios', '1.2 - Operating Margin'),
+    ('ebitda_margin', '1 - Profitability Ratios', '1.3 - EBITDA Margin'),
+    ('net_profit_margin', '1 - Profitability Ratios', '1.4 - Net Profit Margin'),
+    # Liquidity Ratios
+    ('current_ratio', '2 - Liquidity Ratios', '2.1 - Current Ratio'),
+    ('quick_ratio', '2 - Liquidity Ratios', '2.2 - Quick Ratio'),
+    ('cash_ratio', '2 - Liquidity Ratios', '2.3- Cash Ratio'),
+    # Working Cap Ratios
+    ('ar_days', '3 - Working Capital Ratios', '3.1 - Days in A/R'),
+    ('ar_turnover', '3 - Working Capital Ratios', '3.2 - A/R Turnover'),
+    ('invent_days', '3 - Working Capital Ratios', '3.3 - Days in Inventory'),
+    ('invent_turnover', '3 - Working Capital Ratios', '3.4 - Inventory Turnover'),
+    ('ap_days', '3 - Working Capital Ratios', '3.5 - Days in A/P'),
+    ('ap_turnover', '3 - Working Capital Ratios', '3.6 - A/P Turnover'),
+    ('cash_conversion_cycle', '3 - Working Capital Ratios', '3.7 - Cash Conversion Cycle'),
+    ('working_cap_turnover', '3 - Working Capital Ratios', '3.8 - Working Capital Turnover'),
+    # Interest Coverage Ratios
+    ('ebit_interest_coverage', '4 - Interest Coverage Ratios', '4.1 - EBIT / Interest Coverage Ratio'),
+    ('ebitda_interest_coverage', '4 - Interest Coverage Ratios', '4.2 - EBITDA / Interest Coverage Ratio'),
+    # Leverage Ratio
+    ('debt_to_capital', '5 - Leverage Ratios', '5.1 - Debt-to-Capital Ratio'),
+    ('debt_to_equity', '5 - Leverage Ratios', '5.2 - Debt-to-Equity Ratio'),
+    ('debt_to_enterprise_value', '5 - Leverage Ratios', '5.3 - Debt-to-Enterprise Value Ratio'),
+    ('equity_multiplier_book', '5 - Leverage Ratios', '5.4 - Equity Multiplier (book)'),
+    ('equity_multiplier_marker', '5 - Leverage Ratios', '5.5 - Equity Multiplier (market)'),
+    # Industry Specific Ratios
+    ('r_and_d_to_sales', '6 - Industry Specific Ratios', '6.1 - R&D-to-Sales'),
+    ('capx_to_sales', '6 - Industry Specific Ratios', '6.2 - CAPEX-to-Sales'),
+    # Valuation Ratios
+    ('market_to_book', '7 - Valuation Ratios', '7.1 - Market-to-Book Ratio'),
+    ('price_to_earnings', '7 - Valuation Ratios', '7.2 - Price-to-Earning Ratio'),
+    ('market_to_sales', '7 - Valuation Ratios', '7.3 - Market-to-Sales Ratio'),
+    ('ev_to_ebitda', '7 - Valuation Ratios', '7.4 - EV-to-EBITDA Ratio'),
+    ('ev_to_sales', '7 - Valuation Ratios', '7.5 - EV-to-Sales Ratio'),
+    ('eps_diluted', '7 - Valuation Ratios', '7.6 - EPS (Fully Diluted)'),
+    ('market_close', '7 - Valuation Ratios', '7.7.1 - Share Price'),
+    ('n_common_shares_os', '7 - Valuation Ratios', '7.7.2 - Common Shares O/S'),
+    ('market_capitalization', '7 - Valuation Ratios', '7.7.3 - Market Capitalization (Share Price * Common Shares O/S)'),
+    ('net_debt', '7 - Valuation Ratios', '7.7.4 - Net Debt'),
+    ('enterprise_value', '7 - Valuation Ratios', '7.7.5 - Enterprise Value'),
+    # Operating Ratios
+    ('asset_turnover', '8 - Operating Ratios', '8.1 - Asset Turnover'),
+    ('return_on_assets', '8 - Operating Ratios', '8.2 - Return on Assets (ROA)'),
+    ('return_on_equity', '8 - Operating Ratios', '8.3 - Return on Equity (ROE)'),
+    ('return_on_invested_capital', '8 - Operating Ratios', '8.4 - Return on Invested Capital (ROIC)'),
+    # Alman Z-Score
+    ('alt_z_score', '9 - Altman Z-Score', '9.1 - Altman Z-Score (1.2A + 1.4B + 3.3C + 0.6D + 1.0E)'),
+    ('working_capital_to_total_assets', '9 - Altman Z-Score', '9.1.A - Working Capital / Total Assets Ratio'),
+    ('re_to_total_assets', '9 - Altman Z-Score', '9.1.B - Retained Earnings / Total Assets Ratio'),
+    ('ebit_to_total_assets', '9 - Altman Z-Score', '9.1.C - EBIT / Total Assets Ratio'),
+    ('market_value_of_equity_to_liabs', '9 - Altman Z-Score', '9.1.D - Market Value of Equity / Total Liabilities'),
+    ('total_sales_to_total_assets', '9 - Altman Z-Score', '9.1.E - Total Sales / Total Assets'),
+]
+
+
 class ConsolidatedStatement:
 
+    # attribute -> the statement attributes (role.attribute), own attributes and close price (price.Close) __init__
+    # computes it from, see models.dependency_graph. kept by hand next to __init__: verify_data.py restatement
+    # fails on an input missing here
+    DEPENDENCIES: dict = {
+        'gross_margin': ['income_statement.revenue', 'income_statement.gross_profit'],
+        'operating_margin': ['income_statement.revenue', 'income_statement.operating_income'],
+        'ebitda_margin': ['income_statement.revenue', 'income_statement.ebitda'],
+        'net_profit_margin': ['income_statement.revenue', 'income_statement.net_income'],
+        'current_ratio': ['balance_sheet.current_assets', 'balance_sheet.current_liabilities'],
+        'quick_ratio': [
+            'balance_sheet.cash_and_equivalents', 'balance_sheet.short_term_investments',
+            'balance_sheet.accounts_receivable', 'balance_sheet.current_liabilities'
+        ],
+        'cash_ratio': ['balance_sheet.cash_and_equivalents', 'balance_sheet.current_liabilities'],
+        'current_working_capital': ['balance_sheet.current_assets', 'balance_sheet.current_liabilities'],
+        'prior_working_capital': ['prior_balance_sheet.current_assets', 'prior_balance_sheet.current_liabilities'],
+        'ar_days': ['income_statement.revenue', 'balance_sheet.accounts_receivable'],
+        'ap_days': ['income_statement.cogs', 'balance_sheet.accounts_payable'],
+        'invent_days': ['income_statement.cogs', 'balance_sheet.inventory'],
+        'cash_conversion_cycle': ['invent_days', 'ar_days', 'ap_days'],
+        'ar_turnover': [
+            'income_statement.revenue', 'balance_sheet.accounts_receivable', 'prior_balance_sheet.accounts_receivable'
+        ],
+        'invent_turnover': ['income_statement.cogs', 'balance_sheet.inventory', 'prior_balance_sheet.inventory'],
+        'ap_turnover': [
+            'income_statement.cogs', 'balance_sheet.accounts_payable', 'prior_balance_sheet.accounts_payable'
+        ],
+        'working_cap_turnover': ['income_statement.revenue', 'current_working_capital', 'prior_working_capital'],
+        'ebit_interest_coverage': ['income_statement.interest_exp', 'income_statement.ebit'],
+        'ebitda_interest_coverage': ['income_statement.interest_exp', 'income_statement.ebitda'],
+        'market_close': ['price.Close'],
+        'debt_to_capital': ['balance_sheet.total_debt', 'balance_sheet.total_equity'],
+        'debt_to_equity': ['balance_sheet.total_debt', 'balance_sheet.total_equity'],
+        'net_debt': ['balance_sheet.total_liabilities', 'balance_sheet.cash_and_equivalents'],
+        'market_capitalization': ['market_close', 'balance_sheet.n_common_shares_os'],
+        'enterprise_value': [
+            'market_capitalization', 'balance_sheet.total_liabilities', 'balance_sheet.cash_and_equivalents'
+        ],
+        'debt_to_enterprise_value': ['balance_sheet.total_liabilities', 'enterprise_value'],
+        'equity_multiplier_book': ['balance_sheet.total_assets', 'balance_sheet.total_equity'],
+        'equity_multiplier_marker': ['enterprise_value', 'market_capitalization'],
+        'r_and_d_to_sales': ['income_statement.research_and_development', 'income_statement.revenue'],
+        'capx': ['cashflow_statement.capex'],
+        'capx_to_sales': ['capx', 'income_statement.revenue'],
+        'market_to_book': ['market_capitalization', 'balance_sheet.total_equity'],
+        'market_to_sales': ['market_capitalization', 'income_statement.revenue'],
+        'ev_to_ebitda': ['enterprise_value', 'income_statement.ebitda'],
+        'ev_to_sales': ['enterprise_value', 'income_statement.revenue'],
+        'eps_diluted': ['income_statement.eps_diluted'],
+        'eps_basic': [
+            'income_statement.net_income', 'income_statement.ps_div', 'balance_sheet.n_common_shares_os'
+        ],
+        'price_to_earnings': ['market_close', 'eps_basic'],
+        'n_common_shares_os': ['balance_sheet.n_common_shares_os'],
+        'asset_turnover': [
+            'income_statement.revenue', 'balance_sheet.total_assets', 'prior_balance_sheet.total_assets'
+        ],
+        'return_on_assets': ['income_statement.net_income', 'balance_sheet.total_assets'],
+        'return_on_equity': ['income_statement.net_income', 'balance_sheet.total_equity'],
+        'return_on_invested_capital': ['income_statement.nopat', 'balance_sheet.total_assets'],
+        'working_capital_to_total_assets': ['current_working_capital', 'balance_sheet.total_assets'],
+        're_to_total_assets': ['balance_sheet.retained_earnings', 'balance_sheet.total_assets'],
+        'ebit_to_total_assets': ['income_statement.ebit', 'balance_sheet.total_assets'],
+        'market_value_of_equity_to_liabs': ['market_capitalization', 'balance_sheet.total_liabilities'],
+        'total_sales_to_total_assets': ['income_statement.revenue', 'balance_sheet.total_assets'],
+        'alt_z_score': [
+            'working_capital_to_total_assets', 're_to_total_assets', 'ebit_to_total_assets',
+            'market_value_of_equity_to_liabs', 'total_sales_to_total_assets'
+        ],
+    }
+
     def __init__(self, ticker: str,
                  year: int,
                  income_statement: IncomeStatement,
@@ -137,6 +265,7 @@ class ConsolidatedStatement:
         self.eps_basic: float = \
             (self.income_statement.net_income - self.income_statement.ps_div) / self.balance_sheet.n_common_shares_os
         self.price_to_earnings: float = self.market_close / self.eps_basic
+        self.n_common_shares_os: float = self.balance_sheet.n_common_shares_os
 
         # operating ratios
         avg_total_assets: float = (self.balance_sheet.total_assets + self.prior_balance_sheet.total_assets) / 2
@@ -164,285 +293,25 @@ class ConsolidatedStatement:
     def return_data_list(self) -> list:
 
         return_list = [
-            # Profitability Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '1 - Profitability Ratios',
-             'ratio': '1.1 - Gross Margin',
-             'value': self.gross_margin
-            },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '1 - Profitability Ratios',
-             'ratio': '1.2 - Operating Margin',
-             'value': self.operating_margin
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '1 - Profitability Ratios',
-             'ratio': '1.3 - EBITDA Margin',
-             'value': self.ebitda_margin
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '1 - Profitability Ratios',
-             'ratio': '1.4 - Net Profit Margin',
-             'value': self.net_profit_margin
-             },
-            # Liquidity Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '2 - Liquidity Ratios',
-             'ratio': '2.1 - Current Ratio',
-             'value': self.current_ratio
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '2 - Liquidity Ratios',
-             'ratio': '2.2 - Quick Ratio',
-             'value': self.quick_ratio
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '2 - Liquidity Ratios',
-             'ratio': '2.3- Cash Ratio',
-             'value': self.cash_ratio
-             },
-            # Working Cap Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.1 - Days in A/R',
-             'value': self.ar_days
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.2 - A/R Turnover',
-             'value': self.ar_turnover
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.3 - Days in Inventory',
-             'value': self.invent_days
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.4 - Inventory Turnover',
-             'value': self.invent_turnover
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.5 - Days in A/P',
-             'value': self.ap_days
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.6 - A/P Turnover',
-             'value': self.ap_turnover
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.7 - Cash Conversion Cycle',
-             'value': self.cash_conversion_cycle
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '3 - Working Capital Ratios',
-             'ratio': '3.8 - Working Capital Turnover',
-             'value': self.working_cap_turnover
-             },
-            # Interest Coverage Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '4 - Interest Coverage Ratios',
-             'ratio': '4.1 - EBIT / Interest Coverage Ratio',
-             'value': self.ebit_interest_coverage
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '4 - Interest Coverage Ratios',
-             'ratio': '4.2 - EBITDA / Interest Coverage Ratio',
-             'value': self.ebitda_interest_coverage
-             },
-            # Leverage Ratio
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '5 - Leverage Ratios',
-             'ratio': '5.1 - Debt-to-Capital Ratio',
-             'value': self.debt_to_capital
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '5 - Leverage Ratios',
-             'ratio': '5.2 - Debt-to-Equity Ratio',
-             'value': self.debt_to_equity
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '5 - Leverage Ratios',
-             'ratio': '5.3 - Debt-to-Enterprise Value Ratio',
-             'value': self.debt_to_enterprise_value
-             },
             {'company': self.ticker,
              'year': self.year,
-             'ratio_type': '5 - Leverage Ratios',
-             'ratio': '5.4 - Equity Multiplier (book)',
-             'value': self.equity_multiplier_book
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '5 - Leverage Ratios',
-             'ratio': '5.5 - Equity Multiplier (market)',
-             'value': self.equity_multiplier_marker
-             },
-            # Industry Specific Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '6 - Industry Specific Ratios',
-             'ratio': '6.1 - R&D-to-Sales',
-             'value': self.r_and_d_to_sales
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '6 - Industry Specific Ratios',
-             'ratio': '6.2 - CAPEX-to-Sales',
-             'value': self.capx_to_sales
-             },
-            # Valuation Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.1 - Market-to-Book Ratio',
-             'value': self.market_to_book
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.2 - Price-to-Earning Ratio',
-             'value': self.price_to_earnings
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.3 - Market-to-Sales Ratio',
-             'value': self.market_to_sales
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.4 - EV-to-EBITDA Ratio',
-             'value': self.ev_to_ebitda
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.5 - EV-to-Sales Ratio',
-             'value': self.ev_to_sales
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.6 - EPS (Fully Diluted)',
-             'value': self.eps_diluted
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.7.1 - Share Price',
-             'value': self.market_close
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.7.2 - Common Shares O/S',
-             'value': self.balance_sheet.n_common_shares_os
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.7.3 - Market Capitalization (Share Price * Common Shares O/S)',
-             'value': self.market_capitalization
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.7.4 - Net Debt',
-             'value': self.net_debt
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '7 - Valuation Ratios',
-             'ratio': '7.7.5 - Enterprise Value',
-             'value': self.enterprise_value
-             },
-            # Operating Ratios
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '8 - Operating Ratios',
-             'ratio': '8.1 - Asset Turnover',
-             'value': self.asset_turnover
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '8 - Operating Ratios',
-             'ratio': '8.2 - Return on Assets (ROA)',
-             'value': self.return_on_assets
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '8 - Operating Ratios',
-             'ratio': '8.3 - Return on Equity (ROE)',
-             'value': self.return_on_equity
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '8 - Operating Ratios',
-             'ratio': '8.4 - Return on Invested Capital (ROIC)',
-             'value': self.return_on_invested_capital
-             },
-            # Alman Z-Score
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1 - Altman Z-Score (1.2A + 1.4B + 3.3C + 0.6D + 1.0E)',
-             'value': self.alt_z_score
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1.A - Working Capital / Total Assets Ratio',
-             'value': self.working_capital_to_total_assets
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1.B - Retained Earnings / Total Assets Ratio',
-             'value': self.re_to_total_assets
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1.C - EBIT / Total Assets Ratio',
-             'value': self.ebit_to_total_assets
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1.D - Market Value of Equity / Total Liabilities',
-             'value': self.market_value_of_equity_to_liabs
-             },
-            {'company': self.ticker,
-             'year': self.year,
-             'ratio_type': '9 - Altman Z-Score',
-             'ratio': '9.1.E - Total Sales / Total Assets',
-             'value': self.total_sales_to_total_assets
-             },
+             'ratio_type': ratio_type,
+             'ratio': ratio,
+             'value': getattr(self, attribute)
+             }
+            for attribute, ratio_type, ratio in RATIOS
         ]
 
         return return_list
+
+    def return_ratio_dict(self) -> dict:
+        # one wide row: the statement keys plus every ratio keyed by attribute name
+        return_dict = {
+            'company': self.ticker,
+            'year': self.year,
+            'statementDate': self.balance_sheet.statement_date,
+        }
+        for attribute, _, _ in RATIOS:
+            return_dict[attribute] = getattr(self, attribute)
+
+        return return_dict
@@ -0,0 +1,90 @@
+# models.correlation.py
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from models.market import return_price_matrix
+from models.market import return_log_returns
+
+
+def return_monthly_returns(tickers: list) -> pd.DataFrame:
+    # month end prices first so daily and monthly price files align on the same index
+    price_matrix = return_price_matrix(tickers)
+    monthly_prices = price_matrix.groupby(price_matrix.index.to_period('M')).last()
+
+    return pd.DataFrame(return_log_returns(monthly_prices.to_numpy()), index=monthly_prices.index,
+                        columns=monthly_prices.columns).iloc[1:]
+
+
+def return_ratio_matrix(ratio_panel: pd.DataFrame, ratio: str) -> pd.DataFrame:
+    # years x tickers for one ratio attribute
+    return ratio_panel.pivot_table(index='year', columns='company', values=ratio, aggfunc='last')
+
+
+def return_pairwise_moments(values_i: np.ndarray, values_j: np.ndarray) -> tuple:
+    # sums over the rows where both columns have a value, for every column pair in the two blocks
+    mask_i = (~np.isnan(values_i)).astype(np.float64)
+    mask_j = (~np.isnan(values_j)).astype(np.float64)
+    x_i = np.nan_to_num(values_i)
+    x_j = np.nan_to_num(values_j)
+
+    n = mask_i.T @ mask_j
+    sum_i = x_i.T @ mask_j
+    sum_j = mask_i.T @ x_j
+    sum_ii = (x_i ** 2).T @ mask_j
+    sum_jj = mask_i.T @ (x_j ** 2)
+    sum_ij = x_i.T @ x_j
+
+    return n, sum_i, sum_j, sum_ii, sum_jj, sum_ij
+
+
+def write_blocked_correlation(values: np.ndarray, labels: list, path: str, covariance_path: str = None,
+                              block_size: int = 512, min_periods: int = 12, dtype=np.float32):
+    # values: periods x tickers. only two blocks of columns and their block x block results are in memory at
+    # a time; the full matrices are written straight to .npy memmaps
+    n_columns = values.shape[1]
+    correlation = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_columns, n_columns))
+    covariance = None
+    if covariance_path:
+        covariance = np.lib.format.open_memmap(covariance_path, mode='w+', dtype=dtype, shape=(n_columns, n_columns))
+
+    starts = range(0, n_columns, block_size)
+    for start_i in starts:
+        block_i = slice(start_i, min(start_i + block_size, n_columns))
+        for start_j in starts:
+            if start_j < start_i:
+                continue
+            block_j = slice(start_j, min(start_j + block_size, n_columns))
+
+            n, sum_i, sum_j, sum_ii, sum_jj, sum_ij = return_pairwise_moments(values[:, block_i], values[:, block_j])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                co_moment = sum_ij - sum_i * sum_j / n
+                var_i = sum_ii - sum_i ** 2 / n
+                var_j = sum_jj - sum_j ** 2 / n
+                block_correlation = co_moment / np.sqrt(var_i * var_j)
+                block_covariance = co_moment / (n - 1)
+            block_correlation[n < min_periods] = np.nan
+            block_covariance[n < min_periods] = np.nan
+
+            # the matrices are symmetric, so each off diagonal block pair is computed once
+            correlation[block_i, block_j] = block_correlation
+            correlation[block_j, block_i] = block_correlation.T
+            if covariance is not None:
+                covariance[block_i, block_j] = block_covariance
+                covariance[block_j, block_i] = block_covariance.T
+
+    correlation.flush()
+    if covariance is not None:
+        covariance.flush()
+
+    with open(f'{path[:-len(".npy")]}_labels.json', 'w') as file:
+        json.dump(list(labels), file)
+
+
+def load_correlation(path: str) -> pd.DataFrame:
+    with open(f'{path[:-len(".npy")]}_labels.json') as file:
+        labels = json.load(file)
+
+    return pd.DataFrame(np.load(path, mmap_mode='r'), index=labels, columns=labels)
@@ -0,0 +1,95 @@
+# models.cubes.py
+
+import os
+
+import pandas as pd
+
+CUBE_AGGREGATIONS = ['sum', 'mean', 'median', 'count']
+
+IS_CUBE_KEYS = ['year', 'accountClassification', 'account']
+BS_CUBE_KEYS = ['year', 'accountClassification', 'account']
+RATIO_CUBE_KEYS = ['year', 'ratio_type', 'ratio']
+
+
+def write_csv(df: pd.DataFrame, path: str):
+    # write then rename, so serve_data.py polling the outputs never loads a half written file
+    tmp_path = f'{path}.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def return_cube(detail_df: pd.DataFrame, keys: list, value_column: str) -> pd.DataFrame:
+    cube = detail_df.groupby(keys, sort=True)[value_column].agg(CUBE_AGGREGATIONS)
+
+    return cube.reset_index()
+
+
+def update_cube(cube: pd.DataFrame, old_detail_df: pd.DataFrame, new_detail_df: pd.DataFrame, tickers: list,
+                keys: list, value_column: str) -> pd.DataFrame:
+    # only cells that a changed ticker had a row in, before or after the change, can move
+    changed_rows = pd.concat([
+        old_detail_df.loc[old_detail_df['company'].isin(tickers), keys],
+        new_detail_df.loc[new_detail_df['company'].isin(tickers), keys],
+    ]).drop_duplicates()
+
+    return update_cube_cells(cube, new_detail_df, pd.MultiIndex.from_frame(changed_rows), keys, value_column)
+
+
+def update_cube_cells(cube: pd.DataFrame, detail_df: pd.DataFrame, affected: pd.MultiIndex, keys: list,
+                      value_column: str) -> pd.DataFrame:
+    # recompute the affected cells from the new detail, medians included, and keep every other cell as is
+    affected_rows = detail_df[pd.MultiIndex.from_frame(detail_df[keys]).isin(affected)]
+    recomputed = return_cube(affected_rows, keys, value_column)
+    unaffected = cube[~pd.MultiIndex.from_frame(cube[keys]).isin(affected)]
+
+    return pd.concat([unaffected, recomputed]).sort_values(keys, ignore_index=True)
+
+
+def write_detail_and_cube(detail_df: pd.DataFrame, detail_path: str, cube_path: str, keys: list,
+                          value_column: str, tickers: list = None, ticker_order: list = None,
+                          date_columns: list = None):
+    # tickers=None: detail_df is the full dataset. otherwise it only holds the rows of the changed tickers, which
+    # replace their rows in the existing detail output before the cube is updated incrementally
+    if tickers is None or not os.path.exists(detail_path) or not os.path.exists(cube_path):
+        if tickers is not None:
+            raise FileNotFoundError(f'{detail_path} and {cube_path} must exist for an incremental update')
+        write_csv(detail_df, detail_path)
+        write_csv(return_cube(detail_df, keys, value_column), cube_path)
+        return
+
+    # round_trip so the rows that are not rebuilt are written back exactly as they were read
+    old_detail_df = pd.read_csv(detail_path, parse_dates=date_columns or [], float_precision='round_trip')
+    cube = pd.read_csv(cube_path, float_precision='round_trip')
+
+    new_detail_df = pd.concat([old_detail_df[~old_detail_df['company'].isin(tickers)], detail_df])
+    if ticker_order:
+        # keep the companies in settings order, as a full render would write them
+        order = new_detail_df['company'].map({ticker: i for i, ticker in enumerate(ticker_order)})
+        new_detail_df = new_detail_df.iloc[order.argsort(kind='stable')]
+
+    write_csv(new_detail_df, detail_path)
+    write_csv(update_cube(cube, old_detail_df, new_detail_df, tickers, keys, value_column), cube_path)
+
+
+def write_detail_cells(cells_df: pd.DataFrame, detail_path: str, cube_path: str, row_keys: list, cube_keys: list,
+                       value_column: str, date_columns: list = None) -> int:
+    # cells_df: new values for rows that already exist in the detail output, keyed by row_keys. only those values and
+    # the cube cells they fall in are recomputed, every other row and cell is written back as read
+    detail_df = pd.read_csv(detail_path, parse_dates=date_columns or [], float_precision='round_trip')
+
+    rows = pd.MultiIndex.from_frame(detail_df[row_keys]).get_indexer(pd.MultiIndex.from_frame(cells_df[row_keys]))
+    if (rows == -1).any():
+        missing = cells_df[rows == -1].iloc[0][row_keys].tolist()
+        raise KeyError(f'{detail_path} has no row {missing}, render it in full')
+
+    values = detail_df[value_column].to_numpy().copy()
+    values[rows] = cells_df[value_column].to_numpy(dtype=values.dtype)
+    detail_df[value_column] = values
+    write_csv(detail_df, detail_path)
+
+    if os.path.exists(cube_path):
+        cube = pd.read_csv(cube_path, float_precision='round_trip')
+        affected = pd.MultiIndex.from_frame(cells_df[cube_keys].drop_duplicates())
+        write_csv(update_cube_cells(cube, detail_df, affected, cube_keys, value_column), cube_path)
+
+    return len(rows)
@@ -0,0 +1,121 @@
+# models.dcf.py
+
+import numpy as np
+import pandas as pd
+
+# default parameter grid, every combination is valued for every company-year
+GROWTH_RATES = [0.0, 0.03, 0.06, 0.09, 0.12]
+WACCS = [0.08, 0.09, 0.10, 0.11, 0.12]
+TERMINAL_MULTIPLES = [8.0, 10.0, 12.0, 14.0]
+PROJECTION_YEARS = 5
+
+DCF_KEY_COLUMNS = ['company', 'year', 'statementDate']
+
+
+def return_operating_working_capital(balance_sheet) -> float:
+    # current assets net of cash and short term investments, less current liabilities
+    return balance_sheet.current_assets - balance_sheet.cash_and_equivalents - \
+        balance_sheet.short_term_investments - balance_sheet.current_liabilities
+
+
+def return_fcf_dict(consolidated_statement) -> dict:
+    income_statement = consolidated_statement.income_statement
+    balance_sheet = consolidated_statement.balance_sheet
+
+    capex = consolidated_statement.cashflow_statement.capex
+    change_in_nwc = return_operating_working_capital(balance_sheet) - \
+        return_operating_working_capital(consolidated_statement.prior_balance_sheet)
+
+    return {
+        'company': consolidated_statement.ticker,
+        'year': consolidated_statement.year,
+        'statementDate': balance_sheet.statement_date,
+        'nopat': income_statement.nopat,
+        'dep_and_amort': income_statement.dep_and_amort,
+        # capex is reported as a cash outflow, i.e. negative
+        'capex': capex,
+        'change_in_nwc': change_in_nwc,
+        'fcf': income_statement.nopat + income_statement.dep_and_amort + capex - change_in_nwc,
+        'ebitda': income_statement.ebitda,
+        'net_debt':
+            balance_sheet.total_debt - balance_sheet.cash_and_equivalents - balance_sheet.short_term_investments,
+        'n_common_shares_os': balance_sheet.n_common_shares_os,
+        'market_close': consolidated_statement.market_close,
+    }
+
+
+def return_fcf_panel(companies: list) -> pd.DataFrame:
+    # one row per company and fiscal year: the free cash flow history and the balance sheet items the valuation
+    # bridges from enterprise value to a share price with
+    rows = [
+        return_fcf_dict(company.statement_groups[year])
+        for company in companies
+        for year in company.statement_groups
+    ]
+
+    return pd.DataFrame(rows)
+
+
+def return_dcf_values(fcf: np.ndarray, ebitda: np.ndarray, net_debt: np.ndarray, shares: np.ndarray,
+                      growth_rates: np.ndarray, waccs: np.ndarray, terminal_multiples: np.ndarray,
+                      projection_years: int = PROJECTION_YEARS) -> tuple:
+    # every input is broadcast to rows x growth x wacc x terminal multiple. fcf and ebitda grow at the same rate
+    # for projection_years, the terminal value is the multiple on the final year's ebitda
+    years = np.arange(1, projection_years + 1)
+    growth = np.asarray(growth_rates, dtype=float)[:, None]
+    wacc = np.asarray(waccs, dtype=float)[:, None]
+    multiples = np.asarray(terminal_multiples, dtype=float)[None, None, None, :]
+
+    growth_factors = (1 + growth) ** years
+    discount_factors = (1 + wacc) ** -years
+
+    # sum over t of (1 + g)^t / (1 + w)^t, growth x wacc, shared by every row
+    annuity = growth_factors @ discount_factors.T
+
+    fcf = np.asarray(fcf, dtype=float)[:, None, None, None]
+    ebitda = np.asarray(ebitda, dtype=float)[:, None, None, None]
+    terminal_factor = (growth_factors[:, -1][:, None] * discount_factors[:, -1][None, :])[None, :, :, None]
+
+    enterprise_value = fcf * annuity[None, :, :, None] + ebitda * multiples * terminal_factor
+    equity_value = enterprise_value - np.asarray(net_debt, dtype=float)[:, None, None, None]
+
+    shares = np.asarray(shares, dtype=float)[:, None, None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value_per_share = np.where(shares > 0, equity_value / shares, np.nan)
+
+    return enterprise_value, equity_value, value_per_share
+
+
+def return_dcf_data(fcf_panel: pd.DataFrame, growth_rates: list = None, waccs: list = None,
+                    terminal_multiples: list = None, projection_years: int = PROJECTION_YEARS) -> pd.DataFrame:
+    growth_rates = np.asarray(GROWTH_RATES if growth_rates is None else growth_rates, dtype=float)
+    waccs = np.asarray(WACCS if waccs is None else waccs, dtype=float)
+    terminal_multiples = np.asarray(TERMINAL_MULTIPLES if terminal_multiples is None else terminal_multiples,
+                                    dtype=float)
+
+    enterprise_value, equity_value, value_per_share = return_dcf_values(
+        fcf_panel['fcf'].to_numpy(), fcf_panel['ebitda'].to_numpy(), fcf_panel['net_debt'].to_numpy(),
+        fcf_panel['n_common_shares_os'].to_numpy(), growth_rates, waccs, terminal_multiples,
+        projection_years=projection_years
+    )
+    market_close = fcf_panel['market_close'].to_numpy(dtype=float)[:, None, None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upside = np.where(market_close > 0, value_per_share / market_close - 1, np.nan)
+
+    # long format: the grid axes flattened in row major order next to the repeated row keys
+    shape = enterprise_value.shape
+    n_grid = shape[1] * shape[2] * shape[3]
+    row_index = np.repeat(np.arange(shape[0]), n_grid)
+    growth_grid, wacc_grid, multiple_grid = np.meshgrid(growth_rates, waccs, terminal_multiples, indexing='ij')
+
+    dcf_df = fcf_panel[DCF_KEY_COLUMNS].iloc[row_index].reset_index(drop=True)
+    dcf_df['growth'] = np.tile(growth_grid.ravel(), shape[0])
+    dcf_df['wacc'] = np.tile(wacc_grid.ravel(), shape[0])
+    dcf_df['terminal_multiple'] = np.tile(multiple_grid.ravel(), shape[0])
+    dcf_df['enterprise_value'] = enterprise_value.ravel()
+    dcf_df['equity_value'] = equity_value.ravel()
+    dcf_df['value_per_share'] = value_per_share.ravel()
+    dcf_df['market_close'] = np.broadcast_to(market_close, shape).ravel()
+    dcf_df['upside'] = upside.ravel()
+
+    return dcf_df
@@ -0,0 +1,111 @@
+# models.dependency_graph.py
+
+from models.income_statement import IncomeStatement
+from models.income_statement import ACCOUNTS as IS_ACCOUNTS
+from models.balance_sheet import BalanceSheet
+from models.balance_sheet import ACCOUNTS as BS_ACCOUNTS
+from models.cashflow_statement import CashFlowStatement
+from models.consolidated_statement import ConsolidatedStatement
+from models.consolidated_statement import RATIOS
+
+STATEMENT_CLASSES = {'is': IncomeStatement, 'bs': BalanceSheet, 'cf': CashFlowStatement}
+STATEMENT_ACCOUNTS = {'is': IS_ACCOUNTS, 'bs': BS_ACCOUNTS}
+
+# the statement kind behind each input a consolidated statement reads
+ROLE_KINDS = {
+    'income_statement': 'is',
+    'cashflow_statement': 'cf',
+    'balance_sheet': 'bs',
+    'prior_balance_sheet': 'bs',
+    'price': 'price',
+}
+PRICE_FIELDS = ['Close']
+
+# line item -> the statement kind whose quarterly file holds it
+FIELD_KINDS = {
+    field: kind
+    for kind, statement_class in STATEMENT_CLASSES.items()
+    for field in list(statement_class.FIELDS) + list(statement_class.OPTIONAL_FIELDS)
+}
+
+
+def return_leaves(dependencies: dict, leaves: dict) -> dict:
+    # attribute -> the set of leaves it is transitively computed from. dependencies: attribute -> the names it reads,
+    # attributes of the same table or names in leaves (name -> its set of leaves)
+    resolved = {}
+
+    for attribute in dependencies:
+        resolve_leaves(attribute, dependencies, leaves, resolved, [])
+
+    return resolved
+
+
+def resolve_leaves(attribute: str, dependencies: dict, leaves: dict, resolved: dict, path: list) -> set:
+    if attribute in resolved:
+        return resolved[attribute]
+    if attribute in path:
+        raise ValueError(f'dependency cycle {" -> ".join(path + [attribute])}')
+
+    attribute_leaves = set()
+    for name in dependencies[attribute]:
+        if name in dependencies:
+            attribute_leaves |= resolve_leaves(name, dependencies, leaves, resolved, path + [attribute])
+        elif name in leaves:
+            attribute_leaves |= leaves[name]
+        else:
+            raise KeyError(f'{attribute} depends on {name}, which is neither an attribute nor an input')
+    resolved[attribute] = attribute_leaves
+
+    return attribute_leaves
+
+
+def check_dependencies(ratio_leaves: dict, statement_leaves: dict):
+    # an output attribute missing from the graph would never be recomputed, fail on import instead
+    for attribute, _, _ in RATIOS:
+        if attribute not in ratio_leaves:
+            raise KeyError(f'ratio {attribute} is missing from ConsolidatedStatement.DEPENDENCIES')
+    for kind, accounts in STATEMENT_ACCOUNTS.items():
+        for attribute, _, _ in accounts:
+            if attribute not in statement_leaves[kind]:
+                raise KeyError(f'account {attribute} is missing from {STATEMENT_CLASSES[kind].__name__}.DEPENDENCIES')
+
+
+# statement attribute -> the line items it is computed from, by kind
+STATEMENT_LEAVES = {
+    kind: return_leaves(statement_class.DEPENDENCIES,
+                        {field: {field} for field, field_kind in FIELD_KINDS.items() if field_kind == kind})
+    for kind, statement_class in STATEMENT_CLASSES.items()
+}
+
+# consolidated statement attribute -> the (role, line item) pairs it is computed from
+RATIO_LEAVES = return_leaves(ConsolidatedStatement.DEPENDENCIES, {
+    **{
+        f'{role}.{attribute}': {(role, field) for field in STATEMENT_LEAVES[kind][attribute]}
+        for role, kind in ROLE_KINDS.items() if kind in STATEMENT_LEAVES
+        for attribute in STATEMENT_LEAVES[kind]
+    },
+    **{f'price.{field}': {('price', field)} for field in PRICE_FIELDS},
+})
+
+check_dependencies(RATIO_LEAVES, STATEMENT_LEAVES)
+
+
+def return_dependent_ratios(role: str, fields: list) -> list:
+    # the RATIOS rows, in output order, reading any of the line items through the role's statement
+    changed = {(role, field) for field in fields}
+
+    return [ratio for ratio in RATIOS if RATIO_LEAVES[ratio[0]] & changed]
+
+
+def return_dependent_accounts(kind: str, fields: list) -> list:
+    # the ACCOUNTS rows of a statement kind, in output order, computed from any of the line items
+    changed = set(fields)
+
+    return [account for account in STATEMENT_ACCOUNTS.get(kind, []) if STATEMENT_LEAVES[kind][account[0]] & changed]
+
+
+def return_dependent_attributes(kind: str, fields: list) -> list:
+    # every statement attribute of the kind computed from any of the line items
+    changed = set(fields)
+
+    return [attribute for attribute, leaves in STATEMENT_LEAVES[kind].items() if leaves & changed]
@@ -0,0 +1,112 @@
+# models.event_study.py
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.market import return_price_matrix
+
+# event window in price periods relative to the first price date on or after the statement date. the price files
+# are monthly, so the default is a month before to three months after
+WINDOW_START = -1
+WINDOW_END = 3
+
+EVENT_KEY_COLUMNS = ['company', 'statementDate', 'quarter', 'year']
+
+
+def return_event_panel(companies: list) -> pd.DataFrame:
+    # one event per quarterly income statement
+    rows = [
+        [company.ticker, income_statement.statement_date, income_statement.quarter, income_statement.year]
+        for company in companies
+        for income_statement in company.income_statements
+    ]
+
+    return pd.DataFrame(rows, columns=EVENT_KEY_COLUMNS)
+
+
+def return_abnormal_returns(prices: np.ndarray) -> np.ndarray:
+    # dates x tickers simple returns less the equal weighted average of the other tickers priced in the period.
+    # nan where the ticker or every peer is unpriced
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.full_like(prices, np.nan)
+        returns[1:] = prices[1:] / prices[:-1] - 1
+
+        priced = ~np.isnan(returns)
+        n_peers = priced.sum(axis=1, keepdims=True) - priced
+        peer_returns = (np.nansum(returns, axis=1, keepdims=True) - np.nan_to_num(returns)) / n_peers
+
+    return np.where(n_peers > 0, returns - peer_returns, np.nan)
+
+
+def return_event_windows(abnormal_returns: np.ndarray, event_positions: np.ndarray, ticker_codes: np.ndarray,
+                         window_start: int = WINDOW_START, window_end: int = WINDOW_END) -> np.ndarray:
+    # events x window length, the abnormal returns of every event window gathered from one strided view. windows
+    # running past either end of the price history are nan padded
+    before = max(-window_start, 0)
+    after = max(window_end, 0)
+    padded = np.pad(abnormal_returns, ((before, after), (0, 0)), constant_values=np.nan)
+
+    # windows[t, ticker] covers padded rows t .. t + length - 1, no copy
+    windows = sliding_window_view(padded, window_end - window_start + 1, axis=0)
+
+    return windows[event_positions + window_start + before, ticker_codes]
+
+
+def return_event_data(event_panel: pd.DataFrame, price_matrix: pd.DataFrame, window_start: int = WINDOW_START,
+                      window_end: int = WINDOW_END) -> pd.DataFrame:
+    # event_panel: one row per event (return_event_panel). price_matrix: dates x tickers of adjusted closes
+    if window_start > window_end:
+        raise ValueError(f'window start {window_start} is after its end {window_end}')
+
+    dates = price_matrix.index.values
+    tickers = np.asarray(price_matrix.columns)
+    abnormal_returns = return_abnormal_returns(price_matrix.to_numpy(dtype=float))
+
+    events = event_panel[event_panel['company'].isin(tickers)].reset_index(drop=True)
+    order = np.argsort(tickers)
+    ticker_codes = order[np.searchsorted(tickers, events['company'].to_numpy(), sorter=order)]
+
+    # day 0 is the first price date on or after the statement date
+    event_positions = np.searchsorted(dates, events['statementDate'].to_numpy().astype(dates.dtype), side='left')
+    in_history = event_positions < len(dates)
+    windows = return_event_windows(abnormal_returns, np.minimum(event_positions, len(dates) - 1), ticker_codes,
+                                   window_start=window_start, window_end=window_end)
+    windows[~in_history] = np.nan
+
+    # a car needs every period of its window
+    complete = ~np.isnan(windows).any(axis=1)
+
+    event_df = events.copy()
+    event_df['eventDate'] = np.where(in_history, dates[np.minimum(event_positions, len(dates) - 1)],
+                                     np.datetime64('NaT'))
+    event_df['car'] = np.where(complete, windows.sum(axis=1), np.nan)
+    for offset, column in zip(range(window_start, window_end + 1), windows.T):
+        event_df[f'ar_{offset}'] = column
+
+    return event_df
+
+
+def return_car_summary(event_df: pd.DataFrame, keys: list = None) -> pd.DataFrame:
+    # mean car per group with its cross sectional t statistic, over the events with a complete window
+    keys = keys or ['company', 'year']
+    complete = event_df.dropna(subset=['car'])
+    grouped = complete.groupby(keys)['car']
+
+    summary = grouped.agg(['count', 'mean', 'median', 'std']).rename(columns={
+        'count': 'n_events', 'mean': 'mean_car', 'median': 'median_car', 'std': 'std_car'
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['t_stat'] = summary['mean_car'] / (summary['std_car'] / np.sqrt(summary['n_events']))
+    summary['positive_share'] = (complete['car'] > 0).groupby([complete[key] for key in keys]).mean()
+
+    return summary.reset_index()
+
+
+def return_event_study_data(companies: list, window_start: int = WINDOW_START, window_end: int = WINDOW_END) -> tuple:
+    # (one row per event, cars by company and year)
+    price_matrix = return_price_matrix([company.ticker for company in companies])
+    event_df = return_event_data(return_event_panel(companies), price_matrix, window_start=window_start,
+                                 window_end=window_end)
+
+    return event_df, return_car_summary(event_df)
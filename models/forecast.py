@@ -0,0 +1,186 @@
+# models.forecast.py
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from models.growth import return_quarterly_growth_panel
+
+# statement attributes, signed as the statement models hold them (costs and capex are negative)
+FORECAST_ITEMS = ['revenue', 'cogs', 'selling_general_and_admin', 'research_and_development', 'capex']
+FORECAST_METHODS = ['seasonal_naive', 'holt_winters', 'linear_trend']
+SEASON = 4
+HORIZON = 4
+# quarters of history each model is fit on, aligned on every ticker's own latest quarter
+WINDOW = 24
+# two sided 95% band
+BAND_Z = 1.96
+
+# smoothing parameters tried for every series, the one with the lowest one step ahead error is kept
+HOLT_WINTERS_ALPHAS = [0.1, 0.3, 0.5, 0.7]
+HOLT_WINTERS_BETAS = [0.05, 0.2]
+HOLT_WINTERS_GAMMAS = [0.1, 0.3]
+
+
+def return_series_matrix(panel: pd.DataFrame, items: list, window: int = WINDOW) -> tuple:
+    # (series x window values, one row of keys per series). every ticker's quarters are right aligned so
+    # column window - 1 is its latest quarter, missing quarters stay nan
+    panel = panel.drop_duplicates(['company', 'period'])
+    last_period = panel.groupby('company')['period'].transform('max').to_numpy()
+    columns = panel['period'].to_numpy() - last_period + window - 1
+    kept = columns >= 0
+
+    tickers, codes = np.unique(panel['company'].to_numpy()[kept], return_inverse=True)
+    values = np.full((len(tickers), len(items), window), np.nan)
+    values[codes[:, None], np.arange(len(items))[None, :], columns[kept][:, None]] = \
+        panel[items].to_numpy(dtype=float)[kept]
+
+    keys = pd.DataFrame(list(itertools.product(tickers, items)), columns=['company', 'item'])
+    keys['last_period'] = np.repeat(panel.groupby('company')['period'].max().reindex(tickers).to_numpy(), len(items))
+
+    return values.reshape(len(tickers) * len(items), window), keys
+
+
+def return_seasonal_naive(values: np.ndarray, horizon: int = HORIZON) -> tuple:
+    # the same quarter a year earlier, the band from the spread of the year over year changes
+    steps = np.arange(horizon)
+    forecasts = values[:, values.shape[1] - SEASON + steps % SEASON]
+    sigma = np.nanstd(values[:, SEASON:] - values[:, :-SEASON], axis=1, ddof=1)
+    spread = sigma[:, None] * np.sqrt(steps // SEASON + 1)[None, :]
+
+    return forecasts, spread
+
+
+def return_holt_winters(values: np.ndarray, horizon: int = HORIZON) -> tuple:
+    # additive holt-winters, run for every smoothing parameter combination and series at once. the loop is over
+    # time only, a missing quarter is skipped by carrying the states forward
+    params = np.array(list(itertools.product(HOLT_WINTERS_ALPHAS, HOLT_WINTERS_BETAS, HOLT_WINTERS_GAMMAS)))
+    alpha, beta, gamma = (params[:, i][:, None] for i in range(3))
+    n_series, n_periods = values.shape
+
+    # initial states from the first two years
+    first_year = values[:, :SEASON]
+    level = np.broadcast_to(np.nanmean(first_year, axis=1), (len(params), n_series)).copy()
+    trend = np.broadcast_to((np.nanmean(values[:, SEASON:2 * SEASON], axis=1) - level[0]) / SEASON,
+                            (len(params), n_series)).copy()
+    seasonals = np.broadcast_to((first_year - level[0][:, None]).T[:, None, :],
+                                (SEASON, len(params), n_series)).copy()
+
+    squared_errors = np.zeros((len(params), n_series))
+    n_errors = np.zeros(n_series)
+    for t in range(SEASON, n_periods):
+        observed = values[:, t]
+        known = ~np.isnan(observed)
+        season = seasonals[t % SEASON]
+        expected = level + trend + season
+        error = np.where(known, observed - expected, 0)
+        if t >= 2 * SEASON:
+            squared_errors += error ** 2
+            n_errors += known
+
+        new_level = np.where(known, alpha * (observed - season) + (1 - alpha) * (level + trend), level + trend)
+        trend = np.where(known, beta * (new_level - level) + (1 - beta) * trend, trend)
+        seasonals[t % SEASON] = np.where(known, gamma * (observed - new_level) + (1 - gamma) * season, season)
+        level = new_level
+
+    # best parameters per series
+    best = np.argmin(np.where(np.isnan(squared_errors), np.inf, squared_errors), axis=0)
+    series = np.arange(n_series)
+    steps = np.arange(1, horizon + 1)
+    forecasts = level[best, series][:, None] + trend[best, series][:, None] * steps[None, :] + \
+        seasonals[(n_periods + steps - 1) % SEASON][:, best, series].T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.sqrt(squared_errors[best, series] / np.maximum(n_errors - 1, 1))
+    spread = sigma[:, None] * np.sqrt(steps)[None, :]
+
+    fitted = np.isfinite(first_year).all(axis=1) & (n_errors > SEASON)
+    forecasts[~fitted] = np.nan
+
+    return forecasts, spread
+
+
+def return_linear_trend(values: np.ndarray, horizon: int = HORIZON) -> tuple:
+    # least squares on time with nan weights, closed form for all series. the band is the prediction interval
+    n_periods = values.shape[1]
+    time = np.arange(n_periods, dtype=float)[None, :]
+    known = ~np.isnan(values)
+    filled = np.where(known, values, 0)
+
+    n = known.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time_mean = np.sum(time * known, axis=1) / n
+        value_mean = filled.sum(axis=1) / n
+        centered_time = np.where(known, time - time_mean[:, None], 0)
+        sxx = np.sum(centered_time ** 2, axis=1)
+        slope = np.sum(centered_time * (filled - value_mean[:, None]), axis=1) / sxx
+        intercept = value_mean - slope * time_mean
+
+        residuals = np.where(known, filled - intercept[:, None] - slope[:, None] * time, 0)
+        sigma = np.sqrt(np.sum(residuals ** 2, axis=1) / (n - 2))
+
+        future_time = np.arange(n_periods, n_periods + horizon, dtype=float)[None, :]
+        forecasts = intercept[:, None] + slope[:, None] * future_time
+        spread = sigma[:, None] * np.sqrt(1 + 1 / n[:, None] + (future_time - time_mean[:, None]) ** 2 / sxx[:, None])
+
+    forecasts[n < 3] = np.nan
+
+    return forecasts, spread
+
+
+FORECAST_FUNCTIONS = {
+    'seasonal_naive': return_seasonal_naive,
+    'holt_winters': return_holt_winters,
+    'linear_trend': return_linear_trend,
+}
+
+
+def return_forecast_data(companies: list, items: list = None, methods: list = None, window: int = WINDOW,
+                         horizon: int = HORIZON) -> pd.DataFrame:
+    items = items or FORECAST_ITEMS
+    methods = methods or FORECAST_METHODS
+
+    values, keys = return_series_matrix(return_quarterly_growth_panel(companies), items, window=window)
+
+    frames = []
+    for method in methods:
+        forecasts, spread = FORECAST_FUNCTIONS[method](values, horizon=horizon)
+
+        # periods are fiscal quarters counted from year 0, as in models.growth
+        periods = keys['last_period'].to_numpy()[:, None] + np.arange(1, horizon + 1)[None, :]
+        frame = pd.DataFrame({
+            'company': np.repeat(keys['company'].to_numpy(), horizon),
+            'item': np.repeat(keys['item'].to_numpy(), horizon),
+            'method': method,
+            'horizon': np.tile(np.arange(1, horizon + 1), len(keys)),
+            'year': (periods // SEASON).ravel(),
+            'quarter': (periods % SEASON + 1).ravel(),
+            'forecast': forecasts.ravel(),
+            'lower': (forecasts - BAND_Z * spread).ravel(),
+            'upper': (forecasts + BAND_Z * spread).ravel(),
+        })
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def return_pro_forma_ratios(forecast_df: pd.DataFrame) -> pd.DataFrame:
+    # next four quarters summed per company and method, then the ratios consolidated_statement computes from the
+    # same items
+    # a total is only defined when every quarter of the horizon has a forecast
+    horizon = forecast_df['horizon'].max()
+    totals = forecast_df.groupby(['company', 'method', 'item'], sort=False)['forecast'].sum(min_count=horizon)
+    totals = totals.unstack('item')
+    revenue = totals['revenue']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = pd.DataFrame({
+            'revenue': revenue,
+            'gross_margin': (revenue + totals['cogs']) / revenue,
+            'sga_to_sales': totals['selling_general_and_admin'] / revenue * -1,
+            'r_and_d_to_sales': totals['research_and_development'] / revenue * -1,
+            'capx_to_sales': totals['capex'] / revenue * -1,
+        })
+
+    return ratios.where(revenue != 0).reset_index()
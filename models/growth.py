@@ -0,0 +1,99 @@
+# models.growth.py
+
+import numpy as np
+import pandas as pd
+
+from models.panels import return_statement_panel
+
+GROWTH_ITEMS = [
+    'revenue', 'gross_profit', 'operating_income', 'ebitda', 'net_income', 'eps_diluted', 'capex'
+]
+CAGR_YEARS = [3, 5]
+
+
+def return_quarterly_growth_panel(companies: list) -> pd.DataFrame:
+    is_panel = return_statement_panel([stmt for company in companies for stmt in company.income_statements])
+    cf_panel = return_statement_panel([stmt for company in companies for stmt in company.cashflow_statements])
+
+    panel = is_panel.merge(cf_panel[['company', 'statementDate', 'capex']], on=['company', 'statementDate'],
+                           how='left')
+    panel['period'] = panel['year'] * 4 + panel['quarter'] - 1
+
+    return panel
+
+
+def return_annual_growth_panel(companies: list) -> pd.DataFrame:
+    is_panel = return_statement_panel([
+        stmt for company in companies for stmt in company.annual_income_statements.values()
+    ])
+    cf_panel = return_statement_panel([
+        stmt for company in companies for stmt in company.annual_cashflow_statements.values()
+    ])
+
+    panel = is_panel.merge(cf_panel[['company', 'year', 'capex']], on=['company', 'year'], how='left')
+    panel['period'] = panel['year']
+
+    return panel
+
+
+def return_lagged_values(panel: pd.DataFrame, items: list, lag: int) -> pd.DataFrame:
+    # values of the same company `lag` periods earlier, matched on the period key rather than on row position so
+    # gaps in a ticker's history give nan instead of comparing against the wrong period
+    values = panel.drop_duplicates(['company', 'period']).set_index(['company', 'period'])[items]
+    lagged_keys = pd.MultiIndex.from_arrays([panel['company'], panel['period'] - lag])
+
+    return values.reindex(lagged_keys).set_axis(panel.index)
+
+
+def return_growth_rates(current: pd.DataFrame, prior: pd.DataFrame) -> pd.DataFrame:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (current - prior) / prior.abs()
+
+    return growth.where(prior != 0)
+
+
+def return_cagr(current: pd.DataFrame, prior: pd.DataFrame, years: int) -> pd.DataFrame:
+    # compound growth is only defined when both ends are positive
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (current / prior) ** (1 / years) - 1
+
+    return cagr.where((current > 0) & (prior > 0))
+
+
+def melt_growth_metrics(panel: pd.DataFrame, metrics: dict, frequency: str) -> pd.DataFrame:
+    frames = []
+
+    for metric, values in metrics.items():
+        frame = pd.concat([panel[['company', 'statementDate', 'quarter', 'year']], values], axis=1)
+        frame = frame.melt(id_vars=['company', 'statementDate', 'quarter', 'year'], var_name='item',
+                           value_name='value')
+        frame.insert(4, 'frequency', frequency)
+        frame.insert(6, 'metric', metric)
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True).dropna(subset=['value'])
+
+
+def return_growth_data(companies: list, items: list = None) -> pd.DataFrame:
+    items = items or GROWTH_ITEMS
+
+    quarterly = return_quarterly_growth_panel(companies)
+    quarterly_metrics = {
+        'QoQ': return_growth_rates(quarterly[items], return_lagged_values(quarterly, items, 1)),
+        # same fiscal quarter a year earlier, on the offset adjusted quarter and year
+        'YoY': return_growth_rates(quarterly[items], return_lagged_values(quarterly, items, 4)),
+    }
+
+    annual = return_annual_growth_panel(companies)
+    annual_metrics = {'YoY': return_growth_rates(annual[items], return_lagged_values(annual, items, 1))}
+    for years in CAGR_YEARS:
+        annual_metrics[f'{years}Y CAGR'] = return_cagr(annual[items], return_lagged_values(annual, items, years),
+                                                       years)
+
+    growth_df = pd.concat([
+        melt_growth_metrics(quarterly, quarterly_metrics, 'quarterly'),
+        melt_growth_metrics(annual, annual_metrics, 'annual'),
+    ], ignore_index=True)
+
+    return growth_df.sort_values(['company', 'frequency', 'item', 'metric', 'year', 'quarter'],
+                                 ignore_index=True, kind='stable')
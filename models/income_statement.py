@@ -1,28 +1,54 @@
 # models.income_statement.py
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
 from models.utilities import return_adjusted_quarter_and_year
-
-
-def return_quarterly_is_df(ticker: str) -> pd.DataFrame:
+from models.utilities import return_derivation_inputs
+from models.utilities import return_derived_values
+from models.utilities import return_fixed_point_df
+from models.utilities import FRACTIONAL_SCALE
+from settings import AMOUNT_UNIT
+
+
+# account attribute, account classification and account label, in output order
+ACCOUNTS = [
+    ('revenue', '1 - Gross Profit', '1.1 - Revenue'),
+    ('cogs', '1 - Gross Profit', '1.2 - COGS'),
+    ('selling_general_and_admin', '2 - Operating Expenses', '2.1 - SG&A'),
+    ('research_and_development', '2 - Operating Expenses', '2.2 - R&D'),
+    ('operating_expenses', '2 - Operating Expenses', '2.3 - Operating Expenses'),
+    ('net_interest_exp', '3 - Other Income/Expenses', '3.1 - Net Interest Expense'),
+    ('net_other_exp', '3 - Other Income/Expenses', '3.2 - Net Other Expenses'),
+    ('taxes', '4 - Taxes', '4.1 - Taxes'),
+]
+
+
+def return_quarterly_is_df(ticker: str, fields: list = None, optional_fields: dict = None,
+                           unit: int = AMOUNT_UNIT, dates: list = None) -> pd.DataFrame:
+    # dates: the statement date columns to read, None reads every quarter in the file
     path = f'fin_data_input/{ticker}_quarterly_financials.csv'
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, dtype=str, usecols=None if dates is None else ['name'] + list(dates))
 
     # drop unwanted ttm column
-    df = df.drop(['ttm'], axis=1)
-    # replace unwanted strings parts and fill na
+    df = df.drop(['ttm'], axis=1, errors='ignore')
+    # remove unwanted string types
     df['name'] = df['name'].str.replace('\t', '')
-    df = df.replace(',', '', regex=True)
-    df = df.fillna(0)
+    # keep only the line items the statement model reads before any numeric conversion
+    if fields is not None:
+        df = df[df['name'].isin(list(fields) + list(optional_fields or {}))]
 
     # set the index to the column name
     df = df.set_index('name')
 
-    # convert column values to floats
-    for column in df.columns:
-        df[column] = df[column].astype(float)
+    # fill optional line items the file does not report, before conversion so they are scaled like the rest
+    for field, default in (optional_fields or {}).items():
+        if field not in df.index:
+            df.loc[field] = str(default)
+
+    # whole units as int64, see return_fixed_point_df
+    df = return_fixed_point_df(df, unit)
 
     return df
 
@@ -42,8 +68,72 @@ def convert_is_df_to_records_dict(df: pd.DataFrame) -> dict:
     return records
 
 
+def return_is_account_panel(df: pd.DataFrame) -> dict:
+    # the ACCOUNTS attributes of every statement at once, as arrays over the statement date columns of a quarterly
+    # is df. the same DERIVATIONS IncomeStatement evaluates per statement, on whole rows
+    items = {**IncomeStatement.OPTIONAL_FIELDS, **dict(zip(df.index, df.to_numpy()))}
+
+    return return_derived_values(IncomeStatement.DERIVATIONS, items, [attribute for attribute, _, _ in ACCOUNTS])
+
+
 class IncomeStatement:
 
+    # line items read from the quarterly statement file, and optional ones with their default
+    FIELDS: list = [
+        'GrossProfit', 'CostOfRevenue', 'OperatingIncome', 'SellingGeneralAndAdministration',
+        'ResearchAndDevelopment', 'PretaxIncome', 'NetInterestIncome', 'NetIncome', 'InterestExpense', 'EBIT',
+        'ReconciledDepreciation', 'DilutedEPS'
+    ]
+    OPTIONAL_FIELDS: dict = {'PreferredStockDividends': 0.0}
+    # attribute -> the line item it is, or (the line items and attributes it is computed from, how). the one source
+    # of the arithmetic: __init__ evaluates it on one statement, return_is_account_panel on whole rows
+    DERIVATIONS: dict = {
+        # gross profit
+        'gross_profit': 'GrossProfit',
+        'cogs': (['CostOfRevenue'], lambda cost_of_revenue: cost_of_revenue * -1),
+        'revenue': (['gross_profit', 'cogs'], lambda gross_profit, cogs: gross_profit - cogs),
+        # operating expenses
+        'operating_income': 'OperatingIncome',
+        'selling_general_and_admin': (['SellingGeneralAndAdministration'], lambda sga: sga * -1),
+        'research_and_development': (['ResearchAndDevelopment'], lambda r_and_d: r_and_d * -1),
+        'operating_expenses': (
+            ['operating_income', 'gross_profit', 'selling_general_and_admin', 'research_and_development'],
+            lambda operating_income, gross_profit, sga, r_and_d: operating_income - gross_profit - sga - r_and_d
+        ),
+        # other income and expenses
+        'pretax_income': 'PretaxIncome',
+        'net_interest_exp': 'NetInterestIncome',
+        'net_other_exp': (
+            ['pretax_income', 'operating_income', 'net_interest_exp'],
+            lambda pretax_income, operating_income, net_interest_exp:
+                pretax_income - operating_income - net_interest_exp
+        ),
+        # taxes and net income
+        'net_income': 'NetIncome',
+        'taxes': (['pretax_income', 'net_income'], lambda pretax_income, net_income: pretax_income - net_income),
+        # 0 where there is no pretax income. [()] unwraps the 0-d result of one statement and keeps a panel's array
+        'tax_rate': (
+            ['taxes', 'pretax_income'],
+            lambda taxes, pretax_income: np.divide(taxes, pretax_income, out=np.zeros(np.shape(pretax_income)),
+                                                   where=np.not_equal(pretax_income, 0))[()]
+        ),
+        'nopat': (
+            ['operating_income', 'tax_rate'], lambda operating_income, tax_rate: operating_income * (1 - tax_rate)
+        ),
+        # other values
+        'interest_exp': 'InterestExpense',
+        'ebit': 'EBIT',
+        'dep_and_amort': 'ReconciledDepreciation',
+        'ebitda': (['ebit', 'dep_and_amort'], lambda ebit, dep_and_amort: ebit + dep_and_amort),
+        'ps_div': 'PreferredStockDividends',
+        'eps_diluted': (['DilutedEPS'], lambda eps: eps / FRACTIONAL_SCALE),
+    }
+    # attribute -> the line items and attributes it is computed from, see models.dependency_graph. read off
+    # DERIVATIONS, so it names exactly the inputs the arithmetic is called with
+    DEPENDENCIES: dict = {
+        attribute: return_derivation_inputs(derivation) for attribute, derivation in DERIVATIONS.items()
+    }
+
     def __init__(self, ticker: str, quarter_offset: int, **kwargs):
         # company and date info
         self.ticker: str = ticker
@@ -52,44 +142,9 @@ class IncomeStatement:
         self.quarter: int = quarter
         self.year: int = year
 
-        # gross profit
-        self.gross_profit: float = kwargs['GrossProfit']
-        self.cogs: float = kwargs['CostOfRevenue'] * -1
-        self.revenue: float = self.gross_profit - self.cogs
-
-        # operating expenses
-        self.operating_income: float = kwargs['OperatingIncome']
-        self.selling_general_and_admin: float = kwargs['SellingGeneralAndAdministration'] * -1
-        self.research_and_development: float = kwargs['ResearchAndDevelopment'] * -1
-        total_operating_expenses: float = self.operating_income - self.gross_profit
-        self.operating_expenses: float = \
-            total_operating_expenses - self.selling_general_and_admin - self.research_and_development
-
-        # other income and expenses
-        self.pretax_income: float = kwargs['PretaxIncome']
-        total_other_exp: float = self.pretax_income - self.operating_income
-        self.net_interest_exp: float = kwargs['NetInterestIncome']
-        self.net_other_exp: float = total_other_exp - self.net_interest_exp
-
-        # taxes and net income
-        self.net_income: float = kwargs['NetIncome']
-        self.taxes: float = self.pretax_income - self.net_income
-        if self.pretax_income == 0:
-            self.tax_rate: float = 0
-        else:
-            self.tax_rate: float = self.taxes / self.pretax_income
-        self.nopat: float = self.operating_income * (1 - self.tax_rate)
-
-        # other values
-        self.interest_exp: float = kwargs['InterestExpense']
-        self.ebit: float = kwargs['EBIT']
-        self.dep_and_amort: float = kwargs['ReconciledDepreciation']
-        self.ebitda: float = self.ebit + self.dep_and_amort
-        if 'PreferredStockDividends' not in kwargs:
-            self.ps_div: float = 0.0
-        else:
-            self.ps_div: float = kwargs['PreferredStockDividends']
-        self.eps_diluted: float = kwargs['DilutedEPS']
+        # line items and the attributes computed from them, see DERIVATIONS
+        for attribute, value in return_derived_values(self.DERIVATIONS, {**self.OPTIONAL_FIELDS, **kwargs}).items():
+            setattr(self, attribute, value)
 
     def __repr__(self):
         return f'{self.__class__.__name__}: {self.ticker} Q{self.quarter} {self.year}'
@@ -115,113 +170,11 @@ class IncomeStatement:
              'statementDate': self.statement_date,
              'quarter': self.quarter,
              'year': self.year,
-             'accountClassification': '1 - Gross Profit',
-             'account': '1.1 - Revenue',
-             'amount': self.revenue
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '1 - Gross Profit',
-             'account': '1.2 - COGS',
-             'amount': self.cogs
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Operating Expenses',
-             'account': '2.1 - SG&A',
-             'amount': self.selling_general_and_admin
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Operating Expenses',
-             'account': '2.2 - R&D',
-             'amount': self.research_and_development
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '2 - Operating Expenses',
-             'account': '2.3 - Operating Expenses',
-             'amount': self.operating_expenses
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '3 - Other Income/Expenses',
-             'account': '3.1 - Net Interest Expense',
-             'amount': self.net_interest_exp
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '3 - Other Income/Expenses',
-             'account': '3.2 - Net Other Expenses',
-             'amount': self.net_other_exp
-             },
-            {'company': self.ticker,
-             'statementDate': self.statement_date,
-             'quarter': self.quarter,
-             'year': self.year,
-             'accountClassification': '4 - Taxes',
-             'account': '4.1 - Taxes',
-             'amount': self.taxes
-             },
+             'accountClassification': classification,
+             'account': account,
+             'amount': getattr(self, attribute)
+             }
+            for attribute, classification, account in ACCOUNTS
         ]
 
         return return_list
-
-    def add_other_income_statement(self, **kwargs):
-        attributes_to_ignore: list = [
-            'ticker', 'statement_date', 'quarter', 'year'
-        ]
-        for attribute in list(kwargs.keys()):
-            if attribute not in attributes_to_ignore:
-                new_value = getattr(self, attribute) + kwargs[attribute]
-                setattr(self, attribute, new_value)
-
-
-def combine_income_statements_to_dict(*args: IncomeStatement):
-
-    dates = [inc_stmt.statement_date for inc_stmt in args]
-
-    gross_profit = sum([inc_stmt.gross_profit for inc_stmt in args])
-    cogs = sum([inc_stmt.cogs for inc_stmt in args])
-    op_inc = sum([inc_stmt.operating_income for inc_stmt in args])
-    sga = sum([inc_stmt.selling_general_and_admin for inc_stmt in args])
-    rad = sum([inc_stmt.research_and_development for inc_stmt in args])
-    pretax_inc = sum([inc_stmt.pretax_income for inc_stmt in args])
-    net_int_exp = sum([inc_stmt.net_interest_exp for inc_stmt in args])
-    net_income = sum([inc_stmt.net_income for inc_stmt in args])
-    int_exp = sum([inc_stmt.interest_exp for inc_stmt in args])
-    ebit = sum([inc_stmt.ebit for inc_stmt in args])
-    rec_dep = sum([inc_stmt.dep_and_amort for inc_stmt in args])
-    ps_div = sum([inc_stmt.ps_div for inc_stmt in args])
-    diluted_eps = sum([inc_stmt.eps_diluted for inc_stmt in args])
-
-    return_dict = {
-        'StatementDate': max(dates),
-        'GrossProfit': gross_profit,
-        'CostOfRevenue': cogs * -1,
-        'OperatingIncome': op_inc,
-        'SellingGeneralAndAdministration': sga * -1,
-        'ResearchAndDevelopment': rad * -1,
-        'PretaxIncome': pretax_inc,
-        'NetInterestIncome': net_int_exp,
-        'NetIncome': net_income,
-        'InterestExpense': int_exp,
-        'EBIT': ebit,
-        'ReconciledDepreciation': rec_dep,
-        'PreferredStockDividends': ps_div,
-        'DilutedEPS': diluted_eps
-    }
-
-    return return_dict
@@ -0,0 +1,5 @@
+# models.legacy
+
+# the is, bs and ratio pipeline as it was before the optimization series: float loading, one object per
+# statement and combine_*_to_dict annual sums. frozen as the reference verify_data compares the render paths to,
+# do not optimize
@@ -0,0 +1,96 @@
+# models.manifest.py
+
+# stdlib only: this module is imported on the no-op refresh path, before pandas is ever loaded
+import glob
+import hashlib
+import json
+import os
+
+from settings import INPUT_DIR
+
+INPUT_FILE_PATTERNS = {
+    'is': '{input_dir}/{ticker}_quarterly_financials.csv',
+    'bs': '{input_dir}/{ticker}_quarterly_balance-sheet.csv',
+    'cf': '{input_dir}/{ticker}_quarterly_cash-flow.csv',
+    'price': '{input_dir}/{ticker}.csv',
+}
+
+# code every output depends on, so an edited model invalidates the cached outputs too
+CODE_FILES = ['settings.py', 'models/*.py']
+
+
+def return_input_files(tickers: list, kinds: list, input_dir: str = INPUT_DIR) -> list:
+    return [
+        INPUT_FILE_PATTERNS[kind].format(input_dir=input_dir, ticker=ticker)
+        for ticker in tickers
+        for kind in kinds
+    ]
+
+
+def return_code_files() -> list:
+    return sorted(path for pattern in CODE_FILES for path in glob.glob(pattern))
+
+
+def return_file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def return_file_fingerprints(paths: list, previous: dict = None) -> dict:
+    previous = previous or {}
+    fingerprints = {}
+
+    for path in paths:
+        stat = os.stat(path)
+        prior = previous.get(path)
+        # only hash a file when its size or mtime moved since the last manifest
+        if prior and prior['size'] == stat.st_size and prior['mtime_ns'] == stat.st_mtime_ns:
+            fingerprints[path] = prior
+        else:
+            fingerprints[path] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': return_file_sha256(path)
+            }
+
+    return fingerprints
+
+
+def return_digest(fingerprints: dict, paths: list) -> str:
+    sha = hashlib.sha256()
+
+    for path in sorted(paths):
+        sha.update(f'{path}:{fingerprints[path]["sha256"]}\n'.encode())
+
+    return sha.hexdigest()
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {'files': {}, 'outputs': {}}
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_manifest(path: str, manifest: dict):
+    # write then rename so a crashed run never leaves a half written manifest
+    tmp_path = f'{path}.tmp'
+
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+
+    os.replace(tmp_path, path)
+
+
+def return_changed_tickers(tickers: list, kinds: list, fingerprints: dict, built_inputs: dict) -> list:
+    # tickers with any input file whose content differs from the one the output was built from
+    return [
+        ticker for ticker in tickers
+        if any(built_inputs.get(path) != fingerprints[path]['sha256'] for path in return_input_files([ticker], kinds))
+    ]
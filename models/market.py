@@ -0,0 +1,117 @@
+# models.market.py
+
+import numpy as np
+import pandas as pd
+
+
+def return_price_df(ticker: str) -> pd.DataFrame:
+    path = f'fin_data_input/{ticker}.csv'
+    df = pd.read_csv(path, parse_dates=['Date'])
+
+    return df.set_index('Date')
+
+
+def return_price_matrix(tickers: list, column: str = 'Adj Close') -> pd.DataFrame:
+    # dates x tickers, outer joined on date so late listings are nan before their first price
+    series = [return_price_df(ticker)[column].rename(ticker) for ticker in tickers]
+
+    return pd.concat(series, axis=1).sort_index()
+
+
+def return_periods_per_year(dates: pd.DatetimeIndex) -> float:
+    return 365.25 / np.median(np.diff(dates.values).astype('timedelta64[D]').astype(float))
+
+
+def return_log_returns(prices: np.ndarray) -> np.ndarray:
+    log_prices = np.log(prices)
+    log_returns = np.full_like(log_prices, np.nan)
+    log_returns[1:] = log_prices[1:] - log_prices[:-1]
+
+    return log_returns
+
+
+def return_rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    # trailing window sums along axis 0 from one cumulative sum, nan where the window is not full
+    filled = np.nan_to_num(values, nan=0.0)
+    cumsum = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(filled, axis=0)])
+    counts = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(~np.isnan(values), axis=0)])
+
+    sums = np.full(values.shape, np.nan)
+    full = (counts[window:] - counts[:-window]) == window
+    sums[window - 1:] = np.where(full, cumsum[window:] - cumsum[:-window], np.nan)
+
+    return sums
+
+
+def return_rolling_volatility(log_returns: np.ndarray, window: int) -> np.ndarray:
+    sum_x = return_rolling_sum(log_returns, window)
+    sum_xx = return_rolling_sum(log_returns ** 2, window)
+    variance = (sum_xx - sum_x ** 2 / window) / (window - 1)
+
+    return np.sqrt(np.maximum(variance, 0))
+
+
+def return_rolling_beta(log_returns: np.ndarray, index_returns: np.ndarray, window: int) -> np.ndarray:
+    # only periods where both the ticker and the index have a return count towards the window
+    index_returns = np.broadcast_to(index_returns[:, None], log_returns.shape)
+    both = ~np.isnan(log_returns) & ~np.isnan(index_returns)
+    x = np.where(both, index_returns, np.nan)
+    y = np.where(both, log_returns, np.nan)
+
+    sum_x = return_rolling_sum(x, window)
+    sum_y = return_rolling_sum(y, window)
+    sum_xy = return_rolling_sum(x * y, window)
+    sum_xx = return_rolling_sum(x ** 2, window)
+
+    covariance = sum_xy - sum_x * sum_y / window
+    variance = sum_xx - sum_x ** 2 / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(variance > 0, covariance / variance, np.nan)
+
+
+def return_peer_index_returns(log_returns: np.ndarray) -> np.ndarray:
+    # equal weighted index over the tickers priced in each period, averaged in simple return space
+    simple_returns = np.expm1(log_returns)
+    n_priced = np.sum(~np.isnan(simple_returns), axis=1)
+    mean_returns = np.nansum(simple_returns, axis=1) / np.where(n_priced > 0, n_priced, 1)
+
+    return np.where(n_priced > 0, np.log1p(mean_returns), np.nan)
+
+
+def return_drawdowns(prices: np.ndarray) -> tuple:
+    # fmax ignores nan, so the running peak starts at each ticker's first price
+    peaks = np.fmax.accumulate(prices, axis=0)
+    drawdowns = prices / peaks - 1
+    max_drawdowns = np.fmin.accumulate(drawdowns, axis=0)
+
+    return drawdowns, max_drawdowns
+
+
+def return_market_data(tickers: list, window: int = 12) -> pd.DataFrame:
+    price_matrix = return_price_matrix(tickers)
+    prices = price_matrix.to_numpy()
+    periods_per_year = return_periods_per_year(price_matrix.index)
+
+    log_returns = return_log_returns(prices)
+    index_returns = return_peer_index_returns(log_returns)
+    drawdowns, max_drawdowns = return_drawdowns(prices)
+
+    columns = {
+        'adj_close': prices,
+        'log_return': log_returns,
+        'rolling_volatility': return_rolling_volatility(log_returns, window) * np.sqrt(periods_per_year),
+        'rolling_beta': return_rolling_beta(log_returns, index_returns, window),
+        'drawdown': drawdowns,
+        'max_drawdown': max_drawdowns,
+    }
+
+    # long format: one row per date and ticker with a price
+    priced = ~np.isnan(prices)
+    date_grid = np.broadcast_to(price_matrix.index.values[:, None], prices.shape)
+    ticker_grid = np.broadcast_to(np.asarray(tickers)[None, :], prices.shape)
+
+    market_df = pd.DataFrame({'date': date_grid[priced], 'company': ticker_grid[priced]})
+    for name, values in columns.items():
+        market_df[name] = values[priced]
+
+    return market_df.sort_values(['company', 'date'], ignore_index=True, kind='stable')
@@ -0,0 +1,160 @@
+# models.memory_profile.py
+
+import contextlib
+import linecache
+import tracemalloc
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # no getrusage on windows, the rss columns stay empty there
+    resource = None
+
+PIPELINE_STAGES = ['load', 'records', 'construction', 'consolidation', 'output']
+
+SITE_COLUMNS = ['stage', 'ticker', 'parent_stage', 'site', 'code', 'size_diff_mb', 'count_diff']
+
+# the profiler in use, None unless a run opted in with enable_memory_profiling()
+PROFILER = None
+
+
+def return_peak_rss_mb() -> float:
+    if resource is None:
+        return float('nan')
+
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryProfiler:
+
+    def __init__(self, top: int = 10, n_frames: int = 1):
+        self.top: int = top
+        self.n_frames: int = n_frames
+        self.stack: list = []
+        self.stages: dict = {}
+        self.sites: dict = {}
+        # the profiler's own allocations. filtered from the per line statistics, not the snapshots, since
+        # Snapshot.filter_traces is pure python over every trace and would dominate the run
+        self.ignored_files: set = {tracemalloc.__file__, linecache.__file__, __file__, '<unknown>'}
+
+    def start(self):
+        tracemalloc.start(self.n_frames)
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def return_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, ticker: str):
+        # a nested stage resets the tracemalloc peak, so hand the parent's peak so far over to its frame first
+        if self.stack:
+            self.stack[-1]['peak'] = max(self.stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        frame = {
+            'parent': self.stack[-1]['stage'] if self.stack else None,
+            'stage': name,
+            'peak': 0,
+            'start': tracemalloc.get_traced_memory()[0],
+            'start_rss': return_peak_rss_mb(),
+            # top=0 skips the snapshots: per stage sizes only, at a fraction of the run time
+            'snapshot': self.return_snapshot() if self.top else None,
+        }
+        self.stack.append(frame)
+
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame['peak'], peak)
+            # the parent frame continues from here with this stage's peak as its own
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+
+            self.record(name, ticker, frame, current, peak)
+
+    def record(self, name: str, ticker: str, frame: dict, current: int, peak: int):
+        # repeated (stage, ticker) pairs, e.g. one output stage per year, are folded into one row
+        key = (name, ticker, frame['parent'])
+        row = self.stages.setdefault(key, {
+            'stage': name,
+            'ticker': ticker,
+            'parent_stage': frame['parent'],
+            'calls': 0,
+            'net_mb': 0.0,
+            'peak_mb': 0.0,
+            'peak_over_start_mb': 0.0,
+            'peak_rss_mb': float('nan'),
+            'rss_growth_mb': 0.0,
+        })
+        end_rss = return_peak_rss_mb()
+        row['calls'] += 1
+        row['net_mb'] += (current - frame['start']) / 2 ** 20
+        row['peak_mb'] = max(row['peak_mb'], peak / 2 ** 20)
+        row['peak_over_start_mb'] = max(row['peak_over_start_mb'], (peak - frame['start']) / 2 ** 20)
+        row['peak_rss_mb'] = end_rss
+        row['rss_growth_mb'] += end_rss - frame['start_rss']
+
+        if frame['snapshot'] is None:
+            return
+
+        stats = [
+            stat for stat in self.return_snapshot().compare_to(frame['snapshot'], 'lineno')
+            if stat.traceback[0].filename not in self.ignored_files
+            and not stat.traceback[0].filename.startswith('<frozen importlib')
+        ]
+        for stat in stats[:self.top]:
+            site = stat.traceback[0]
+            site_key = key + (f'{site.filename}:{site.lineno}',)
+            site_row = self.sites.setdefault(site_key, {
+                'stage': name,
+                'ticker': ticker,
+                'parent_stage': frame['parent'],
+                'site': site_key[-1],
+                'code': linecache.getline(site.filename, site.lineno).strip(),
+                'size_diff_mb': 0.0,
+                'count_diff': 0,
+            })
+            site_row['size_diff_mb'] += stat.size_diff / 2 ** 20
+            site_row['count_diff'] += stat.count_diff
+
+    def return_stage_df(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.stages.values()))
+
+    def return_site_df(self) -> pd.DataFrame:
+        site_df = pd.DataFrame(list(self.sites.values()), columns=SITE_COLUMNS)
+
+        # the top sites per stage and ticker, largest growth first
+        site_df = site_df.sort_values(['stage', 'ticker', 'size_diff_mb'], ascending=[True, True, False])
+
+        return site_df.groupby(['stage', 'ticker', 'parent_stage'], dropna=False, sort=False).head(self.top)
+
+
+def enable_memory_profiling(top: int = 10, n_frames: int = 1) -> MemoryProfiler:
+    global PROFILER
+    PROFILER = MemoryProfiler(top=top, n_frames=n_frames)
+    PROFILER.start()
+
+    return PROFILER
+
+
+def disable_memory_profiling():
+    global PROFILER
+    if PROFILER is not None:
+        PROFILER.stop()
+    PROFILER = None
+
+
+def profile_stage(name: str, ticker: str):
+    # a no-op unless profiling is enabled, so the pipeline can mark its stages unconditionally
+    if PROFILER is None:
+        return contextlib.nullcontext()
+
+    return PROFILER.stage(name, ticker)
@@ -0,0 +1,93 @@
+# models.output_panels.py
+
+import csv
+import itertools
+import math
+import os
+
+OUTPUT_FILES = {
+    'income': 'fin_data_output/is_data.csv',
+    'balance': 'fin_data_output/bs_data.csv',
+    'ratios': 'fin_data_output/ratio_data.csv',
+}
+
+INT_COLUMNS = ['quarter', 'year']
+FLOAT_COLUMNS = ['amount', 'value']
+
+
+def return_output_rows(path: str) -> list:
+
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+
+    for row in rows:
+        for column in INT_COLUMNS:
+            if column in row:
+                row[column] = int(row[column])
+        for column in FLOAT_COLUMNS:
+            if column in row:
+                value = float(row[column]) if row[column] != '' else None
+                # json has no nan or inf
+                if value is not None and not math.isfinite(value):
+                    value = None
+                row[column] = value
+
+    return rows
+
+
+def return_output_mtimes(paths: dict) -> dict:
+    return {name: os.stat(path).st_mtime_ns for name, path in paths.items()}
+
+
+def return_ratio_code(ratio: str) -> str:
+    # '2.1 - Current Ratio' -> '2.1', '2.3- Cash Ratio' -> '2.3'
+    return ratio.split('-')[0].strip()
+
+
+class OutputPanels:
+
+    def __init__(self, paths: dict = None):
+        self.paths: dict = paths or OUTPUT_FILES
+        self.mtimes: dict = return_output_mtimes(self.paths)
+        self.panels: dict = {name: return_output_rows(path) for name, path in self.paths.items()}
+
+        # rows grouped by company, the key every endpoint filters on first
+        self.company_index: dict = {}
+        for name, rows in self.panels.items():
+            index = {}
+            for row in rows:
+                index.setdefault(row['company'], []).append(row)
+            self.company_index[name] = index
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {", ".join(f"{k}={len(v)}" for k, v in self.panels.items())}'
+
+    def is_stale(self) -> bool:
+        try:
+            return return_output_mtimes(self.paths) != self.mtimes
+        except FileNotFoundError:
+            # the outputs are replaced by a rename and are never missing mid render, only when removed. keep serving
+            # the loaded panels until they are rendered again
+            return False
+
+    def return_companies(self) -> list:
+        return sorted(set(itertools.chain(*[index.keys() for index in self.company_index.values()])))
+
+    def return_rows(self, panel: str, company: str = None, year: int = None, quarter: int = None,
+                    account: str = None, ratio: str = None) -> list:
+
+        if company is not None:
+            rows = self.company_index[panel].get(company, [])
+        else:
+            rows = self.panels[panel]
+
+        if year is not None:
+            rows = [row for row in rows if row['year'] == year]
+        if quarter is not None:
+            rows = [row for row in rows if row['quarter'] == quarter]
+        if account is not None:
+            rows = [row for row in rows if account in (row['account'], return_ratio_code(row['account']))]
+        if ratio is not None:
+            rows = [row for row in rows if ratio in (row['ratio'], return_ratio_code(row['ratio']))]
+
+        return rows
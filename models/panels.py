@@ -0,0 +1,36 @@
+# models.panels.py
+
+import pandas as pd
+
+STATEMENT_KEY_COLUMNS = {'ticker': 'company', 'statement_date': 'statementDate'}
+
+
+def return_ratio_panel(companies: list) -> pd.DataFrame:
+    # one wide row per company and fiscal year, one column per ratio attribute
+    rows = [
+        company.statement_groups[year].return_ratio_dict()
+        for company in companies
+        for year in company.statement_groups
+    ]
+
+    return pd.DataFrame(rows)
+
+
+def return_statement_panel(statements: list) -> pd.DataFrame:
+    # one wide row per statement object, one column per statement attribute
+    df = pd.DataFrame([vars(statement) for statement in statements])
+
+    return df.rename(columns=STATEMENT_KEY_COLUMNS)
+
+
+def return_quarterly_is_panel(companies: list) -> pd.DataFrame:
+    return return_statement_panel([stmt for company in companies for stmt in company.income_statements])
+
+
+def return_quarterly_bs_panel(companies: list) -> pd.DataFrame:
+    return return_statement_panel([stmt for company in companies for stmt in company.balance_sheets])
+
+
+def return_quarterly_cf_panel(companies: list) -> pd.DataFrame:
+    return return_statement_panel([stmt for company in companies for stmt in company.cashflow_statements])
+
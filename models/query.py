@@ -0,0 +1,273 @@
+# models.query.py
+
+import csv
+import math
+import operator
+
+import pandas as pd
+
+from models.company import Company
+from models.consolidated_statement import RATIOS
+from models.income_statement import return_quarterly_is_df
+from models.income_statement import convert_is_df_to_records_dict
+from models.income_statement import IncomeStatement
+from models.balance_sheet import return_quarterly_bs_df
+from models.balance_sheet import convert_bs_df_to_records_dict
+from models.balance_sheet import BalanceSheet
+from models.cashflow_statement import return_quarterly_cf_df
+from models.cashflow_statement import convert_cf_df_to_records_dict
+from models.cashflow_statement import CashFlowStatement
+from models.manifest import return_input_files
+from models.screener import return_conditions
+from models.utilities import return_adjusted_quarters_and_years
+from settings import COMPANIES_LIST
+
+RATIO_NAMES = [attribute for attribute, _, _ in RATIOS]
+
+# quarterly statement attributes, by the statement kind that holds them
+STATEMENT_ITEMS = {
+    'is': [
+        'revenue', 'cogs', 'gross_profit', 'selling_general_and_admin', 'research_and_development',
+        'operating_expenses', 'operating_income', 'net_interest_exp', 'net_other_exp', 'pretax_income', 'taxes',
+        'net_income', 'tax_rate', 'nopat', 'interest_exp', 'ebit', 'dep_and_amort', 'ebitda', 'ps_div', 'eps_diluted'
+    ],
+    'bs': [
+        'current_assets', 'cash_and_equivalents', 'short_term_investments', 'accounts_receivable', 'inventory',
+        'other_current_assets', 'non_current_assets', 'net_ppe', 'gross_ppe', 'goodwill', 'other_intangibles',
+        'other_non_current_assets', 'total_assets', 'current_liabilities', 'accounts_payable', 'accrued_liabilities',
+        'other_current_liabilities', 'non_current_liabilities', 'long_term_debt', 'other_long_term_liabilities',
+        'total_debt', 'total_liabilities', 'stockholders_equity', 'minority_interest', 'total_equity',
+        'retained_earnings', 'n_common_shares_os', 'total_liabilities_and_equity'
+    ],
+    'cf': ['capex'],
+}
+ITEM_KINDS = {item: kind for kind, items in STATEMENT_ITEMS.items() for item in items}
+
+STATEMENT_KINDS = {
+    'is': (return_quarterly_is_df, convert_is_df_to_records_dict, IncomeStatement),
+    'bs': (return_quarterly_bs_df, convert_bs_df_to_records_dict, BalanceSheet),
+    'cf': (return_quarterly_cf_df, convert_cf_df_to_records_dict, CashFlowStatement),
+}
+# a ratio comes from a consolidated statement, built from all three statements and the close price
+RATIO_KINDS = ['is', 'bs', 'cf', 'price']
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+
+def return_year_bounds(conditions: list) -> tuple:
+    # (first year, last year) allowed by the year conditions, None where a side is open
+    first_year, last_year = -math.inf, math.inf
+
+    for _, operator_name, value in conditions:
+        if operator_name in ('>', '>=', '=='):
+            first_year = max(first_year, math.floor(value) + 1 if operator_name == '>' else math.ceil(value))
+        if operator_name in ('<', '<=', '=='):
+            last_year = min(last_year, math.ceil(value) - 1 if operator_name == '<' else math.floor(value))
+
+    return (None if first_year == -math.inf else first_year), (None if last_year == math.inf else last_year)
+
+
+def return_statement_dates(path: str, quarter_offset: int, first_year: int = None, last_year: int = None) -> list:
+    # the statement date columns of a quarterly file whose fiscal year is in range, from its header line only.
+    # None when the range is open, so the loader reads every column
+    if first_year is None and last_year is None:
+        return None
+
+    with open(path, newline='') as file:
+        columns = pd.Index(next(csv.reader(file))).drop(['name', 'ttm'], errors='ignore')
+    stmt_dates = pd.Series(pd.to_datetime(columns, format='%m/%d/%Y'))
+    _, years = return_adjusted_quarters_and_years(stmt_dates, quarter_offset)
+    keep = years.between(-math.inf if first_year is None else first_year, math.inf if last_year is None else last_year)
+
+    return list(columns[keep.to_numpy()])
+
+
+class Dataset:
+
+    def __init__(self, companies_list: list = None, tickers: list = None, conditions: list = None,
+                 ratios: list = None, items: list = None):
+        # a lazy query: filter() and select() only return a new dataset with a longer plan, collect() runs it
+        self.companies_list: list = companies_list or COMPANIES_LIST
+        self.tickers: list = tickers
+        self.conditions: list = conditions or []
+        self.ratios: list = ratios
+        self.items: list = items
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {self.explain()}'
+
+    def return_copy(self, **changes):
+        attributes = {
+            'companies_list': self.companies_list,
+            'tickers': self.tickers,
+            'conditions': self.conditions,
+            'ratios': self.ratios,
+            'items': self.items,
+        }
+        attributes.update(changes)
+
+        return self.__class__(**attributes)
+
+    def filter(self, *conditions, ticker=None):
+        # conditions: expressions such as 'year >= 2015' or (column, operator, value). ticker: one or a list
+        parsed = []
+        for condition in conditions:
+            parsed += return_conditions(condition) if isinstance(condition, str) else [tuple(condition)]
+        for column, operator_name, _ in parsed:
+            if operator_name not in OPERATORS:
+                raise ValueError(f'unknown operator {operator_name}')
+
+        tickers = self.tickers
+        if ticker is not None:
+            requested = [ticker] if isinstance(ticker, str) else list(ticker)
+            known = [company['ticker'] for company in self.companies_list]
+            unknown = [name for name in requested if name not in known]
+            if unknown:
+                raise KeyError(f'unknown tickers {unknown}')
+            tickers = requested if tickers is None else [name for name in tickers if name in requested]
+
+        return self.return_copy(tickers=tickers, conditions=self.conditions + parsed)
+
+    def select(self, ratios: list = None, items: list = None):
+        # ratios: RATIOS attribute names, one row per company and fiscal year. items: statement attributes, one row
+        # per company and quarter
+        if ratios is not None and items is not None:
+            raise ValueError('select either ratios (annual) or statement items (quarterly), not both')
+        for ratio in ratios or []:
+            if ratio not in RATIO_NAMES:
+                raise KeyError(f'unknown ratio {ratio}')
+        for item in items or []:
+            if item not in ITEM_KINDS:
+                raise KeyError(f'unknown statement item {item}')
+
+        return self.return_copy(ratios=list(ratios) if ratios is not None else None,
+                                items=list(items) if items is not None else None)
+
+    def return_columns(self) -> list:
+        # the selected columns and the ones a residual condition reads, in selection order
+        selected = self.items if self.items is not None else self.ratios
+        if selected is None:
+            selected = list(RATIO_NAMES)
+        residual = [column for column, _, _ in self.conditions if column != 'year']
+
+        return list(dict.fromkeys(selected + residual))
+
+    def return_plan(self) -> dict:
+        # the predicates pushed into the loaders: which companies (file selection), which statement kinds (file
+        # selection), which statement date columns of each file (column projection). the line items read per kind
+        # are the statement model's FIELDS (row projection), and conditions on other columns stay residual
+        columns = self.return_columns()
+        year_conditions = [condition for condition in self.conditions if condition[0] == 'year']
+        first_year, last_year = return_year_bounds(year_conditions)
+
+        if self.items is not None:
+            for column in columns:
+                if column not in ITEM_KINDS:
+                    raise KeyError(f'{column} is not a statement item, select it or filter on items only')
+            kinds = [kind for kind in STATEMENT_KINDS if any(ITEM_KINDS[column] == kind for column in columns)]
+            # a quarter belongs to the fiscal year it is reported in
+            year_ranges = {kind: (first_year, last_year) for kind in kinds}
+        else:
+            for column in columns:
+                if column not in RATIO_NAMES:
+                    raise KeyError(f'{column} is not a ratio, select it or filter on ratios only')
+            kinds = RATIO_KINDS
+            # the ratios of a year also read the prior year end balance sheet
+            prior_year = None if first_year is None else first_year - 1
+            year_ranges = {'is': (first_year, last_year), 'bs': (prior_year, last_year), 'cf': (first_year, last_year)}
+
+        companies = []
+        files = {}
+        for company in self.companies_list:
+            if self.tickers is not None and company['ticker'] not in self.tickers:
+                continue
+            dates = {
+                kind: return_statement_dates(return_input_files([company['ticker']], [kind])[0],
+                                             company['quarter_offset'], *year_ranges[kind])
+                for kind in kinds if kind in STATEMENT_KINDS
+            }
+            # a file without a quarter in range is not read. ratios need every statement kind, items any one
+            empty = [kind for kind, kind_dates in dates.items() if kind_dates == []]
+            if self.items is None and empty:
+                continue
+            dates = {kind: kind_dates for kind, kind_dates in dates.items() if kind not in empty}
+            if dates:
+                companies.append(company)
+                files[company['ticker']] = dates
+
+        return {
+            'companies': companies,
+            'kinds': kinds,
+            'years': (first_year, last_year),
+            'columns': columns,
+            'residual': [condition for condition in self.conditions if condition[0] != 'year'],
+            'files': files,
+        }
+
+    def explain(self) -> str:
+        plan = self.return_plan()
+        n_files = sum(len(dates) for dates in plan['files'].values())
+        n_columns = sum(len(dates) for kinds in plan['files'].values() for dates in kinds.values() if dates is not None)
+        every = any(dates is None for kinds in plan['files'].values() for dates in kinds.values())
+
+        return (
+            f'{len(plan["companies"])} companies, kinds {plan["kinds"]}, years {plan["years"]}, '
+            f'{n_files} statement files, {"every" if every else n_columns} statement date columns, '
+            f'columns {plan["columns"]}, residual {plan["residual"]}'
+        )
+
+    def collect(self) -> pd.DataFrame:
+        plan = self.return_plan()
+
+        if self.items is not None:
+            frames = [self.return_item_frame(company, plan) for company in plan['companies']]
+            keys = ['company', 'statementDate', 'quarter', 'year']
+        else:
+            frames = [self.return_ratio_frame(company, plan) for company in plan['companies']]
+            keys = ['company', 'year', 'statementDate']
+
+        frames = [frame for frame in frames if len(frame)]
+        result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=keys + plan['columns'])
+        result = result[keys + plan['columns']]
+
+        # the projection reads whole fiscal years, the year bounds are applied exactly here with the residual
+        first_year, last_year = plan['years']
+        mask = pd.Series(True, index=result.index)
+        if first_year is not None:
+            mask &= result['year'] >= first_year
+        if last_year is not None:
+            mask &= result['year'] <= last_year
+        for column, operator_name, value in plan['residual']:
+            mask &= OPERATORS[operator_name](pd.to_numeric(result[column], errors='coerce'), value)
+
+        return result[mask].reset_index(drop=True)
+
+    @staticmethod
+    def return_ratio_frame(company: dict, plan: dict) -> pd.DataFrame:
+        dates = plan['files'][company['ticker']]
+        statement_groups = Company(company['ticker'], company['quarter_offset'], dates=dates).statement_groups
+
+        return pd.DataFrame([statement_groups[year].return_ratio_dict() for year in statement_groups])
+
+    @staticmethod
+    def return_item_frame(company: dict, plan: dict) -> pd.DataFrame:
+        # only the statement kinds holding a selected item are loaded, joined on the statement keys
+        keys = ['company', 'statementDate', 'quarter', 'year']
+        frame = None
+
+        for kind, dates in plan['files'][company['ticker']].items():
+            loader, convert, statement_class = STATEMENT_KINDS[kind]
+            df = loader(company['ticker'], statement_class.FIELDS, statement_class.OPTIONAL_FIELDS, dates=dates)
+            statements = [
+                statement_class(ticker=company['ticker'], quarter_offset=company['quarter_offset'], **record)
+                for record in convert(df)
+            ]
+            columns = [column for column in plan['columns'] if ITEM_KINDS[column] == kind]
+            kind_frame = pd.DataFrame(
+                [[company['ticker'], statement.statement_date, statement.quarter, statement.year] +
+                 [getattr(statement, column) for column in columns] for statement in statements],
+                columns=keys + columns
+            )
+            frame = kind_frame if frame is None else frame.merge(kind_frame, on=keys, how='outer')
+
+        return frame if frame is not None else pd.DataFrame(columns=keys)
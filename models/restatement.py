@@ -0,0 +1,355 @@
+# models.restatement.py
+
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.company import Company
+from models.cubes import write_detail_cells
+from models.cubes import IS_CUBE_KEYS
+from models.cubes import BS_CUBE_KEYS
+from models.cubes import RATIO_CUBE_KEYS
+from models.dependency_graph import return_dependent_accounts
+from models.dependency_graph import return_dependent_ratios
+from models.dependency_graph import FIELD_KINDS
+from models.dependency_graph import STATEMENT_ACCOUNTS
+from models.consolidated_statement import RATIOS
+from models.income_statement import return_is_account_panel
+from models.balance_sheet import return_bs_account_panel
+from models.manifest import return_input_files
+from models.query import return_statement_dates
+from models.query import STATEMENT_KINDS
+from models.sqlite_store import return_connection
+from models.sqlite_store import upsert_statement_data
+from models.sqlite_store import upsert_ratio_data
+from models.utilities import return_adjusted_quarters_and_years
+from models.utilities import return_long_format_df
+from models.utilities import FRACTIONAL_FIELDS
+from models.utilities import RAW_CELL
+from settings import COMPANIES_LIST
+from settings import SQLITE_PATH
+
+CHANGE_COLUMNS = ['company', 'statementDate', 'field', 'value']
+
+# the patched outputs: detail path, cube path, row keys, cube keys, value column
+OUTPUT_CELLS = {
+    'ratio': ('fin_data_output/ratio_data.csv', 'fin_data_output/ratio_cube.csv',
+              ['company', 'year', 'ratio_type', 'ratio'], RATIO_CUBE_KEYS, 'value'),
+    'is': ('fin_data_output/is_data.csv', 'fin_data_output/is_cube.csv',
+           ['company', 'statementDate', 'accountClassification', 'account'], IS_CUBE_KEYS, 'amount'),
+    'bs': ('fin_data_output/bs_data.csv', 'fin_data_output/bs_cube.csv',
+           ['company', 'statementDate', 'accountClassification', 'account'], BS_CUBE_KEYS, 'amount'),
+}
+
+# output position of each ratio, the plan holds them as sets
+RATIO_ORDER = {ratio: i for i, ratio in enumerate(RATIOS)}
+
+
+def return_change_set(change_df: pd.DataFrame, companies_list: list = None) -> pd.DataFrame:
+    # change_df: one restated value per row, CHANGE_COLUMNS. values are in the units of the statement files, an empty
+    # value clears the cell. a cell changed twice keeps its last value
+    companies_list = companies_list or COMPANIES_LIST
+    missing = [column for column in CHANGE_COLUMNS if column not in change_df.columns]
+    if missing:
+        raise KeyError(f'the change set has no {missing} columns')
+
+    quarter_offsets = {company['ticker']: company['quarter_offset'] for company in companies_list}
+    unknown = sorted(set(change_df['company']) - set(quarter_offsets))
+    if unknown:
+        raise KeyError(f'unknown tickers {unknown}')
+    unknown = sorted(set(change_df['field']) - set(FIELD_KINDS))
+    if unknown:
+        raise KeyError(f'{unknown} are not line items the statement models read')
+
+    changes = change_df[CHANGE_COLUMNS].copy()
+    # statement dates as the outputs (2020-12-31) or the statement files (12/31/2020) write them
+    changes['statementDate'] = pd.to_datetime(changes['statementDate'], format='mixed')
+    changes['value'] = pd.to_numeric(changes['value'])
+    changes = changes.drop_duplicates(['company', 'statementDate', 'field'], keep='last').reset_index(drop=True)
+
+    changes['kind'] = changes['field'].map(FIELD_KINDS)
+    changes['column'] = changes['statementDate'].dt.strftime('%m/%d/%Y')
+    offsets = changes['company'].map(quarter_offsets)
+    changes['quarter'] = 0
+    changes['year'] = 0
+    for quarter_offset in offsets.unique():
+        rows = offsets == quarter_offset
+        quarters, years = return_adjusted_quarters_and_years(changes.loc[rows, 'statementDate'], quarter_offset)
+        changes.loc[rows, 'quarter'] = quarters.to_numpy()
+        changes.loc[rows, 'year'] = years.to_numpy()
+
+    return changes
+
+
+def return_header(path: str) -> list:
+    with open(path, newline='') as file:
+        return next(csv.reader(file))
+
+
+def return_year_end_columns(path: str, quarter_offset: int) -> dict:
+    # fiscal year -> the statement date column of its year end balance sheet, the first q4 column in file order as in
+    # Company.year_end_balance_sheets
+    columns = pd.Index(return_header(path)).drop(['name', 'ttm'], errors='ignore')
+    quarters, years = return_adjusted_quarters_and_years(pd.Series(pd.to_datetime(columns, format='%m/%d/%Y')),
+                                                         quarter_offset)
+    year_end_columns = {}
+    for column, quarter, year in zip(columns, quarters, years):
+        if quarter == 4 and year not in year_end_columns:
+            year_end_columns[year] = column
+
+    return year_end_columns
+
+
+def return_input_cell(field: str, value: float) -> str:
+    # a restated value written the way the statement files write theirs: quoted, thousands separated, blank if empty
+    if pd.isna(value):
+        return ''
+    if field in FRACTIONAL_FIELDS:
+        return f'"{float(value)}"'
+    if value != int(value):
+        raise ValueError(f'{field} holds whole units, {value} is fractional')
+
+    return f'"{int(value):,}"'
+
+
+def write_input_changes(path: str, changes: pd.DataFrame) -> str:
+    # rewrite only the changed cells of a quarterly statement file, every other byte stays as it was. returns the
+    # original text, to restore it if the restatement fails
+    with open(path, newline='') as file:
+        text = file.read()
+    lines = text.split('\n')
+    header = RAW_CELL.findall(lines[0])
+    positions = {column: i for i, column in enumerate(header)}
+    rows = {line.split(',', 1)[0].replace('\t', ''): i for i, line in enumerate(lines[1:], start=1)}
+
+    for field, field_changes in changes.groupby('field', sort=False):
+        missing = sorted(set(field_changes['column']) - set(positions))
+        if missing:
+            raise KeyError(f'{path} has no statement date columns {missing}')
+        # an optional line item the file does not report yet gets its own line
+        if field not in rows:
+            rows[field] = len(lines)
+            lines.append(field + ',' * (len(header) - 1))
+
+        cells = RAW_CELL.findall(lines[rows[field]])
+        for column, value in zip(field_changes['column'], field_changes['value']):
+            cells[positions[column]] = return_input_cell(field, value)
+        lines[rows[field]] = ','.join(cells)
+
+    with open(path, 'w', newline='') as file:
+        file.write('\n'.join(lines))
+
+    return text
+
+
+class Restatement:
+
+    def __init__(self, change_df: pd.DataFrame, companies_list: list = None):
+        # change_df: (company, statementDate, field, value) rows, see return_change_set
+        self.companies_list: list = companies_list or COMPANIES_LIST
+        self.changes: pd.DataFrame = return_change_set(change_df, self.companies_list)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {self.explain()}'
+
+    def return_plan(self) -> dict:
+        # per ticker, the cells the changed line items reach through the dependency graph:
+        # 'ratios': fiscal year -> RATIOS rows. an is or cf quarter feeds the ratios of its fiscal year, a year end
+        #     balance sheet those of its year (balance_sheet) and of the next (prior_balance_sheet)
+        # 'accounts': kind -> statement date column -> ACCOUNTS rows. bs_data only holds q4 balance sheets
+        # 'columns': kind -> the changed statement date columns, each is reloaded to recompute and check it
+        plan = {}
+        quarter_offsets = {company['ticker']: company['quarter_offset'] for company in self.companies_list}
+
+        for ticker, ticker_changes in self.changes.groupby('company', sort=False):
+            ratios = {}
+            accounts = {}
+            year_end_columns = None
+
+            for (kind, column, quarter, year), fields in ticker_changes.groupby(['kind', 'column', 'quarter', 'year'],
+                                                                                 sort=False)['field']:
+                fields = list(fields)
+                if kind == 'bs':
+                    if year_end_columns is None:
+                        year_end_columns = return_year_end_columns(return_input_files([ticker], ['bs'])[0],
+                                                                   quarter_offsets[ticker])
+                    roles = [('balance_sheet', year), ('prior_balance_sheet', year + 1)] \
+                        if year_end_columns.get(year) == column else []
+                else:
+                    roles = [('income_statement' if kind == 'is' else 'cashflow_statement', year)]
+
+                for role, ratio_year in roles:
+                    ratios.setdefault(int(ratio_year), set()).update(return_dependent_ratios(role, fields))
+                if kind != 'bs' or quarter == 4:
+                    kind_accounts = return_dependent_accounts(kind, fields)
+                    if kind_accounts:
+                        accounts.setdefault(kind, {}).setdefault(column, set()).update(kind_accounts)
+
+            plan[ticker] = {
+                'quarter_offset': quarter_offsets[ticker],
+                'ratios': {year: year_ratios for year, year_ratios in sorted(ratios.items()) if year_ratios},
+                'accounts': accounts,
+                'columns': {kind: list(kind_changes['column'].unique())
+                            for kind, kind_changes in ticker_changes.groupby('kind', sort=False)},
+            }
+
+        return plan
+
+    def explain(self) -> str:
+        plan = self.return_plan()
+        n_ratios = sum(len(ratios) for ticker_plan in plan.values() for ratios in ticker_plan['ratios'].values())
+        n_accounts = sum(len(accounts) for ticker_plan in plan.values()
+                         for kind_accounts in ticker_plan['accounts'].values() for accounts in kind_accounts.values())
+
+        return f'{len(self.changes)} changed line items of {len(plan)} companies, {n_ratios} ratio cells, ' \
+               f'{n_accounts} account cells'
+
+    def apply(self, sqlite_path: str = SQLITE_PATH) -> dict:
+        # write the changes into the input files, recompute the affected cells from them and patch the outputs that
+        # exist. the inputs are restored when a recomputation fails, e.g. on a balance sheet that no longer balances
+        plan = self.return_plan()
+
+        originals = {}
+        try:
+            for (ticker, kind), changes in self.changes.groupby(['company', 'kind'], sort=False):
+                path = return_input_files([ticker], [kind])[0]
+                originals[path] = write_input_changes(path, changes)
+            cells = self.return_cells(plan)
+        except Exception:
+            for path, text in originals.items():
+                with open(path, 'w', newline='') as file:
+                    file.write(text)
+            raise
+
+        for name, cells_df in cells.items():
+            detail_path, cube_path, row_keys, cube_keys, value_column = OUTPUT_CELLS[name]
+            if len(cells_df) and os.path.exists(detail_path):
+                write_detail_cells(cells_df, detail_path, cube_path, row_keys, cube_keys, value_column,
+                                   date_columns=['statementDate'] if 'statementDate' in row_keys else None)
+
+        if sqlite_path and os.path.exists(sqlite_path):
+            conn = return_connection(sqlite_path)
+            upsert_ratio_data(conn, cells['ratio'].to_dict(orient='records'))
+            upsert_statement_data(conn, 'is_data', cells['is'].to_dict(orient='records'))
+            upsert_statement_data(conn, 'bs_data', cells['bs'].to_dict(orient='records'))
+            conn.close()
+
+        return cells
+
+    def return_cells(self, plan: dict) -> dict:
+        # output name -> the recomputed cells, in the columns of its detail output
+        ratio_frames = []
+        account_frames = {'is': [], 'bs': []}
+
+        for ticker, ticker_plan in plan.items():
+            ratio_frames.append(self.return_ratio_cells(ticker, ticker_plan))
+            for kind in account_frames:
+                if kind in ticker_plan['columns']:
+                    account_frames[kind].append(self.return_account_cells(ticker, ticker_plan, kind))
+
+        ratio_columns = ['company', 'year', 'ratio_type', 'ratio', 'value']
+        account_columns = ['company', 'statementDate', 'quarter', 'year', 'accountClassification', 'account', 'amount']
+
+        return {
+            'ratio': pd.concat(ratio_frames, ignore_index=True) if ratio_frames else
+            pd.DataFrame(columns=ratio_columns),
+            **{
+                kind: pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=account_columns)
+                for kind, frames in account_frames.items()
+            },
+        }
+
+    @staticmethod
+    def return_ratio_cells(ticker: str, ticker_plan: dict) -> pd.DataFrame:
+        # the consolidated statements of the affected years only, from a Company projected to those fiscal years and
+        # the prior year end balance sheet
+        columns = ['company', 'year', 'ratio_type', 'ratio', 'value']
+        if not ticker_plan['ratios']:
+            return pd.DataFrame(columns=columns)
+
+        first_year, last_year = min(ticker_plan['ratios']), max(ticker_plan['ratios'])
+        year_ranges = {'is': (first_year, last_year), 'bs': (first_year - 1, last_year), 'cf': (first_year, last_year)}
+        dates = {
+            kind: return_statement_dates(return_input_files([ticker], [kind])[0], ticker_plan['quarter_offset'],
+                                         *year_range)
+            for kind, year_range in year_ranges.items()
+        }
+        if any(kind_dates == [] for kind_dates in dates.values()):
+            return pd.DataFrame(columns=columns)
+
+        statement_groups = Company(ticker, ticker_plan['quarter_offset'], dates=dates).statement_groups
+        rows = [
+            [ticker, year, ratio_type, ratio, getattr(statement_groups[year], attribute)]
+            for year, ratios in ticker_plan['ratios'].items() if year in statement_groups
+            for attribute, ratio_type, ratio in sorted(ratios, key=RATIO_ORDER.get)
+        ]
+
+        return pd.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def return_account_cells(ticker: str, ticker_plan: dict, kind: str) -> pd.DataFrame:
+        # every changed statement date of the kind is reloaded, so a balance sheet change is always checked for
+        # A = L + E, then only the affected accounts are kept
+        loader, _, statement_class = STATEMENT_KINDS[kind]
+        df = loader(ticker, statement_class.FIELDS, statement_class.OPTIONAL_FIELDS,
+                    dates=ticker_plan['columns'][kind])
+        panel = return_bs_account_panel(df, ticker) if kind == 'bs' else return_is_account_panel(df)
+
+        kind_accounts = ticker_plan['accounts'].get(kind, {})
+        accounts = [
+            account for account in STATEMENT_ACCOUNTS[kind]
+            if any(account in column_accounts for column_accounts in kind_accounts.values())
+        ]
+        cells_df = return_long_format_df(panel, df.columns, accounts, ticker, ticker_plan['quarter_offset'],
+                                         quarters=[4] if kind == 'bs' else None)
+
+        affected = pd.MultiIndex.from_tuples(
+            [(pd.Timestamp(column), account[2]) for column, column_accounts in kind_accounts.items()
+             for account in column_accounts],
+            names=['statementDate', 'account']
+        )
+
+        return cells_df[pd.MultiIndex.from_frame(cells_df[['statementDate', 'account']]).isin(affected)]
+
+
+def return_rebuilt_outputs(tickers: list, companies_list: list = None) -> dict:
+    # output name -> the rows a full render writes for the tickers, from the current input files
+    companies_list = companies_list or COMPANIES_LIST
+    companies = [Company(**company) for company in companies_list if company['ticker'] in tickers]
+
+    return {
+        'ratio': pd.DataFrame([
+            row for company in companies for year in company.statement_groups
+            for row in company.statement_groups[year].return_data_list()
+        ]),
+        'is': pd.concat([company.return_is_data_df() for company in companies], ignore_index=True),
+        'bs': pd.concat([company.return_bs_data_df() for company in companies], ignore_index=True),
+    }
+
+
+def return_restatement_mismatches(tickers: list, companies_list: list = None, names: list = None) -> pd.DataFrame:
+    # rebuild the tickers in full and compare every one of their rows in the patched outputs, so a cell the graph
+    # missed shows up as well as a wrong patched one. names: only these outputs, e.g. the ones that were rendered
+    # from the inputs before the restatement
+    frames = []
+    for name, rebuilt_df in return_rebuilt_outputs(tickers, companies_list).items():
+        detail_path, _, row_keys, _, value_column = OUTPUT_CELLS[name]
+        if not os.path.exists(detail_path) or (names is not None and name not in names):
+            continue
+        detail_df = pd.read_csv(detail_path, parse_dates=['statementDate'] if 'statementDate' in row_keys else [],
+                                float_precision='round_trip')
+        merged = rebuilt_df[row_keys + [value_column]].merge(
+            detail_df.loc[detail_df['company'].isin(tickers), row_keys + [value_column]],
+            on=row_keys, how='outer', suffixes=('_rebuilt', '_output')
+        )
+        rebuilt_values = merged[f'{value_column}_rebuilt'].to_numpy(dtype=float)
+        output_values = merged[f'{value_column}_output'].to_numpy(dtype=float)
+        equal = (rebuilt_values == output_values) | (np.isnan(rebuilt_values) & np.isnan(output_values))
+        mismatches = merged[~equal].rename(columns={f'{value_column}_rebuilt': 'rebuilt',
+                                                    f'{value_column}_output': 'output'})
+        mismatches.insert(0, 'output_name', name)
+        frames.append(mismatches)
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
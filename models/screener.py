@@ -0,0 +1,134 @@
+# models.screener.py
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from models.consolidated_statement import RATIOS
+
+RATIO_ATTRIBUTES = {label: attribute for attribute, _, label in RATIOS}
+KEY_COLUMNS = ['company', 'year']
+
+# longest operators first so '>=' is not read as '>'
+CONDITION_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|==|>|<|=)\s*(\S+)\s*$')
+AND_PATTERN = re.compile(r'\s+and\s+', flags=re.IGNORECASE)
+
+
+def return_wide_ratio_panel(path: str = 'fin_data_output/ratio_data.csv') -> pd.DataFrame:
+    # ratio_data.csv pivoted to one row per company and year, one column per ratio attribute as named in RATIOS
+    df = pd.read_csv(path, float_precision='round_trip')
+    df['attribute'] = df['ratio'].map(RATIO_ATTRIBUTES)
+
+    panel = df.pivot(index=KEY_COLUMNS, columns='attribute', values='value')
+    panel = panel[[attribute for attribute, _, _ in RATIOS if attribute in panel.columns]]
+    panel.columns.name = None
+
+    return panel.reset_index()
+
+
+def return_conditions(expression: str) -> list:
+    # 'current_ratio > 1.5 AND ev_to_ebitda < 12' -> [('current_ratio', '>', 1.5), ('ev_to_ebitda', '<', 12.0)]
+    conditions = []
+
+    for clause in AND_PATTERN.split(expression.strip()):
+        match = CONDITION_PATTERN.match(clause)
+        if match is None:
+            raise ValueError(f'cannot parse condition {clause!r}, expected e.g. current_ratio > 1.5')
+        column, operator, value = match.groups()
+        conditions.append((column, '==' if operator == '=' else operator, float(value)))
+
+    return conditions
+
+
+class RatioScreener:
+
+    def __init__(self, panel: pd.DataFrame):
+        self.panel: pd.DataFrame = panel.reset_index(drop=True)
+        self.n_rows: int = len(self.panel)
+        self.latest_year: int = int(self.panel['year'].max()) if self.n_rows else None
+
+        # per column: row positions sorted by value and the sorted values. nan rows are left out, so they never
+        # pass a range predicate
+        self.sorted_positions: dict = {}
+        self.sorted_values: dict = {}
+        for column in self.panel.columns.drop('company'):
+            values = self.panel[column].to_numpy(dtype=float)
+            positions = np.flatnonzero(~np.isnan(values))
+            positions = positions[np.argsort(values[positions], kind='stable')]
+            self.sorted_positions[column] = positions
+            self.sorted_values[column] = values[positions]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {self.n_rows} rows, {len(self.sorted_positions) - 1} ratios'
+
+    def return_positions(self, column: str, operator: str, value: float) -> np.ndarray:
+        if column not in self.sorted_positions:
+            raise KeyError(f'unknown ratio {column}')
+
+        values = self.sorted_values[column]
+        positions = self.sorted_positions[column]
+
+        # a range predicate is a slice of the sorted index
+        if operator == '>':
+            return positions[np.searchsorted(values, value, side='right'):]
+        if operator == '>=':
+            return positions[np.searchsorted(values, value, side='left'):]
+        if operator == '<':
+            return positions[:np.searchsorted(values, value, side='left')]
+        if operator == '<=':
+            return positions[:np.searchsorted(values, value, side='right')]
+        if operator == '==':
+            return positions[np.searchsorted(values, value, side='left'):np.searchsorted(values, value, side='right')]
+
+        raise ValueError(f'unknown operator {operator}')
+
+    def return_mask(self, conditions: list) -> np.ndarray:
+        # one bitmap per condition, intersected
+        mask = np.ones(self.n_rows, dtype=bool)
+
+        for column, operator, value in conditions:
+            condition_mask = np.zeros(self.n_rows, dtype=bool)
+            condition_mask[self.return_positions(column, operator, value)] = True
+            mask &= condition_mask
+
+        return mask
+
+    def screen(self, conditions, year='latest', order_by: str = None, descending: bool = True, top: int = None,
+               all_columns: bool = False) -> pd.DataFrame:
+        # conditions: an expression string or a list of (ratio, operator, value). year: 'latest', a year or None
+        # for every year
+        if isinstance(conditions, str):
+            conditions = return_conditions(conditions)
+        conditions = list(conditions)
+
+        if year == 'latest':
+            year = self.latest_year
+        if year is not None:
+            conditions.append(('year', '==', year))
+
+        mask = self.return_mask(conditions)
+
+        if order_by is not None:
+            if order_by not in self.sorted_positions:
+                raise KeyError(f'unknown ratio {order_by}')
+            # walk the sorted index and keep the rows that passed, so top-N needs no sort. nan rows come last
+            positions = self.sorted_positions[order_by]
+            positions = positions[::-1] if descending else positions
+            hits = positions[mask[positions]]
+            mask[hits] = False
+            hits = np.concatenate([hits, np.flatnonzero(mask)])
+        else:
+            hits = np.flatnonzero(mask)
+
+        if top is not None:
+            hits = hits[:top]
+
+        if all_columns:
+            columns = list(self.panel.columns)
+        else:
+            columns = KEY_COLUMNS + list(dict.fromkeys(
+                [column for column, _, _ in conditions if column != 'year'] + ([order_by] if order_by else [])
+            ))
+
+        return self.panel.iloc[hits][columns].reset_index(drop=True)
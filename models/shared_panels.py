@@ -0,0 +1,196 @@
+# models.shared_panels.py
+
+import multiprocessing
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from models.income_statement import return_quarterly_is_df
+from models.income_statement import IncomeStatement
+from models.balance_sheet import return_quarterly_bs_df
+from models.balance_sheet import BalanceSheet
+from models.cashflow_statement import return_quarterly_cf_df
+from models.cashflow_statement import CashFlowStatement
+from models.market import return_price_matrix
+
+STATEMENT_KINDS = {
+    'is': (return_quarterly_is_df, IncomeStatement),
+    'bs': (return_quarterly_bs_df, BalanceSheet),
+    'cf': (return_quarterly_cf_df, CashFlowStatement),
+}
+PRICE_COLUMNS = ['Adj Close', 'Close']
+
+# every block starts on a cache line
+ALIGNMENT = 64
+
+# the panels a pool worker attached to in its initializer
+WORKER_PANELS = None
+
+
+def return_statement_arrays(ticker_dfs: list, fields: list) -> dict:
+    # stack every ticker's quarterly statements into one statements x fields block, rows grouped by ticker in
+    # date order. starts[i]:starts[i + 1] are the rows of ticker i
+    # int64 like the loaders, a line item a ticker does not report is 0
+    panels = [df.reindex(fields, fill_value=0).transpose() for df in ticker_dfs]
+    dates = [pd.to_datetime(panel.index, format='%m/%d/%Y').values.astype('datetime64[D]') for panel in panels]
+    orders = [np.argsort(ticker_dates, kind='stable') for ticker_dates in dates]
+
+    return {
+        'values': np.concatenate([panel.to_numpy(dtype=np.int64)[order] for panel, order in zip(panels, orders)]),
+        'dates': np.concatenate([ticker_dates[order] for ticker_dates, order in zip(dates, orders)]).astype(np.int64),
+        'starts': np.concatenate([[0], np.cumsum([len(panel) for panel in panels])]).astype(np.int64),
+    }
+
+
+def return_panel_arrays(tickers: list) -> tuple:
+    # (arrays by block name, column labels by panel) for the statement and price panels of the tickers
+    arrays = {}
+    columns = {}
+
+    for kind, (loader, statement_class) in STATEMENT_KINDS.items():
+        fields = list(statement_class.FIELDS) + list(statement_class.OPTIONAL_FIELDS)
+        ticker_dfs = [loader(ticker, statement_class.FIELDS, statement_class.OPTIONAL_FIELDS) for ticker in tickers]
+        for name, array in return_statement_arrays(ticker_dfs, fields).items():
+            arrays[f'{kind}/{name}'] = array
+        columns[kind] = fields
+
+    for column in PRICE_COLUMNS:
+        price_matrix = return_price_matrix(tickers, column=column)
+        arrays[f'price/{column}'] = price_matrix.to_numpy(dtype=float)
+    arrays['price/dates'] = price_matrix.index.values.astype('datetime64[D]').astype(np.int64)
+    columns['price'] = PRICE_COLUMNS
+
+    return arrays, columns
+
+
+def return_layout(arrays: dict) -> tuple:
+    # offsets of each block in one segment, and the segment size
+    layout = {}
+    offset = 0
+
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+        offset += array.nbytes
+
+    return layout, max(offset, 1)
+
+
+class SharedPanels:
+
+    def __init__(self, descriptor: dict, shm: shared_memory.SharedMemory = None):
+        # descriptor: the small, picklable description of the segment. shm is only passed by create(), the owner
+        self.descriptor: dict = descriptor
+        self.owner: bool = shm is not None
+        self.shm: shared_memory.SharedMemory = shm or return_attached_memory(descriptor['name'])
+
+        self.tickers: list = descriptor['tickers']
+        self.ticker_codes: dict = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.quarter_offsets: dict = dict(zip(self.tickers, descriptor['quarter_offsets']))
+        self.columns: dict = descriptor['columns']
+
+        # zero copy views on the segment, read only so no worker can change what the others see
+        self.arrays: dict = {}
+        for name, block in descriptor['layout'].items():
+            array = np.ndarray(block['shape'], dtype=np.dtype(block['dtype']), buffer=self.shm.buf,
+                               offset=block['offset'])
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {len(self.tickers)} tickers, {self.descriptor["size"] / 2 ** 20:.1f}MB ' \
+               f'in {self.descriptor["name"]}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def create(cls, companies_list: list):
+        # load once in this process and copy every panel into a new segment
+        tickers = [company['ticker'] for company in companies_list]
+        arrays, columns = return_panel_arrays(tickers)
+        layout, size = return_layout(arrays)
+
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        for name, array in arrays.items():
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=layout[name]['offset'])
+            target[...] = array
+
+        descriptor = {
+            'name': shm.name,
+            'size': size,
+            'tickers': tickers,
+            'quarter_offsets': [company['quarter_offset'] for company in companies_list],
+            'columns': columns,
+            'layout': layout,
+        }
+
+        return cls(descriptor, shm=shm)
+
+    def close(self):
+        # views must go before the buffer is released. the owner also frees the segment
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def return_statement_rows(self, kind: str, ticker: str) -> slice:
+        starts = self.arrays[f'{kind}/starts']
+        code = self.ticker_codes[ticker]
+
+        return slice(int(starts[code]), int(starts[code + 1]))
+
+    def return_statement_df(self, kind: str, ticker: str) -> pd.DataFrame:
+        # line items x statement dates, laid out like the return_quarterly_x_df loaders (dates in ascending order)
+        rows = self.return_statement_rows(kind, ticker)
+        dates = self.arrays[f'{kind}/dates'][rows].astype('datetime64[D]')
+
+        return pd.DataFrame(self.arrays[f'{kind}/values'][rows].T, index=self.columns[kind],
+                            columns=pd.DatetimeIndex(dates).strftime('%m/%d/%Y'), copy=False)
+
+    def return_statement_panel(self, kind: str) -> pd.DataFrame:
+        # one row per statement of every ticker, the value columns are a view on the segment
+        starts = self.arrays[f'{kind}/starts']
+        panel = pd.DataFrame(self.arrays[f'{kind}/values'], columns=self.columns[kind], copy=False)
+        panel.insert(0, 'statementDate', self.arrays[f'{kind}/dates'].astype('datetime64[D]'))
+        panel.insert(0, 'company', np.repeat(np.asarray(self.tickers, dtype=object), np.diff(starts)))
+
+        return panel
+
+    def return_price_matrix(self, column: str = 'Adj Close') -> pd.DataFrame:
+        dates = pd.DatetimeIndex(self.arrays['price/dates'].astype('datetime64[D]'), name='Date')
+
+        return pd.DataFrame(self.arrays[f'price/{column}'], index=dates, columns=self.tickers, copy=False)
+
+
+def return_attached_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # before 3.13 attaching registers the segment with the resource tracker. pool workers share the owner's
+    # tracker, which only unlinks segments still registered when the owner is gone, so that is harmless there
+    return shared_memory.SharedMemory(name=name)
+
+
+def attach_worker_panels(descriptor: dict):
+    # pool initializer: attach once per worker, every task of the worker reuses the views
+    global WORKER_PANELS
+    WORKER_PANELS = SharedPanels(descriptor)
+
+
+def return_worker_panels() -> SharedPanels:
+    return WORKER_PANELS
+
+
+def map_with_shared_panels(function, items: list, companies_list: list, processes: int = None) -> list:
+    # function(item) runs in the workers and reads the panels through return_worker_panels(). only the descriptor
+    # is pickled to the workers, the panels are loaded once here
+    with SharedPanels.create(companies_list) as panels:
+        with multiprocessing.Pool(processes=processes, initializer=attach_worker_panels,
+                                  initargs=(panels.descriptor,)) as pool:
+            return pool.map(function, items)
@@ -0,0 +1,428 @@
+# models.snapshot_store.py
+
+import glob
+import hashlib
+import json
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+from datetime import datetime
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+
+from models.manifest import return_file_sha256
+from models.manifest import INPUT_FILE_PATTERNS
+from models.utilities import RAW_CELL
+from settings import INPUT_DIR
+from settings import OUTPUT_DIR
+from settings import SNAPSHOT_DIR
+
+# the code a render run against a snapshot links into its scratch working directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CELL_KEYS = ['field', 'occurrence', 'period']
+DIFF_COLUMNS = ['file', 'company', 'kind', 'field', 'period', 'old', 'new', 'status']
+
+
+class ChunkStore:
+
+    def __init__(self, store_dir: str = SNAPSHOT_DIR):
+        # chunks are named by the sha256 of their content and kept zlib compressed in one pack file per snapshot,
+        # a small file per chunk would cost a whole file system block each. packs/<name>.json indexes a pack
+        self.store_dir: str = store_dir
+        self.index: dict = {}
+        for path in glob.glob(os.path.join(store_dir, 'packs', '*.json')):
+            with open(path) as file:
+                pack = os.path.basename(path).removesuffix('.json')
+                for chunk_id, (offset, length) in json.load(file).items():
+                    self.index[chunk_id] = (pack, offset, length)
+        # chunks written since the last flush, and the packs opened for reading
+        self.pending: dict = {}
+        self.packs: dict = {}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {len(self.index)} chunks in {self.store_dir}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for pack in self.packs.values():
+            pack.close()
+        self.packs = {}
+
+    def write_chunk(self, content: bytes) -> str:
+        # a chunk any vintage already holds is never stored twice
+        chunk_id = hashlib.sha256(content).hexdigest()
+        if chunk_id not in self.index and chunk_id not in self.pending:
+            self.pending[chunk_id] = zlib.compress(content)
+
+        return chunk_id
+
+    def read_chunk(self, chunk_id: str) -> bytes:
+        if chunk_id in self.pending:
+            return zlib.decompress(self.pending[chunk_id])
+
+        pack, offset, length = self.index[chunk_id]
+        if pack not in self.packs:
+            with open(os.path.join(self.store_dir, 'packs', f'{pack}.pack'), 'rb') as file:
+                self.packs[pack] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        content = zlib.decompress(self.packs[pack][offset:offset + length])
+        if hashlib.sha256(content).hexdigest() != chunk_id:
+            raise ValueError(f'chunk {chunk_id} in pack {pack} is corrupt')
+
+        return content
+
+    def return_chunk_lines(self, chunk_id: str) -> list:
+        return self.read_chunk(chunk_id).decode().split('\n')
+
+    def flush(self, pack: str) -> int:
+        # write the pending chunks as one pack, returns its size. the index is written last, so a crashed flush
+        # leaves at most an unreferenced pack
+        if not self.pending:
+            return 0
+
+        os.makedirs(os.path.join(self.store_dir, 'packs'), exist_ok=True)
+        pack_index = {}
+        offset = 0
+        pack_path = os.path.join(self.store_dir, 'packs', f'{pack}.pack')
+        with open(f'{pack_path}.tmp', 'wb') as file:
+            for chunk_id, compressed in self.pending.items():
+                file.write(compressed)
+                pack_index[chunk_id] = [offset, len(compressed)]
+                offset += len(compressed)
+        os.replace(f'{pack_path}.tmp', pack_path)
+
+        index_path = os.path.join(self.store_dir, 'packs', f'{pack}.json')
+        with open(f'{index_path}.tmp', 'w') as file:
+            json.dump(pack_index, file)
+        os.replace(f'{index_path}.tmp', index_path)
+
+        for chunk_id, (chunk_offset, length) in pack_index.items():
+            self.index[chunk_id] = (pack, chunk_offset, length)
+        self.pending = {}
+
+        return offset
+
+
+def return_file_record(text: str, store: ChunkStore) -> dict:
+    # the record of one input file, its chunks written to the store. statement panels (header 'name, dates...') get
+    # one chunk per statement date column, so a vintage that adds a quarter or restates one only stores the columns
+    # that moved. price files (header 'Date, fields...') get one chunk per calendar year of rows, anything else one
+    lines = text.split('\n')
+    header = RAW_CELL.findall(lines[0])
+
+    if header[0] == 'name':
+        rows = [RAW_CELL.findall(line) for line in lines[1:]]
+        # statement files have ragged rows, every row keeps its own number of cells
+        widths = [len(cells) for cells in rows]
+        n_columns = max([len(header)] + widths)
+        columns = [
+            store.write_chunk('\n'.join(cells[column] if column < len(cells) else '' for cells in rows).encode())
+            for column in range(n_columns)
+        ]
+
+        return {'layout': 'columns', 'header': header, 'widths': widths, 'columns': columns}
+
+    if header[0] == 'Date':
+        blocks = []
+        years = []
+        for line in lines[1:]:
+            if not years or line[:4] != years[-1]:
+                years.append(line[:4])
+                blocks.append([])
+            blocks[-1].append(line)
+        chunk_ids = [store.write_chunk('\n'.join(block).encode()) for block in blocks]
+
+        return {'layout': 'rows', 'header': lines[0], 'years': years, 'blocks': chunk_ids}
+
+    return {'layout': 'blob', 'blocks': [store.write_chunk(text.encode())]}
+
+
+def return_file_text(record: dict, store: ChunkStore) -> str:
+    # the exact text the record was made from
+    if record['layout'] == 'columns':
+        columns = [store.return_chunk_lines(chunk_id) for chunk_id in record['columns']]
+        rows = zip(*columns) if columns else []
+        lines = [','.join(record['header'])]
+        lines += [','.join(cells[:width]) for cells, width in zip(rows, record['widths'])]
+
+        return '\n'.join(lines)
+
+    if record['layout'] == 'rows':
+        return '\n'.join([record['header']] + [store.read_chunk(chunk_id).decode() for chunk_id in
+                                               record['blocks']])
+
+    return store.read_chunk(record['blocks'][0]).decode()
+
+
+def return_vintage_path(store_dir: str, vintage_id: str) -> str:
+    return os.path.join(store_dir, 'vintages', f'{vintage_id}.json')
+
+
+def return_vintages(store_dir: str = SNAPSHOT_DIR) -> list:
+    # every vintage in the store, oldest first
+    vintages = []
+    for path in glob.glob(os.path.join(store_dir, 'vintages', '*.json')):
+        with open(path) as file:
+            vintages.append(json.load(file))
+
+    return sorted(vintages, key=lambda vintage: (vintage['created'], vintage['vintage']))
+
+
+def load_vintage(vintage_id: str, store_dir: str = SNAPSHOT_DIR) -> dict:
+    # vintage_id: a full id, a unique prefix of one, or 'latest'
+    vintages = return_vintages(store_dir)
+    if vintage_id == 'latest':
+        matches = vintages[-1:]
+    else:
+        matches = [vintage for vintage in vintages if vintage['vintage'].startswith(vintage_id)]
+    if len(matches) != 1:
+        raise KeyError(f'{len(matches)} vintages in {store_dir} match {vintage_id}')
+
+    return matches[0]
+
+
+def create_snapshot(input_dir: str = INPUT_DIR, store_dir: str = SNAPSHOT_DIR, label: str = None) -> tuple:
+    # (vintage, bytes of new chunks). the vintage id is a hash of the file contents, so snapshotting an unchanged
+    # input directory returns the vintage that already holds it
+    known = {}
+    for vintage in return_vintages(store_dir):
+        for record in vintage['files'].values():
+            known[record['sha256']] = record
+
+    with ChunkStore(store_dir) as store:
+        files = {}
+        for path in sorted(glob.glob(os.path.join(input_dir, '*.csv'))):
+            sha256 = return_file_sha256(path)
+            # a file some vintage already holds is not even parsed
+            if sha256 not in known:
+                with open(path, newline='') as file:
+                    known[sha256] = {**return_file_record(file.read(), store), 'sha256': sha256}
+            files[os.path.basename(path)] = known[sha256]
+
+        contents = json.dumps({name: record['sha256'] for name, record in files.items()}, sort_keys=True)
+        vintage_id = hashlib.sha256(contents.encode()).hexdigest()[:16]
+        vintage_path = return_vintage_path(store_dir, vintage_id)
+        if os.path.exists(vintage_path):
+            with open(vintage_path) as file:
+                return json.load(file), 0
+
+        written = store.flush(vintage_id)
+
+    vintage = {
+        'vintage': vintage_id,
+        'created': datetime.now(timezone.utc).isoformat(timespec='microseconds'),
+        'label': label,
+        'input_dir': input_dir,
+        'files': files,
+    }
+    os.makedirs(os.path.dirname(vintage_path), exist_ok=True)
+    tmp_path = f'{vintage_path}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(vintage, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, vintage_path)
+
+    return vintage, written
+
+
+def restore_snapshot(vintage: dict, target_dir: str, store_dir: str = SNAPSHOT_DIR) -> int:
+    # write the vintage's input files into target_dir, each checked against the sha256 it was snapshotted with
+    os.makedirs(target_dir, exist_ok=True)
+
+    with ChunkStore(store_dir) as store:
+        for name, record in vintage['files'].items():
+            content = return_file_text(record, store).encode()
+            if hashlib.sha256(content).hexdigest() != record['sha256']:
+                raise ValueError(f'{name} of vintage {vintage["vintage"]} did not reconstruct')
+            with open(os.path.join(target_dir, name), 'wb') as file:
+                file.write(content)
+
+    return len(vintage['files'])
+
+
+def render_snapshot(vintage: dict, copy_to: str, outputs: list = None, store_dir: str = SNAPSHOT_DIR):
+    # run the render pipeline on a vintage. its inputs are restored into a scratch working directory next to links to
+    # the code, and cli.py refreshes the outputs there: the loaders read the relative paths they always read
+    with tempfile.TemporaryDirectory() as work_dir:
+        restore_snapshot(vintage, os.path.join(work_dir, INPUT_DIR), store_dir=store_dir)
+        os.makedirs(os.path.join(work_dir, OUTPUT_DIR))
+        for path in glob.glob(os.path.join(REPO_DIR, '*.py')) + [os.path.join(REPO_DIR, 'models')]:
+            os.symlink(path, os.path.join(work_dir, os.path.basename(path)))
+
+        subprocess.run([sys.executable, 'cli.py', 'refresh', *(outputs or []), '--copy-to', os.path.abspath(copy_to)],
+                       cwd=work_dir, check=True)
+
+
+def return_file_company_and_kind(name: str) -> tuple:
+    # (ticker, statement kind) from an input file name, the kind as in INPUT_FILE_PATTERNS where it is one of them
+    ticker = name.split('_')[0].removesuffix('.csv')
+    for kind, pattern in INPUT_FILE_PATTERNS.items():
+        if os.path.basename(pattern.format(input_dir='', ticker=ticker)) == name:
+            return ticker, kind
+
+    return ticker, name.removeprefix(f'{ticker}_').removesuffix('.csv')
+
+
+def return_cell_arrays(record: dict, store: ChunkStore, periods: set = None) -> dict:
+    # field, occurrence, period and raw cell text arrays, one entry per cell of a file record. periods: only the
+    # columns or years of rows with these labels. occurrence numbers repeated field names so every cell has its own key
+    if record is None or record['layout'] == 'blob':
+        return {key: np.array([], dtype=object) for key in CELL_KEYS + ['raw']}
+
+    if record['layout'] == 'columns':
+        names = [name.replace('\t', '') for name in store.return_chunk_lines(record['columns'][0])]
+        labels = return_column_labels(record)
+        kept = [column for column, label in enumerate(labels, start=1) if periods is None or label in periods]
+        cells = np.array([store.return_chunk_lines(record['columns'][column]) for column in kept],
+                         dtype=object).reshape(len(kept), len(names))
+        # a ragged row has no cell past its width, like an empty one
+        present = np.array(kept).reshape(-1, 1) < np.array(record['widths']).reshape(1, -1)
+
+        return {
+            'field': np.tile(np.array(names, dtype=object), len(kept))[present.ravel()],
+            'occurrence': np.tile(return_occurrences(names), len(kept))[present.ravel()],
+            'period': np.repeat(np.array([labels[column - 1] for column in kept], dtype=object), len(names))[
+                present.ravel()],
+            'raw': cells.ravel()[present.ravel()],
+        }
+
+    fields = RAW_CELL.findall(record['header'])[1:]
+    rows = [
+        RAW_CELL.findall(line) for year, chunk_id in zip(record['years'], record['blocks'])
+        if periods is None or year in periods for line in store.return_chunk_lines(chunk_id)
+    ]
+    # short rows are padded with empty cells, long ones cut to the header
+    cells = np.array([(row + [''] * len(fields))[1:len(fields) + 1] for row in rows], dtype=object)
+    cells = cells.reshape(len(rows), len(fields))
+    dates = [row[0] for row in rows]
+
+    return {
+        'field': np.tile(np.array(fields, dtype=object), len(rows)),
+        'occurrence': np.repeat(return_occurrences(dates), len(fields)),
+        'period': np.repeat(np.array(dates, dtype=object), len(fields)),
+        'raw': cells.ravel(),
+    }
+
+
+def return_occurrences(labels: list) -> np.ndarray:
+    # how many times each label appeared before, 0 for its first
+    seen = {}
+    occurrences = np.empty(len(labels), dtype=np.int64)
+    for i, label in enumerate(labels):
+        occurrences[i] = seen.get(label, 0)
+        seen[label] = occurrences[i] + 1
+
+    return occurrences
+
+
+def return_column_labels(record: dict) -> list:
+    # the period label of every value column of a statement panel: its header cell, or its position past the end of
+    # a short header
+    header = [cell.strip('"') for cell in record['header'][1:]]
+
+    return [header[i] if i < len(header) else f'column {i + 1}' for i in range(len(record['columns']) - 1)]
+
+
+def return_changed_periods(old: dict, new: dict) -> set:
+    # the period labels whose chunks differ between two records of the same layout, None when every period must be
+    # compared: the layouts differ, or the line items of a statement panel changed so its columns no longer line up
+    if old is None or new is None or old['layout'] != new['layout'] or old['layout'] == 'blob':
+        return None
+
+    if old['layout'] == 'columns':
+        if old['columns'][0] != new['columns'][0]:
+            return None
+        old_chunks = list(zip(return_column_labels(old), old['columns'][1:]))
+        new_chunks = list(zip(return_column_labels(new), new['columns'][1:]))
+    else:
+        if old['header'] != new['header']:
+            return None
+        old_chunks = list(zip(old['years'], old['blocks']))
+        new_chunks = list(zip(new['years'], new['blocks']))
+    # a label repeated within a file would hide a chunk
+    if len(dict(old_chunks)) < len(old_chunks) or len(dict(new_chunks)) < len(new_chunks):
+        return None
+    old_chunks = dict(old_chunks)
+    new_chunks = dict(new_chunks)
+
+    return {period for period in set(old_chunks) | set(new_chunks) if old_chunks.get(period) != new_chunks.get(period)}
+
+
+def return_file_cells(name: str, old: dict, new: dict, store: ChunkStore) -> tuple:
+    # the old and new cell arrays of one file, tagged with its name. only the periods whose chunks differ are decoded
+    periods = return_changed_periods(old, new)
+    old_cells = return_cell_arrays(old, store, periods)
+    new_cells = return_cell_arrays(new, store, periods)
+    old_cells['file'] = np.full(len(old_cells['raw']), name, dtype=object)
+    new_cells['file'] = np.full(len(new_cells['raw']), name, dtype=object)
+
+    return old_cells, new_cells
+
+
+def return_cell_values(raw: np.ndarray) -> np.ndarray:
+    # raw cells as numbers: quotes and thousands separators stripped, nan where empty or not a number
+    text = pd.Series(raw, dtype=object).str.replace('"', '', regex=False).str.replace(',', '', regex=False)
+
+    return pd.to_numeric(text, errors='coerce').to_numpy(dtype=float)
+
+
+def return_vintage_diff(old_vintage: dict, new_vintage: dict, store_dir: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    # one row per (file, field, period) value that differs between two vintages. files with the same content hash
+    # are skipped without reading a chunk, the cells of the rest are compared as raw text in one vectorized pass
+    old_cells, new_cells, blobs = [], [], []
+    with ChunkStore(store_dir) as store:
+        for name in sorted(set(old_vintage['files']) | set(new_vintage['files'])):
+            old = old_vintage['files'].get(name)
+            new = new_vintage['files'].get(name)
+            if old is not None and new is not None and old['sha256'] == new['sha256']:
+                continue
+            if (old or {}).get('layout') == 'blob' or (new or {}).get('layout') == 'blob':
+                blobs.append([name, None, None, np.nan, np.nan,
+                              'added' if old is None else 'removed' if new is None else 'changed'])
+                continue
+            old_file_cells, new_file_cells = return_file_cells(name, old, new, store)
+            old_cells.append(old_file_cells)
+            new_cells.append(new_file_cells)
+
+    keys = ['file'] + CELL_KEYS
+    merged = pd.DataFrame({
+        key: np.concatenate([cells[key] for cells in old_cells]) if old_cells else np.array([], dtype=object)
+        for key in keys + ['raw']
+    }).merge(pd.DataFrame({
+        key: np.concatenate([cells[key] for cells in new_cells]) if new_cells else np.array([], dtype=object)
+        for key in keys + ['raw']
+    }), on=keys, how='outer', suffixes=('_old', '_new'), sort=False)
+
+    old_raw = merged['raw_old'].to_numpy(dtype=object)
+    new_raw = merged['raw_new'].to_numpy(dtype=object)
+    # a cell only one side has counts as changed unless it is empty
+    old_raw = np.where(pd.isna(old_raw), '', old_raw)
+    new_raw = np.where(pd.isna(new_raw), '', new_raw)
+    changed = old_raw != new_raw
+
+    changes = merged.loc[changed, ['file', 'field', 'period']].reset_index(drop=True)
+    changes['old'] = return_cell_values(old_raw[changed])
+    changes['new'] = return_cell_values(new_raw[changed])
+    changes['status'] = np.select([old_raw[changed] == '', new_raw[changed] == ''], ['added', 'removed'], 'changed')
+    if blobs:
+        changes = pd.concat([changes, pd.DataFrame(blobs, columns=['file', 'field', 'period', 'old', 'new', 'status'])],
+                            ignore_index=True)
+
+    companies_and_kinds = {name: return_file_company_and_kind(name) for name in changes['file'].unique()}
+    changes['company'] = changes['file'].map(lambda name: companies_and_kinds[name][0])
+    changes['kind'] = changes['file'].map(lambda name: companies_and_kinds[name][1])
+
+    return changes.sort_values('file', kind='stable', ignore_index=True)[DIFF_COLUMNS]
+
+
+def return_store_size(store_dir: str = SNAPSHOT_DIR) -> int:
+    return sum(os.path.getsize(path) for path in glob.glob(os.path.join(store_dir, 'packs', '*')))
@@ -0,0 +1,216 @@
+# models.sqlite_store.py
+
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    company_id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id INTEGER PRIMARY KEY,
+    statement TEXT NOT NULL,
+    account_classification TEXT NOT NULL,
+    account TEXT NOT NULL,
+    UNIQUE (statement, account_classification, account)
+);
+
+CREATE TABLE IF NOT EXISTS ratios (
+    ratio_id INTEGER PRIMARY KEY,
+    ratio_type TEXT NOT NULL,
+    ratio TEXT NOT NULL,
+    UNIQUE (ratio_type, ratio)
+);
+
+CREATE TABLE IF NOT EXISTS is_data (
+    company_id INTEGER NOT NULL REFERENCES companies (company_id),
+    statement_date TEXT NOT NULL,
+    quarter INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    account_id INTEGER NOT NULL REFERENCES accounts (account_id),
+    amount REAL,
+    PRIMARY KEY (company_id, statement_date, account_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS bs_data (
+    company_id INTEGER NOT NULL REFERENCES companies (company_id),
+    statement_date TEXT NOT NULL,
+    quarter INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    account_id INTEGER NOT NULL REFERENCES accounts (account_id),
+    amount REAL,
+    PRIMARY KEY (company_id, statement_date, account_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ratio_data (
+    company_id INTEGER NOT NULL REFERENCES companies (company_id),
+    year INTEGER NOT NULL,
+    ratio_id INTEGER NOT NULL REFERENCES ratios (ratio_id),
+    value REAL,
+    PRIMARY KEY (company_id, year, ratio_id)
+) WITHOUT ROWID;
+
+-- covering indexes: every column a dashboard query reads is in the index
+CREATE INDEX IF NOT EXISTS is_data_company_year
+    ON is_data (company_id, year, account_id, quarter, statement_date, amount);
+CREATE INDEX IF NOT EXISTS bs_data_company_year
+    ON bs_data (company_id, year, account_id, quarter, statement_date, amount);
+CREATE INDEX IF NOT EXISTS ratio_data_ratio_year
+    ON ratio_data (ratio_id, year, company_id, value);
+
+CREATE VIEW IF NOT EXISTS is_data_view AS
+    SELECT c.ticker AS company, f.statement_date AS statementDate, f.quarter, f.year,
+           a.account_classification AS accountClassification, a.account, f.amount
+    FROM is_data f
+    JOIN companies c ON c.company_id = f.company_id
+    JOIN accounts a ON a.account_id = f.account_id;
+
+CREATE VIEW IF NOT EXISTS bs_data_view AS
+    SELECT c.ticker AS company, f.statement_date AS statementDate, f.quarter, f.year,
+           a.account_classification AS accountClassification, a.account, f.amount
+    FROM bs_data f
+    JOIN companies c ON c.company_id = f.company_id
+    JOIN accounts a ON a.account_id = f.account_id;
+
+CREATE VIEW IF NOT EXISTS ratio_data_view AS
+    SELECT c.ticker AS company, f.year, r.ratio_type, r.ratio, f.value
+    FROM ratio_data f
+    JOIN companies c ON c.company_id = f.company_id
+    JOIN ratios r ON r.ratio_id = f.ratio_id;
+"""
+
+
+def return_connection(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+
+    # wal lets dashboards keep reading while a render run is writing
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def upsert_companies(conn: sqlite3.Connection, tickers: list) -> dict:
+    conn.executemany('INSERT OR IGNORE INTO companies (ticker) VALUES (?)', [(ticker,) for ticker in set(tickers)])
+
+    return {ticker: company_id for company_id, ticker in conn.execute('SELECT company_id, ticker FROM companies')}
+
+
+def upsert_accounts(conn: sqlite3.Connection, statement: str, accounts: list) -> dict:
+    conn.executemany(
+        'INSERT OR IGNORE INTO accounts (statement, account_classification, account) VALUES (?, ?, ?)',
+        [(statement, classification, account) for classification, account in set(accounts)]
+    )
+    rows = conn.execute(
+        'SELECT account_id, account_classification, account FROM accounts WHERE statement = ?', (statement,)
+    )
+
+    return {(classification, account): account_id for account_id, classification, account in rows}
+
+
+def upsert_ratios(conn: sqlite3.Connection, ratios: list) -> dict:
+    conn.executemany('INSERT OR IGNORE INTO ratios (ratio_type, ratio) VALUES (?, ?)', list(set(ratios)))
+    rows = conn.execute('SELECT ratio_id, ratio_type, ratio FROM ratios')
+
+    return {(ratio_type, ratio): ratio_id for ratio_id, ratio_type, ratio in rows}
+
+
+def delete_missing_rows(conn: sqlite3.Connection, table: str, key_columns: list, company_ids: list, keys: set) -> int:
+    # rows of these companies whose key is not among the keys just upserted, e.g. a statement date or fiscal year the
+    # outputs no longer hold. every other row was updated in place
+    if not company_ids:
+        return 0
+
+    rows = conn.execute(f'SELECT {", ".join(key_columns)} FROM {table} '
+                        f'WHERE company_id IN ({", ".join("?" * len(company_ids))})', company_ids)
+    missing = [key for key in rows if key not in keys]
+    conn.executemany(f'DELETE FROM {table} WHERE {" AND ".join(f"{column} = ?" for column in key_columns)}', missing)
+
+    return len(missing)
+
+
+def upsert_statement_data(conn: sqlite3.Connection, table: str, data_list: list, tickers: list = None) -> int:
+    # tickers: the rendered tickers, whose rows data_list does not hold any more are deleted in the same transaction.
+    # None only upserts, as a restatement patching single cells does
+    if table not in ('is_data', 'bs_data'):
+        raise ValueError(f'{table} is not a statement table')
+
+    with conn:
+        company_ids = upsert_companies(conn, [row['company'] for row in data_list] + list(tickers or []))
+        account_ids = upsert_accounts(conn, table, [(row['accountClassification'], row['account'])
+                                                   for row in data_list])
+        rows = [
+            (company_ids[row['company']],
+             row['statementDate'].strftime('%Y-%m-%d'),
+             row['quarter'],
+             row['year'],
+             account_ids[(row['accountClassification'], row['account'])],
+             row['amount'])
+            for row in data_list
+        ]
+        conn.executemany(
+            f'INSERT INTO {table} (company_id, statement_date, quarter, year, account_id, amount) '
+            f'VALUES (?, ?, ?, ?, ?, ?) '
+            f'ON CONFLICT (company_id, statement_date, account_id) '
+            f'DO UPDATE SET quarter = excluded.quarter, year = excluded.year, amount = excluded.amount',
+            rows
+        )
+        if tickers is not None:
+            delete_missing_rows(conn, table, ['company_id', 'statement_date', 'account_id'],
+                                [company_ids[ticker] for ticker in set(tickers)],
+                                {(row[0], row[1], row[4]) for row in rows})
+
+    return len(rows)
+
+
+def upsert_ratio_data(conn: sqlite3.Connection, data_list: list, tickers: list = None) -> int:
+    # tickers: see upsert_statement_data
+    with conn:
+        company_ids = upsert_companies(conn, [row['company'] for row in data_list] + list(tickers or []))
+        ratio_ids = upsert_ratios(conn, [(row['ratio_type'], row['ratio']) for row in data_list])
+        rows = [
+            (company_ids[row['company']],
+             row['year'],
+             ratio_ids[(row['ratio_type'], row['ratio'])],
+             row['value'])
+            for row in data_list
+        ]
+        conn.executemany(
+            'INSERT INTO ratio_data (company_id, year, ratio_id, value) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (company_id, year, ratio_id) DO UPDATE SET value = excluded.value',
+            rows
+        )
+        if tickers is not None:
+            delete_missing_rows(conn, 'ratio_data', ['company_id', 'year', 'ratio_id'],
+                                [company_ids[ticker] for ticker in set(tickers)], {row[:3] for row in rows})
+
+    return len(rows)
+
+
+def return_company_ratios(conn: sqlite3.Connection, ticker: str, year: int) -> list:
+    query = """
+        SELECT r.ratio_type, r.ratio, f.value
+        FROM companies c
+        JOIN ratio_data f ON f.company_id = c.company_id AND f.year = ?
+        JOIN ratios r ON r.ratio_id = f.ratio_id
+        WHERE c.ticker = ?
+        ORDER BY r.ratio_type, r.ratio
+    """
+
+    return conn.execute(query, (year, ticker)).fetchall()
+
+
+def return_ratio_by_company(conn: sqlite3.Connection, ratio: str, year: int) -> list:
+    query = """
+        SELECT c.ticker, f.value
+        FROM ratios r
+        JOIN ratio_data f ON f.ratio_id = r.ratio_id AND f.year = ?
+        JOIN companies c ON c.company_id = f.company_id
+        WHERE r.ratio = ?
+        ORDER BY c.ticker
+    """
+
+    return conn.execute(query, (year, ratio)).fetchall()
@@ -1,8 +1,27 @@
 # models.utilities.py
+import contextlib
 from datetime import datetime
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
 
 from typing import Tuple
 
+from settings import AMOUNT_UNIT
+from settings import INPUT_DIR
+from settings import OUTPUT_DIR
+
+# amounts are whole dollars in the source files and are stored as int64 counts of AMOUNT_UNIT dollars. the few
+# line items with decimals (at most three in the source files) are stored in thousandths
+FRACTIONAL_FIELDS = ['BasicEPS', 'DilutedEPS', 'TaxRateForCalcs', 'NormalizedIncome', 'TaxEffectOfUnusualItems']
+FRACTIONAL_SCALE = 1000
+
+# one cell of an input file line, quoted or bare, without its separator
+RAW_CELL = re.compile(r'(?:^|,)((?:"[^"]*"|[^,"]*))')
+
 
 def return_adjusted_quarter_and_year(stmt_date: datetime, quarter_offset: int) -> Tuple[int, int]:
 
@@ -52,3 +71,121 @@ def return_adjusted_quarter_and_year(stmt_date: datetime, quarter_offset: int) -
     return_year = years[quarter_offset + 1]
 
     return return_quarter, return_year
+
+
+def return_adjusted_quarters_and_years(stmt_dates: pd.Series, quarter_offset: int) -> Tuple[pd.Series, pd.Series]:
+    # vectorized return_adjusted_quarter_and_year: count quarters since year 0, apply the offset and split back
+    periods = stmt_dates.dt.year * 4 + (stmt_dates.dt.month - 1) // 3 + quarter_offset
+
+    return periods % 4 + 1, periods // 4
+
+
+def return_annual_records_dict(df: pd.DataFrame, quarter_offset: int) -> Tuple[dict, dict]:
+    # df is a quarterly statement df: one row per line item and one column per statement date
+    panel = df.transpose()
+    stmt_dates = pd.Series(pd.to_datetime(panel.index, format='%m/%d/%Y'), index=panel.index)
+    quarters, years = return_adjusted_quarters_and_years(stmt_dates, quarter_offset)
+
+    # one grouped sum over the fiscal year key for the whole panel
+    annual_df = panel.groupby(years, sort=False).sum()
+    annual_df['StatementDate'] = stmt_dates.groupby(years, sort=False).max()
+
+    # years with fewer than four quarters are reported rather than summed
+    n_quarters = quarters.groupby(years, sort=False).nunique()
+    incomplete_years = {int(year): int(n) for year, n in n_quarters.items() if n < 4}
+    annual_df = annual_df.drop(index=list(incomplete_years))
+
+    records = {int(year): record for year, record in annual_df.to_dict(orient='index').items()}
+
+    return records, incomplete_years
+
+
+def return_fixed_point_df(df: pd.DataFrame, unit: int = AMOUNT_UNIT) -> pd.DataFrame:
+    # df holds the raw strings of a statement file, one row per line item. strip thousands separators, fill na and
+    # scale every row to its fixed point integer in one pass over the cells
+    if not df.size:
+        return df.astype(np.int64)
+
+    values = pd.Series(df.to_numpy().ravel()).str.replace(',', '', regex=False).astype(float).fillna(0)
+    values = values.to_numpy().reshape(df.shape)
+
+    fractional = df.index.isin(FRACTIONAL_FIELDS)[:, None]
+    values = np.where(fractional, values * FRACTIONAL_SCALE, values / unit)
+
+    return pd.DataFrame(np.rint(values).astype(np.int64), index=df.index, columns=df.columns)
+
+
+def return_derivation_inputs(derivation) -> list:
+    # a DERIVATIONS entry is a line item name, taken as is, or (inputs, function of the inputs)
+    return [derivation] if isinstance(derivation, str) else derivation[0]
+
+
+def return_derived_values(derivations: dict, values: dict, attributes: list = None) -> dict:
+    # evaluate a statement class's DERIVATIONS, in table order, on the line items in values: scalars of one statement
+    # or arrays over the statement date columns of a panel. attributes: only these and what they are computed from
+    needed = set(derivations)
+    if attributes is not None:
+        needed = set()
+        pending = list(attributes)
+        while pending:
+            attribute = pending.pop()
+            if attribute in derivations and attribute not in needed:
+                needed.add(attribute)
+                pending.extend(return_derivation_inputs(derivations[attribute]))
+
+    values = dict(values)
+    derived = {}
+    for attribute, derivation in derivations.items():
+        if attribute not in needed:
+            continue
+        if isinstance(derivation, str):
+            derived[attribute] = values[derivation]
+        else:
+            inputs, function = derivation
+            derived[attribute] = function(*[values[name] for name in inputs])
+        values[attribute] = derived[attribute]
+
+    return derived
+
+
+def return_long_format_df(panel: dict, stmt_dates: pd.Index, accounts: list, ticker: str, quarter_offset: int,
+                          quarters: list = None) -> pd.DataFrame:
+    # panel: one array per account attribute over the statement date strings stmt_dates. melted against the static
+    # (attribute, classification, account) table to one row per statement and account, statements in date column
+    # order. quarters: only keep the statements of these fiscal quarters
+    dates = pd.to_datetime(stmt_dates, format='%m/%d/%Y').values
+    statement_quarters, statement_years = return_adjusted_quarters_and_years(pd.Series(dates), quarter_offset)
+    statement_quarters = statement_quarters.to_numpy(dtype=np.int64)
+    statement_years = statement_years.to_numpy(dtype=np.int64)
+
+    kept = np.isin(statement_quarters, quarters) if quarters is not None else np.ones(len(dates), dtype=bool)
+    n_statements = int(kept.sum())
+    amounts = np.column_stack([panel[attribute] for attribute, _, _ in accounts]) if len(accounts) else \
+        np.empty((len(dates), 0))
+
+    return pd.DataFrame({
+        'company': np.full(n_statements * len(accounts), ticker, dtype=object),
+        'statementDate': np.repeat(dates[kept], len(accounts)),
+        'quarter': np.repeat(statement_quarters[kept], len(accounts)),
+        'year': np.repeat(statement_years[kept], len(accounts)),
+        'accountClassification': np.tile(np.array([classification for _, classification, _ in accounts], dtype=object),
+                                         n_statements),
+        'account': np.tile(np.array([account for _, _, account in accounts], dtype=object), n_statements),
+        'amount': amounts[kept].ravel(),
+    })
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    # work in a temporary directory with a copy of fin_data_input and an empty fin_data_output. every input and
+    # output path is relative to the working directory, so renders and restatements there leave the real files as
+    # they are
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        shutil.copytree(INPUT_DIR, os.path.join(scratch_dir, INPUT_DIR))
+        os.makedirs(os.path.join(scratch_dir, OUTPUT_DIR))
+        os.chdir(scratch_dir)
+        try:
+            yield scratch_dir
+        finally:
+            os.chdir(cwd)
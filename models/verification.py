@@ -0,0 +1,299 @@
+# models.verification.py
+
+import contextlib
+import io
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.company import Company
+from models.dependency_graph import FIELD_KINDS
+from models.dependency_graph import STATEMENT_LEAVES
+from models.legacy.company import Company as LegacyCompany
+from models.manifest import return_input_files
+from models.query import return_statement_dates
+from models.query import STATEMENT_KINDS
+from models.restatement import return_rebuilt_outputs
+from models.restatement import return_year_end_columns
+from models.restatement import write_input_changes
+from models.restatement import Restatement
+from models.restatement import OUTPUT_CELLS
+from models.utilities import scratch_directory
+from models.utilities import FRACTIONAL_FIELDS
+from models.utilities import FRACTIONAL_SCALE
+from settings import AMOUNT_UNIT
+
+# one calendar and one offset fiscal year company, see return_perturbations
+PERTURBED_TICKERS = ['AMD', 'NVDA']
+PERTURBATION = 7_000_000
+FRACTIONAL_PERTURBATION = 0.25
+
+
+def return_legacy_companies(companies_list: list) -> list:
+    # the frozen pre-optimization pipeline, see models.legacy
+    return [LegacyCompany(**company) for company in companies_list]
+
+
+def return_companies(companies_list: list) -> list:
+    return [Company(**company) for company in companies_list]
+
+
+def return_is_df(companies: list) -> pd.DataFrame:
+    return pd.DataFrame(list(itertools.chain(*[company.return_is_data_list() for company in companies])))
+
+
+def return_bs_df(companies: list) -> pd.DataFrame:
+    return pd.DataFrame(list(itertools.chain(*[company.return_bs_data_list() for company in companies])))
+
+
+def return_is_data_df(companies: list) -> pd.DataFrame:
+    return pd.concat([company.return_is_data_df() for company in companies], ignore_index=True)
+
+
+def return_bs_data_df(companies: list) -> pd.DataFrame:
+    return pd.concat([company.return_bs_data_df() for company in companies], ignore_index=True)
+
+
+def return_ratio_df(companies: list) -> pd.DataFrame:
+    return pd.DataFrame(list(itertools.chain(*[
+        company.statement_groups[year].return_data_list()
+        for company in companies
+        for year in company.statement_groups
+    ])))
+
+
+def return_perturbations(company: dict) -> list:
+    # (field, change_df) for every line item the statement models read, moved by PERTURBATION: in the year end
+    # balance sheet that is both a balance_sheet and a prior_balance_sheet, or in the first quarter of that fiscal
+    # year. an A = L + E total moves with one on the other side, so the balance sheet still balances
+    ticker, quarter_offset = company['ticker'], company['quarter_offset']
+    statement_groups = Company(**company).statement_groups
+    year = max(year for year in statement_groups if year + 1 in statement_groups)
+    columns = {
+        'bs': return_year_end_columns(return_input_files([ticker], ['bs'])[0], quarter_offset)[year],
+        **{kind: return_statement_dates(return_input_files([ticker], [kind])[0], quarter_offset, year, year)[0]
+           for kind in ['is', 'cf']},
+    }
+    assets = sorted(STATEMENT_LEAVES['bs']['total_assets'])
+    liabilities_and_equity = sorted(STATEMENT_LEAVES['bs']['total_liabilities_and_equity'])
+
+    perturbations = []
+    for field, kind in FIELD_KINDS.items():
+        fields = [field]
+        if field in assets:
+            fields.append(liabilities_and_equity[0])
+        elif field in liabilities_and_equity:
+            fields.append(assets[0])
+
+        loader, _, statement_class = STATEMENT_KINDS[kind]
+        df = loader(ticker, statement_class.FIELDS, statement_class.OPTIONAL_FIELDS, dates=[columns[kind]])
+        rows = [
+            [ticker, columns[kind], changed,
+             df.loc[changed, columns[kind]] / FRACTIONAL_SCALE + FRACTIONAL_PERTURBATION
+             if changed in FRACTIONAL_FIELDS else df.loc[changed, columns[kind]] * AMOUNT_UNIT + PERTURBATION]
+            for changed in fields
+        ]
+        perturbations.append((field, pd.DataFrame(rows, columns=['company', 'statementDate', 'field', 'value'])))
+
+    return perturbations
+
+
+def return_output_cells(outputs: dict, ticker: str, field: str) -> pd.DataFrame:
+    # the is, bs and ratio rows of a ticker as one long frame, keyed by the perturbed field
+    frames = []
+    for name, df in outputs.items():
+        df = df[df['company'] == ticker]
+        frames.append(pd.DataFrame({
+            'field': field,
+            'output': name,
+            'company': ticker,
+            'period': df['year'].astype(str) if name == 'ratio' else df['statementDate'].dt.strftime('%Y-%m-%d'),
+            'item': df['ratio'] if name == 'ratio' else df['account'],
+            'value': df[OUTPUT_CELLS[name][4]].to_numpy(dtype=float),
+        }))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def return_texts(paths: list) -> dict:
+    # path -> its text, to write back after a perturbation
+    texts = {}
+    for path in paths:
+        with open(path, newline='') as file:
+            texts[path] = file.read()
+
+    return texts
+
+
+def restore_texts(texts: dict):
+    for path, text in texts.items():
+        with open(path, 'w', newline='') as file:
+            file.write(text)
+
+
+def return_rebuilt_perturbations(companies_list: list) -> pd.DataFrame:
+    # every perturbation written into a scratch copy of the inputs and the ticker rebuilt in full
+    frames = []
+    with scratch_directory():
+        for company in companies_list:
+            if company['ticker'] not in PERTURBED_TICKERS:
+                continue
+            texts = return_texts(return_input_files([company['ticker']], list(STATEMENT_KINDS)))
+            for field, change_df in return_perturbations(company):
+                changes = Restatement(change_df, companies_list).changes
+                for (ticker, kind), kind_changes in changes.groupby(['company', 'kind'], sort=False):
+                    write_input_changes(return_input_files([ticker], [kind])[0], kind_changes)
+                outputs = return_rebuilt_outputs([company['ticker']], companies_list)
+                frames.append(return_output_cells(outputs, company['ticker'], field))
+                restore_texts(texts)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def return_patched_perturbations(companies_list: list) -> pd.DataFrame:
+    # every perturbation applied as a restatement to scratch outputs rendered from the unchanged inputs. a dependency
+    # list missing an input leaves its cell stale, and it differs from the rebuild
+    frames = []
+    with scratch_directory():
+        tickers = [company['ticker'] for company in companies_list if company['ticker'] in PERTURBED_TICKERS]
+        for name, df in return_rebuilt_outputs(tickers, companies_list).items():
+            df.to_csv(OUTPUT_CELLS[name][0], index=False)
+        outputs = return_texts([detail_path for detail_path, _, _, _, _ in OUTPUT_CELLS.values()])
+
+        for company in companies_list:
+            if company['ticker'] not in PERTURBED_TICKERS:
+                continue
+            texts = return_texts(return_input_files([company['ticker']], list(STATEMENT_KINDS)))
+            for field, change_df in return_perturbations(company):
+                Restatement(change_df, companies_list).apply(sqlite_path=None)
+                patched = {
+                    name: pd.read_csv(detail_path, parse_dates=['statementDate'] if 'statementDate' in row_keys else [],
+                                      float_precision='round_trip')
+                    for name, (detail_path, _, row_keys, _, _) in OUTPUT_CELLS.items()
+                }
+                frames.append(return_output_cells(patched, company['ticker'], field))
+                restore_texts(texts)
+                restore_texts(outputs)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+# dataset -> natural keys, the column differences are reported by, the value column and the two paths. each path
+# takes settings.COMPANIES_LIST and returns the output dataframe, so its timing covers loading as well. 'legacy'
+# is the frozen baseline pipeline, or the full rebuild a restatement must match. faster engines register
+# themselves here as the 'fast' path of the dataset they produce
+VERIFICATION_PATHS = {
+    'is': {
+        'keys': ['company', 'statementDate', 'account'],
+        'group': 'account',
+        'value': 'amount',
+        'legacy': lambda companies_list: return_is_df(return_legacy_companies(companies_list)),
+        'fast': lambda companies_list: return_is_data_df(return_companies(companies_list)),
+    },
+    'bs': {
+        'keys': ['company', 'statementDate', 'account'],
+        'group': 'account',
+        'value': 'amount',
+        'legacy': lambda companies_list: return_bs_df(return_legacy_companies(companies_list)),
+        'fast': lambda companies_list: return_bs_data_df(return_companies(companies_list)),
+    },
+    'ratio': {
+        'keys': ['company', 'year', 'ratio'],
+        'group': 'ratio',
+        'value': 'value',
+        'legacy': lambda companies_list: return_ratio_df(return_legacy_companies(companies_list)),
+        'fast': lambda companies_list: return_ratio_df(return_companies(companies_list)),
+    },
+    # every line item perturbed in turn: the cells restate_data patches through the dependency graph against a rebuild
+    'restatement': {
+        'keys': ['field', 'output', 'company', 'period', 'item'],
+        'group': 'field',
+        'value': 'value',
+        'legacy': return_rebuilt_perturbations,
+        'fast': return_patched_perturbations,
+        # both sides work on two tickers in a scratch directory, their timing is no speedup of restate_data
+        'timed': False,
+    },
+}
+
+
+def compare_outputs(legacy_df: pd.DataFrame, fast_df: pd.DataFrame, keys: list, group: str, value: str,
+                    atol: float = 1e-9, rtol: float = 1e-9) -> pd.DataFrame:
+    merged = legacy_df[keys + [value]].merge(fast_df[keys + [value]], on=keys, how='outer',
+                                             suffixes=('_legacy', '_fast'), indicator=True)
+    legacy_values = merged[f'{value}_legacy'].to_numpy(dtype=float)
+    fast_values = merged[f'{value}_fast'].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        abs_diff = np.abs(legacy_values - fast_values)
+        rel_diff = np.where(legacy_values != 0, abs_diff / np.abs(legacy_values), np.where(abs_diff == 0, 0, np.inf))
+    both_nan = np.isnan(legacy_values) & np.isnan(fast_values)
+    abs_diff[both_nan] = 0
+    rel_diff[both_nan] = 0
+
+    # same rule as np.isclose, with nan on both sides counting as a match
+    within = np.isclose(legacy_values, fast_values, atol=atol, rtol=rtol, equal_nan=True)
+
+    compared = pd.DataFrame({
+        group: merged[group],
+        'missing_in_fast': merged['_merge'] == 'left_only',
+        'missing_in_legacy': merged['_merge'] == 'right_only',
+        'abs_diff': abs_diff,
+        'rel_diff': rel_diff,
+        'mismatched': ~within & (merged['_merge'] == 'both'),
+    })
+    report = compared.groupby(group, sort=True).agg(
+        n=('abs_diff', 'size'),
+        missing_in_fast=('missing_in_fast', 'sum'),
+        missing_in_legacy=('missing_in_legacy', 'sum'),
+        n_mismatched=('mismatched', 'sum'),
+        max_abs_diff=('abs_diff', 'max'),
+        max_rel_diff=('rel_diff', 'max'),
+    ).reset_index()
+    report['passed'] = (report['n_mismatched'] == 0) & (report['missing_in_fast'] == 0) & \
+        (report['missing_in_legacy'] == 0)
+
+    return report
+
+
+def return_timed_output(path, companies_list: list) -> tuple:
+    # the statement models print progress; keep it out of the verification report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        df = path(companies_list)
+        seconds = time.perf_counter() - start
+
+    return df, seconds
+
+
+def run_verification(names: list, companies_list: list, atol: float = 1e-9, rtol: float = 1e-9) -> tuple:
+    reports = []
+    summary = []
+
+    for name in names:
+        paths = VERIFICATION_PATHS[name]
+        legacy_df, legacy_seconds = return_timed_output(paths['legacy'], companies_list)
+        fast_df, fast_seconds = return_timed_output(paths['fast'], companies_list)
+
+        report = compare_outputs(legacy_df, fast_df, keys=paths['keys'], group=paths['group'], value=paths['value'],
+                                 atol=atol, rtol=rtol)
+        report = report.rename(columns={paths['group']: 'item'})
+        report.insert(0, 'dataset', name)
+        reports.append(report)
+
+        summary.append({
+            'dataset': name,
+            'rows_legacy': len(legacy_df),
+            'rows_fast': len(fast_df),
+            'legacy_seconds': legacy_seconds,
+            'fast_seconds': fast_seconds,
+            'speedup': np.nan if not paths.get('timed', True) else
+            legacy_seconds / fast_seconds if fast_seconds else np.inf,
+            'max_abs_diff': report['max_abs_diff'].max(),
+            'max_rel_diff': report['max_rel_diff'].max(),
+            'passed': bool(report['passed'].all()),
+        })
+
+    return pd.DataFrame(summary), pd.concat(reports, ignore_index=True)
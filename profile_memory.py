@@ -0,0 +1,89 @@
+# profile_memory.py
+
+import argparse
+import contextlib
+import importlib
+import io
+import sys
+
+import pandas as pd
+
+from cli import OUTPUTS
+from models.memory_profile import enable_memory_profiling
+from models.memory_profile import disable_memory_profiling
+from models.memory_profile import PIPELINE_STAGES
+from models.utilities import scratch_directory
+
+
+def profile_memory(names: list = None, top: int = 10, n_frames: int = 1,
+                   report_path: str = 'fin_data_output/memory_report.csv',
+                   sites_path: str = 'fin_data_output/memory_sites.csv'):
+
+    names = names or ['is', 'bs', 'ratio']
+
+    stage_dfs = []
+    site_dfs = []
+
+    for name in names:
+        module = importlib.import_module(OUTPUTS[name]['module'])
+        render = getattr(module, OUTPUTS[name]['module'])
+
+        # one profiler per output so each run starts from cold companies. the render writes into a scratch directory,
+        # profiling leaves fin_data_output as it is
+        with scratch_directory():
+            profiler = enable_memory_profiling(top=top, n_frames=n_frames)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    render()
+            finally:
+                disable_memory_profiling()
+
+        stage_df = profiler.return_stage_df()
+        stage_df.insert(0, 'output', name)
+        stage_dfs.append(stage_df)
+        site_df = profiler.return_site_df()
+        site_df.insert(0, 'output', name)
+        site_dfs.append(site_df)
+
+    stage_df = pd.concat(stage_dfs, ignore_index=True)
+    site_df = pd.concat(site_dfs, ignore_index=True)
+    stage_df.to_csv(report_path, index=False)
+    site_df.to_csv(sites_path, index=False)
+
+    # stage totals over the tickers, pipeline order first
+    summary = stage_df.groupby(['output', 'stage'], sort=False).agg(
+        net_mb=('net_mb', 'sum'),
+        peak_over_start_mb=('peak_over_start_mb', 'max'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+    ).reset_index()
+    summary['order'] = summary['stage'].map({stage: i for i, stage in enumerate(PIPELINE_STAGES)})
+    summary = summary.sort_values(['output', 'order'], kind='stable').drop(columns=['order'])
+
+    top_sites = site_df.groupby(['output', 'stage', 'site', 'code'], sort=False)['size_diff_mb'].sum()
+    top_sites = top_sites.sort_values(ascending=False).head(top).reset_index()
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.max_colwidth', 80):
+        print(summary.to_string(index=False, float_format='{:.2f}'.format))
+        print('\ntop allocation sites:')
+        print(top_sites.to_string(index=False, float_format='{:.2f}'.format))
+
+    print(f'\nper ticker report in {report_path}, allocation sites in {sites_path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='render outputs in a scratch directory with tracemalloc on and report memory per stage')
+    parser.add_argument('outputs', nargs='*', help=f'any of {", ".join(OUTPUTS)} (default: is bs ratio)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='allocation sites kept per stage and ticker, 0 to skip them')
+    parser.add_argument('--frames', type=int, default=1, help='traceback frames tracemalloc keeps per allocation')
+    parser.add_argument('--report', default='fin_data_output/memory_report.csv')
+    parser.add_argument('--sites', default='fin_data_output/memory_sites.csv')
+    args = parser.parse_args()
+
+    for output in args.outputs:
+        if output not in OUTPUTS:
+            parser.error(f'unknown output {output}, choose from {", ".join(OUTPUTS)}')
+
+    profile_memory(args.outputs, top=args.top, n_frames=args.frames, report_path=args.report, sites_path=args.sites)
+    sys.exit(0)
@@ -0,0 +1,46 @@
+# query_data.py
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from models.query import Dataset
+
+
+def query_data(conditions: list = None, tickers: list = None, ratios: list = None, items: list = None,
+               explain: bool = False) -> pd.DataFrame:
+
+    dataset = Dataset().filter(*(conditions or []), ticker=tickers).select(ratios=ratios, items=items)
+    print(dataset)
+    if explain:
+        return None
+
+    start = time.perf_counter()
+    result = dataset.collect()
+    seconds = time.perf_counter() - start
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 60, 'display.max_rows', 500):
+        print(result.to_string(index=False))
+    print(f'\n{len(result)} rows in {seconds * 1000:.0f}ms')
+
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='query ratios or statement items, loading only the files, quarters and line items needed')
+    parser.add_argument('conditions', nargs='*', help='e.g. "year >= 2015" "current_ratio > 1.5"')
+    parser.add_argument('--ticker', nargs='+', help='only these companies')
+    parser.add_argument('--ratios', nargs='+', help='RATIOS attribute names, one row per company and year')
+    parser.add_argument('--items', nargs='+', help='statement attributes, one row per company and quarter')
+    parser.add_argument('--explain', action='store_true', help='print the plan without running it')
+    args = parser.parse_args()
+
+    try:
+        query_data(args.conditions, tickers=args.ticker, ratios=args.ratios, items=args.items, explain=args.explain)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    sys.exit(0)
@@ -0,0 +1,31 @@
+# render_calendar_ratio_data.py
+
+import pandas as pd
+import itertools
+
+from models.company import Company
+from models.calendarization import return_calendar_statement_groups
+from settings import COMPANIES_LIST
+
+
+def render_calendar_ratio_data():
+
+    # same ratios as render_ratio_data, on calendar years so companies with offset fiscal years line up
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    ratio_data = []
+
+    for company in companies:
+        statement_groups = return_calendar_statement_groups(company)
+        for year in statement_groups:
+            ratio_data.append(statement_groups[year].return_data_list())
+
+    flat_list = list(itertools.chain(*ratio_data))
+
+    ratio_df = pd.DataFrame(flat_list)
+
+    ratio_df.to_csv('fin_data_output/calendar_ratio_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_calendar_ratio_data()
@@ -0,0 +1,33 @@
+# render_correlation_data.py
+
+from models.company import Company
+from models.correlation import return_monthly_returns
+from models.correlation import return_ratio_matrix
+from models.correlation import write_blocked_correlation
+from models.panels import return_ratio_panel
+from settings import COMPANIES_LIST
+from settings import TICKERS
+
+CORRELATION_RATIOS = [
+    'gross_margin', 'operating_margin', 'return_on_invested_capital', 'current_ratio', 'ev_to_ebitda'
+]
+
+
+def render_correlation_data():
+
+    monthly_returns = return_monthly_returns(TICKERS)
+    write_blocked_correlation(monthly_returns.to_numpy(), monthly_returns.columns,
+                              path='fin_data_output/return_correlation.npy',
+                              covariance_path='fin_data_output/return_covariance.npy')
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+    ratio_panel = return_ratio_panel(companies)
+
+    for ratio in CORRELATION_RATIOS:
+        ratio_matrix = return_ratio_matrix(ratio_panel, ratio)
+        write_blocked_correlation(ratio_matrix.to_numpy(), ratio_matrix.columns,
+                                  path=f'fin_data_output/ratio_correlation_{ratio}.npy', min_periods=5)
+
+
+if __name__ == '__main__':
+    render_correlation_data()
@@ -0,0 +1,19 @@
+# render_dcf_data.py
+
+from models.company import Company
+from models.dcf import return_fcf_panel
+from models.dcf import return_dcf_data
+from settings import COMPANIES_LIST
+
+
+def render_dcf_data():
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    dcf_df = return_dcf_data(return_fcf_panel(companies))
+
+    dcf_df.to_csv('fin_data_output/dcf_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_dcf_data()
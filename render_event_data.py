@@ -0,0 +1,19 @@
+# render_event_data.py
+
+from models.company import Company
+from models.event_study import return_event_study_data
+from settings import COMPANIES_LIST
+
+
+def render_event_data():
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    event_df, car_df = return_event_study_data(companies)
+
+    event_df.to_csv('fin_data_output/event_data.csv', index=False)
+    car_df.to_csv('fin_data_output/event_car_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_event_data()
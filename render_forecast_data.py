@@ -0,0 +1,20 @@
+# render_forecast_data.py
+
+from models.company import Company
+from models.forecast import return_forecast_data
+from models.forecast import return_pro_forma_ratios
+from settings import COMPANIES_LIST
+
+
+def render_forecast_data():
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    forecast_df = return_forecast_data(companies)
+
+    forecast_df.to_csv('fin_data_output/forecast_data.csv', index=False)
+    return_pro_forma_ratios(forecast_df).to_csv('fin_data_output/pro_forma_ratio_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_forecast_data()
@@ -0,0 +1,18 @@
+# render_growth_data.py
+
+from models.company import Company
+from models.growth import return_growth_data
+from settings import COMPANIES_LIST
+
+
+def render_growth_data():
+
+    companies = [Company(**company) for company in COMPANIES_LIST]
+
+    growth_df = return_growth_data(companies)
+
+    growth_df.to_csv('fin_data_output/growth_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_growth_data()
@@ -1,21 +1,25 @@
 # render_is_data.py
 
 import pandas as pd
-import itertools
 
 from models.company import Company
+from models.cubes import write_detail_and_cube
+from models.cubes import IS_CUBE_KEYS
+from models.memory_profile import profile_stage
 from settings import COMPANIES_LIST
+from settings import TICKERS
 
 
-def render_is_data():
+def render_is_data(tickers: list = None):
 
-    companies = [Company(**company) for company in COMPANIES_LIST]
+    # tickers: only rebuild these companies and update the existing outputs incrementally
+    companies = [Company(**company) for company in COMPANIES_LIST if tickers is None or company['ticker'] in tickers]
 
-    is_data = list(itertools.chain(*[company.return_is_data_list() for company in companies]))
+    with profile_stage('output', 'all'):
+        is_df = pd.concat([company.return_is_data_df() for company in companies], ignore_index=True)
 
-    is_df = pd.DataFrame(is_data)
-
-    is_df.to_csv('fin_data_output/is_data.csv', index=False)
+        write_detail_and_cube(is_df, 'fin_data_output/is_data.csv', 'fin_data_output/is_cube.csv', IS_CUBE_KEYS,
+                              'amount', tickers=tickers, ticker_order=TICKERS, date_columns=['statementDate'])
 
 
 if __name__ == '__main__':
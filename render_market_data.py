@@ -0,0 +1,15 @@
+# render_market_data.py
+
+from models.market import return_market_data
+from settings import TICKERS
+
+
+def render_market_data():
+
+    market_df = return_market_data(TICKERS)
+
+    market_df.to_csv('fin_data_output/market_data.csv', index=False)
+
+
+if __name__ == '__main__':
+    render_market_data()
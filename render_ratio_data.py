@@ -4,25 +4,34 @@ import pandas as pd
 import itertools
 
 from models.company import Company
+from models.cubes import write_detail_and_cube
+from models.cubes import RATIO_CUBE_KEYS
+from models.memory_profile import profile_stage
 from settings import COMPANIES_LIST
+from settings import TICKERS
 
 
-def render_ratio_data():
+def render_ratio_data(tickers: list = None):
 
-    companies = [Company(**company) for company in COMPANIES_LIST]
+    # tickers: only rebuild these companies and update the existing outputs incrementally
+    companies = [Company(**company) for company in COMPANIES_LIST if tickers is None or company['ticker'] in tickers]
 
     ratio_data = []
 
     for company in companies:
-        for year in company.statement_groups:
-            consolidated_statement = company.statement_groups[year]
-            ratio_data.append(consolidated_statement.return_data_list())
+        statement_groups = company.statement_groups
+        with profile_stage('output', company.ticker):
+            for year in statement_groups:
+                consolidated_statement = statement_groups[year]
+                ratio_data.append(consolidated_statement.return_data_list())
 
-    flat_list = list(itertools.chain(*ratio_data))
+    with profile_stage('output', 'all'):
+        flat_list = list(itertools.chain(*ratio_data))
 
-    ratio_df = pd.DataFrame(flat_list)
+        ratio_df = pd.DataFrame(flat_list)
 
-    ratio_df.to_csv('fin_data_output/ratio_data.csv', index=False)
+        write_detail_and_cube(ratio_df, 'fin_data_output/ratio_data.csv', 'fin_data_output/ratio_cube.csv',
+                              RATIO_CUBE_KEYS, 'value', tickers=tickers, ticker_order=TICKERS)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,41 @@
+# render_sqlite_data.py
+
+import itertools
+
+from models.company import Company
+from models.sqlite_store import return_connection
+from models.sqlite_store import upsert_statement_data
+from models.sqlite_store import upsert_ratio_data
+from settings import COMPANIES_LIST
+from settings import SQLITE_PATH
+
+
+def render_sqlite_data(tickers: list = None, path: str = SQLITE_PATH):
+
+    # tickers: only rebuild these companies and upsert their rows, the other companies' rows stay as they are
+    companies = [Company(**company) for company in COMPANIES_LIST if tickers is None or company['ticker'] in tickers]
+
+    is_data = list(itertools.chain(*[company.return_is_data_list() for company in companies]))
+    bs_data = list(itertools.chain(*[company.return_bs_data_list() for company in companies]))
+    ratio_data = list(itertools.chain(*[
+        company.statement_groups[year].return_data_list()
+        for company in companies
+        for year in company.statement_groups
+    ]))
+
+    conn = return_connection(path)
+
+    # each table is upserted in its own transaction and the rendered tickers' rows that the new data no longer holds
+    # are deleted in it, readers see the old rows or the new ones
+    rendered_tickers = [company.ticker for company in companies]
+    n_is = upsert_statement_data(conn, 'is_data', is_data, tickers=rendered_tickers)
+    n_bs = upsert_statement_data(conn, 'bs_data', bs_data, tickers=rendered_tickers)
+    n_ratio = upsert_ratio_data(conn, ratio_data, tickers=rendered_tickers)
+    conn.execute('ANALYZE')
+    conn.close()
+
+    print(f'{path}: upserted {n_is} is rows, {n_bs} bs rows, {n_ratio} ratio rows')
+
+
+if __name__ == '__main__':
+    render_sqlite_data()
@@ -0,0 +1,75 @@
+# restate_data.py
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from cli import return_output_status
+from models.manifest import load_manifest
+from models.manifest import save_manifest
+from models.restatement import return_restatement_mismatches
+from models.restatement import Restatement
+from models.restatement import OUTPUT_CELLS
+from settings import MANIFEST_PATH
+
+
+def restate_data(change_path: str, explain: bool = False, verify: bool = True) -> bool:
+
+    restatement = Restatement(pd.read_csv(change_path, dtype={'value': str}))
+    print(restatement)
+    if explain:
+        return True
+
+    # outputs that were fresh before stay fresh: their cells are patched along with the inputs
+    manifest = load_manifest(MANIFEST_PATH)
+    fresh = [name for name, status in return_output_status(list(OUTPUT_CELLS), manifest).items() if status['fresh']]
+
+    start = time.perf_counter()
+    cells = restatement.apply()
+    seconds = time.perf_counter() - start
+
+    for name, cells_df in cells.items():
+        print(f'{name}: rewrote {len(cells_df)} cells in {OUTPUT_CELLS[name][0]}')
+    print(f'restated in {seconds * 1000:.0f}ms')
+
+    # the patched cells are only as complete as the dependency graph, so they are checked unless asked not to. an
+    # output that was stale before differs from a rebuild anyway and is not compared
+    passed = True
+    if verify and fresh:
+        mismatches = return_restatement_mismatches(list(restatement.changes['company'].unique()), names=fresh)
+        if len(mismatches):
+            with pd.option_context('display.width', 200, 'display.max_columns', 20):
+                print(mismatches.to_string(index=False))
+        passed = not len(mismatches)
+        print(f'\nverification of {", ".join(fresh)} {"passed" if passed else "FAILED"} against a full rebuild of '
+              f'the changed tickers')
+    elif verify:
+        print(f'\nnot verified: none of {", ".join(OUTPUT_CELLS)} was rendered from the current inputs, run cli.py '
+              f'refresh first')
+
+    # a failed verification leaves the outputs stale, so cli.py refresh renders them again
+    if fresh and passed:
+        for name, status in return_output_status(fresh, manifest).items():
+            manifest['outputs'][name] = {'digest': status['digest'], 'inputs': status['inputs']}
+        save_manifest(MANIFEST_PATH, manifest)
+
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='restate line items in fin_data_input and recompute only the output cells that depend on them')
+    parser.add_argument('changes', help='csv of company, statementDate, field, value rows')
+    parser.add_argument('--explain', action='store_true', help='print the affected cells without changing anything')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='skip comparing the patched outputs to a full rebuild of the changed tickers')
+    args = parser.parse_args()
+
+    try:
+        passed = restate_data(args.changes, explain=args.explain, verify=not args.no_verify)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,57 @@
+# screen_data.py
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from models.screener import RatioScreener
+from models.screener import return_wide_ratio_panel
+
+
+def return_year(value: str):
+    if value == 'latest':
+        return value
+    if value == 'all':
+        return None
+
+    return int(value)
+
+
+def screen_data(expression: str, year='latest', order_by: str = None, descending: bool = True, top: int = None,
+                all_columns: bool = False, path: str = 'fin_data_output/ratio_data.csv') -> pd.DataFrame:
+
+    screener = RatioScreener(return_wide_ratio_panel(path))
+
+    start = time.perf_counter()
+    result = screener.screen(expression, year=year, order_by=order_by, descending=descending, top=top,
+                             all_columns=all_columns)
+    seconds = time.perf_counter() - start
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 60, 'display.max_rows', 500):
+        print(result.to_string(index=False))
+    print(f'\n{len(result)} rows of {screener.n_rows} in {seconds * 1000:.2f}ms')
+
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='screen the ratio panel, e.g. "current_ratio > 1.5 AND ev_to_ebitda < 12"')
+    parser.add_argument('expression', help='conditions on RATIOS attribute names joined with AND')
+    parser.add_argument('--year', type=return_year, default='latest', help='a year, latest (default) or all')
+    parser.add_argument('--order-by', help='ratio to order the results by, descending unless --ascending')
+    parser.add_argument('--ascending', action='store_true')
+    parser.add_argument('--top', type=int, help='keep the first n results')
+    parser.add_argument('--all-columns', action='store_true', help='show every ratio, not just the screened ones')
+    parser.add_argument('--path', default='fin_data_output/ratio_data.csv')
+    args = parser.parse_args()
+
+    try:
+        screen_data(args.expression, year=args.year, order_by=args.order_by, descending=not args.ascending,
+                    top=args.top, all_columns=args.all_columns, path=args.path)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    sys.exit(0)
@@ -0,0 +1,161 @@
+# serve_data.py
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+from models.output_panels import OutputPanels
+
+# endpoint -> (panel, accepted query parameters)
+ENDPOINTS = {
+    '/income': ('income', ['company', 'year', 'quarter', 'account']),
+    '/balance': ('balance', ['company', 'year', 'quarter', 'account']),
+    '/ratios': ('ratios', ['company', 'year', 'ratio']),
+    '/peers': ('ratios', ['year', 'ratio']),
+}
+INT_PARAMS = ['year', 'quarter']
+
+
+class ResponseCache:
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size: int = max_size
+        self.lock = threading.Lock()
+        self.responses: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.responses:
+                return None
+            self.responses.move_to_end(key)
+            return self.responses[key]
+
+    def put(self, key, value: bytes):
+        with self.lock:
+            self.responses[key] = value
+            self.responses.move_to_end(key)
+            while len(self.responses) > self.max_size:
+                self.responses.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.responses.clear()
+
+
+class PanelStore:
+
+    def __init__(self, reload_interval: float = 2.0, cache_size: int = 1024):
+        self.panels: OutputPanels = OutputPanels()
+        self.generation: int = 0
+        self.cache = ResponseCache(max_size=cache_size)
+        self.reload_interval: float = reload_interval
+
+    def watch(self):
+        # a failed poll only skips this reload: if the thread died the server would never reload again
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                if not self.panels.is_stale():
+                    continue
+                # load the new panels on this thread; requests keep using the old ones until the swap
+                panels = OutputPanels()
+            except Exception as e:
+                print(f'reload skipped: {e!r}')
+                continue
+            self.panels = panels
+            self.generation += 1
+            self.cache.clear()
+            print(f'reloaded {self.panels}')
+
+    def return_response(self, path: str, query: dict) -> bytes:
+        # the generation keeps a response cached before a reload from being served after it
+        key = (self.generation, path, tuple(sorted(query.items())))
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        panels = self.panels
+        if path == '/companies':
+            body = panels.return_companies()
+        else:
+            panel, _ = ENDPOINTS[path]
+            body = panels.return_rows(panel, **query)
+        response = json.dumps(body).encode()
+
+        self.cache.put(key, response)
+
+        return response
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    store: PanelStore = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path != '/companies' and url.path not in ENDPOINTS:
+            return self.send_json(404, {'error': f'unknown endpoint {url.path}'})
+
+        accepted = ENDPOINTS[url.path][1] if url.path in ENDPOINTS else []
+        query = {}
+        for param, values in parse_qs(url.query).items():
+            if param not in accepted:
+                return self.send_json(400, {'error': f'unknown parameter {param}'})
+            try:
+                query[param] = int(values[-1]) if param in INT_PARAMS else values[-1]
+            except ValueError:
+                return self.send_json(400, {'error': f'{param} must be an integer'})
+
+        if url.path == '/peers' and ('year' not in query or 'ratio' not in query):
+            return self.send_json(400, {'error': '/peers requires year and ratio'})
+
+        self.send_body(200, self.store.return_response(url.path, query))
+
+    def send_json(self, status: int, body: dict):
+        self.send_body(status, json.dumps(body).encode())
+
+    def send_body(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_data(host: str = '127.0.0.1', port: int = 8841, reload_interval: float = 2.0, cache_size: int = 1024):
+
+    RequestHandler.store = PanelStore(reload_interval=reload_interval, cache_size=cache_size)
+    print(f'loaded {RequestHandler.store.panels}')
+
+    watcher = threading.Thread(target=RequestHandler.store.watch, daemon=True)
+    watcher.start()
+
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    print(f'serving on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='serve the rendered fin_data_output panels as json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8841)
+    parser.add_argument('--reload-interval', type=float, default=2.0)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    serve_data(host=args.host, port=args.port, reload_interval=args.reload_interval, cache_size=args.cache_size)
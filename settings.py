@@ -12,3 +12,15 @@ COMPANIES_LIST = [
     {'ticker': 'TXN', 'quarter_offset': 0},
     {'ticker': 'XLNX', 'quarter_offset': 0},
 ]
+
+# statement amounts are stored as int64 multiples of this many dollars
+AMOUNT_UNIT = 1
+
+SQLITE_PATH = 'fin_data_output/fin_data.sqlite'
+
+INPUT_DIR = 'fin_data_input'
+OUTPUT_DIR = 'fin_data_output'
+MANIFEST_PATH = 'fin_data_output/manifest.json'
+
+# content addressed chunks and vintage manifests of fin_data_input, see models.snapshot_store
+SNAPSHOT_DIR = 'fin_data_snapshots'
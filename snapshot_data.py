@@ -0,0 +1,103 @@
+# snapshot_data.py
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from models.snapshot_store import create_snapshot
+from models.snapshot_store import load_vintage
+from models.snapshot_store import render_snapshot
+from models.snapshot_store import restore_snapshot
+from models.snapshot_store import return_store_size
+from models.snapshot_store import return_vintage_diff
+from models.snapshot_store import return_vintages
+from settings import INPUT_DIR
+from settings import SNAPSHOT_DIR
+
+
+def snapshot(input_dir: str, store_dir: str, label: str = None) -> int:
+    start = time.perf_counter()
+    vintage, written = create_snapshot(input_dir=input_dir, store_dir=store_dir, label=label)
+    seconds = time.perf_counter() - start
+
+    print(f'vintage {vintage["vintage"]} ({vintage["created"]}): {len(vintage["files"])} files, '
+          f'{"unchanged" if not written else f"{written / 2 ** 10:.1f}KB of new chunks"} in {seconds * 1000:.0f}ms, '
+          f'store {return_store_size(store_dir) / 2 ** 20:.2f}MB')
+
+    return 0
+
+
+def list_vintages(store_dir: str) -> int:
+    for vintage in return_vintages(store_dir):
+        print(f'{vintage["vintage"]}  {vintage["created"]}  {len(vintage["files"])} files  {vintage["label"] or ""}')
+
+    return 0
+
+
+def diff(old_id: str, new_id: str, store_dir: str, output_path: str = None) -> int:
+    start = time.perf_counter()
+    diff_df = return_vintage_diff(load_vintage(old_id, store_dir), load_vintage(new_id, store_dir), store_dir)
+    seconds = time.perf_counter() - start
+
+    if output_path:
+        diff_df.to_csv(output_path, index=False)
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.max_rows', 100):
+        print(diff_df.head(100).to_string(index=False))
+    print(f'\n{len(diff_df)} changed values in {diff_df["file"].nunique()} files in {seconds * 1000:.0f}ms')
+
+    # exit code 1 tells a scheduler that the vintages differ
+    return 1 if len(diff_df) else 0
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='keep every vintage of fin_data_input as deduplicated chunks')
+    parser.add_argument('--store', default=SNAPSHOT_DIR, help='snapshot store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = subparsers.add_parser('create', help='snapshot the input directory as a new vintage')
+    create_parser.add_argument('--input-dir', default=INPUT_DIR)
+    create_parser.add_argument('--label', help='e.g. the vendor refresh or restatement this vintage records')
+
+    subparsers.add_parser('list', help='list the vintages, oldest first')
+
+    diff_parser = subparsers.add_parser('diff', help='list the (field, period) values that differ between vintages')
+    diff_parser.add_argument('old', help='vintage id, unique prefix or latest')
+    diff_parser.add_argument('new', help='vintage id, unique prefix or latest')
+    diff_parser.add_argument('--output', help='write every changed value to this csv')
+
+    restore_parser = subparsers.add_parser('restore', help='write a vintage\'s input files into a directory')
+    restore_parser.add_argument('vintage')
+    restore_parser.add_argument('target_dir')
+
+    render_parser = subparsers.add_parser('render', help='render outputs from a vintage instead of fin_data_input')
+    render_parser.add_argument('vintage')
+    render_parser.add_argument('outputs', nargs='*', help='cli.py output names (default: all)')
+    render_parser.add_argument('--copy-to', required=True, help='directory the rendered outputs are copied to')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'create':
+            return snapshot(args.input_dir, args.store, label=args.label)
+        if args.command == 'list':
+            return list_vintages(args.store)
+        if args.command == 'diff':
+            return diff(args.old, args.new, args.store, output_path=args.output)
+        vintage = load_vintage(args.vintage, args.store)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.command == 'restore':
+        print(f'restored {restore_snapshot(vintage, args.target_dir, store_dir=args.store)} files of vintage '
+              f'{vintage["vintage"]} to {args.target_dir}')
+        return 0
+
+    render_snapshot(vintage, args.copy_to, outputs=args.outputs, store_dir=args.store)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
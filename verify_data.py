@@ -0,0 +1,54 @@
+# verify_data.py
+
+import argparse
+import sys
+
+import pandas as pd
+
+from models.verification import VERIFICATION_PATHS
+from models.verification import run_verification
+from settings import COMPANIES_LIST
+
+
+def verify_data(names: list = None, atol: float = 1e-9, rtol: float = 1e-9, min_speedup: float = None,
+                report_path: str = 'fin_data_output/verification_report.csv') -> bool:
+
+    names = names or list(VERIFICATION_PATHS)
+
+    summary_df, report_df = run_verification(names, COMPANIES_LIST, atol=atol, rtol=rtol)
+
+    report_df.to_csv(report_path, index=False)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print(summary_df.to_string(index=False))
+        failed = report_df[~report_df['passed']]
+        if len(failed):
+            print('\nitems outside tolerance:')
+            print(failed.to_string(index=False))
+
+    # a rollout needs both: outputs within tolerance and, if asked, a minimum speedup
+    passed = bool(summary_df['passed'].all())
+    if min_speedup is not None:
+        passed = passed and bool((summary_df['speedup'].isna() | (summary_df['speedup'] >= min_speedup)).all())
+
+    print(f'\nverification {"passed" if passed else "FAILED"}, per item report in {report_path}')
+
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compare the legacy and optimized output paths on the same inputs')
+    parser.add_argument('datasets', nargs='*', help=f'any of {", ".join(VERIFICATION_PATHS)} (default: all)')
+    parser.add_argument('--atol', type=float, default=1e-9)
+    parser.add_argument('--rtol', type=float, default=1e-9)
+    parser.add_argument('--min-speedup', type=float,
+                        help='fail unless every timed fast path is at least this much faster')
+    parser.add_argument('--report', default='fin_data_output/verification_report.csv')
+    args = parser.parse_args()
+
+    for dataset in args.datasets:
+        if dataset not in VERIFICATION_PATHS:
+            parser.error(f'unknown dataset {dataset}, choose from {", ".join(VERIFICATION_PATHS)}')
+
+    sys.exit(0 if verify_data(args.datasets, atol=args.atol, rtol=args.rtol, min_speedup=args.min_speedup,
+                              report_path=args.report) else 1)